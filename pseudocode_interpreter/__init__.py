@@ -10,14 +10,24 @@ __version__ = "1.0.0"
 __author__ = "Chuck Finch - Fragillidae Software"
 
 from .core import *
-from .gui import *
+
+GUI_NAMES = ('PseudocodeIDE', 'PseudocodeHighlighter', 'InputDialog')
+
+def __getattr__(name):
+    """Import the GUI, and with it PyQt6, only when one of its classes is used"""
+    if name in GUI_NAMES:
+        from . import gui
+        return getattr(gui, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 __all__ = [
     # Core components
     'Token', 'TokenType', 'Lexer',
     'Node', 'NodeType', 'Parser', 
-    'Variable', 'Number', 'String', 'List', 'Function', 'SymbolTable',
-    'Interpreter',
+    'Variable', 'Number', 'String', 'List', 'Map', 'Set', 'Stack', 'Queue', 'Function', 'SymbolTable',
+    'Interpreter', 'ProfilingInterpreter', 'MemoryProfilingInterpreter', 'SamplingProfiler', 'LineIndex', 'PseudocodeError', 'ProgramStopped',
+    'StepLimitExceeded', 'TimeLimitExceeded',
+    'OutputSink', 'BufferSink', 'RingBufferSink', 'FileSink', 'CallbackSink',
     # GUI components
     'PseudocodeIDE', 'PseudocodeHighlighter', 'InputDialog'
 ] 
\ No newline at end of file
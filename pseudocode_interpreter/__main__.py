@@ -0,0 +1,308 @@
+"""
+Command line runner: python -m pseudocode_interpreter run program.pseudo
+                     python -m pseudocode_interpreter grade programs/ --tests tests/
+                     python -m pseudocode_interpreter serve --port 8000
+
+Runs a program without the GUI, so PyQt6 is never imported. PRINT output
+goes to stdout, INPUT reads lines from stdin and errors go to stderr.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+from .core.lexer import Lexer
+from .core.parser import Parser
+from .core.interning import intern_ast
+from .core.interpreter import Interpreter
+from .core.profiler import ProfilingInterpreter
+from .core.memory_profiler import MemoryProfilingInterpreter
+from .core.sampler import SamplingProfiler
+from .core.output import FileSink
+from .core.values import Variable
+from .core.ast_nodes import AST
+
+ENGINES = ('tree', 'sandbox')
+
+def read_stdin_line(var_name):
+    """The next line of stdin for an INPUT, without its newline"""
+    line = sys.stdin.readline()
+    if not line:
+        raise Exception(f"No input left for INPUT {var_name}")
+    return line.rstrip('\n')
+
+def count_nodes(root):
+    """Number of nodes in an AST"""
+    count = 0
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        count += 1
+        for field in type(node).__slots__:
+            value = getattr(node, field, None)
+            if isinstance(value, AST):
+                stack.append(value)
+            elif isinstance(value, list):
+                stack.extend(child for child in value if isinstance(child, AST))
+    return count
+
+def max_rss_mb():
+    """Peak resident memory of this process in MB, or None where that is not known"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 2**20 if sys.platform == 'darwin' else rss / 2**10
+
+def run_tree(code, cwd, timings, stats, args):
+    """Run code with the tree-walking interpreter in this process"""
+    sink = FileSink(sys.stdout, batch_lines=1000, interval=0.1)
+    if args.memory:
+        interpreter = MemoryProfilingInterpreter(output=sink)
+    elif args.profile:
+        interpreter = ProfilingInterpreter(output=sink)
+    else:
+        interpreter = Interpreter(output=sink)
+    interpreter.cwd = cwd
+    interpreter.max_steps = args.max_steps
+    interpreter.max_seconds = args.timeout
+
+    def read_input(node):
+        """INPUT: read the next line of stdin"""
+        sink.flush()
+        result = read_stdin_line(node.name)
+        try:
+            value = Variable(float(result))
+        except ValueError:
+            value = Variable(result)
+        interpreter.current_symbol_table.set(node.name, value)
+        return value
+
+    interpreter.visit_input = read_input
+
+    start = time.perf_counter()
+    lexer = Lexer(code)
+    tokens = lexer.generate_tokens()
+    timings['lex'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    ast = Parser(tokens, lexer.line_index).parse()
+    timings['parse'] = time.perf_counter() - start
+
+    stats['tokens'] = len(tokens)
+    stats['AST nodes'] = count_nodes(ast)
+    if args.intern:
+        start = time.perf_counter()
+        ast, interner = intern_ast(ast)
+        timings['intern'] = time.perf_counter() - start
+        stats['shared nodes'] = f"{interner.reused} of {interner.seen} expressions"
+
+    sampler = SamplingProfiler(interpreter, args.sample_interval / 1000) if args.sample else None
+    start = time.perf_counter()
+    try:
+        if sampler is not None:
+            sampler.start()
+        interpreter.interpret(ast, lexer.line_index)
+    finally:
+        timings['run'] = time.perf_counter() - start
+        stats['steps'] = interpreter.steps
+        if sampler is not None:
+            sampler.stop()
+            sampler.write(args.sample, name=os.path.basename(args.file))
+            stats['samples'] = len(sampler.samples)
+        if args.profile or args.memory:
+            sink.flush()
+            sys.stderr.write("\n" + interpreter.report())
+
+def run_sandbox(code, cwd, timings, stats, args):
+    """Run code in a resource-limited child process"""
+    from .core.sandbox import SandboxPool
+
+    def write(text):
+        sys.stdout.write(text)
+        sys.stdout.flush()
+
+    start = time.perf_counter()
+    try:
+        SandboxPool(size=0).run(code, cwd, on_output=write, on_input=read_stdin_line)
+    finally:
+        timings['run'] = time.perf_counter() - start
+
+def run_command(args):
+    """run: execute a program file and return the exit status"""
+    for flag, value in (('--profile', args.profile), ('--memory', args.memory), ('--sample', args.sample),
+                        ('--intern', args.intern)):
+        if value and args.engine != 'tree':
+            print(f"Error: {flag} needs --engine tree", file=sys.stderr)
+            return 2
+    if args.profile and args.memory:
+        print("Error: --profile and --memory cannot be used together", file=sys.stderr)
+        return 2
+    try:
+        with open(args.file, 'r', encoding='utf-8') as file:
+            code = file.read()
+    except OSError as e:
+        print(f"Error: cannot read '{args.file}': {e.strerror}", file=sys.stderr)
+        return 2
+
+    timings = {}
+    stats = {'lines': code.count('\n') + 1}
+    run = run_sandbox if args.engine == 'sandbox' else run_tree
+    status = 0
+    start = time.perf_counter()
+    try:
+        run(code, os.path.dirname(os.path.abspath(args.file)), timings, stats, args)
+    except KeyboardInterrupt:
+        status = 130
+    except Exception as e:
+        sys.stdout.flush()
+        print(f"Error: {e}", file=sys.stderr)
+        status = 1
+    timings['total'] = time.perf_counter() - start
+    sys.stdout.flush()
+
+    if args.time:
+        print("time: " + ", ".join(f"{name} {seconds * 1000:.1f} ms" for name, seconds in timings.items()),
+              file=sys.stderr)
+    if args.stats:
+        rss = max_rss_mb()
+        if rss is not None:
+            stats['max RSS MB'] = round(rss, 1)
+        print("stats: " + ", ".join(f"{name} {value}" for name, value in stats.items()), file=sys.stderr)
+    return status
+
+def open_cache(args):
+    """The ResultCache named by --cache, or None"""
+    if not args.cache:
+        return None
+    from .cache import ResultCache
+    return ResultCache(args.cache, max_bytes=args.cache_mb * 2**20)
+
+def add_cache_arguments(parser):
+    parser.add_argument('--cache', metavar='DIR',
+                        help="keep results in DIR and reuse them for identical runs")
+    parser.add_argument('--cache-mb', type=int, default=64,
+                        help="size above which the least recently used results are removed (default: 64)")
+
+def grade_command(args):
+    """grade: run every program in a directory on the test fixtures and report the results"""
+    from . import batch
+
+    for directory in (args.programs, args.tests):
+        if directory is not None and not os.path.isdir(directory):
+            print(f"Error: '{directory}' is not a directory", file=sys.stderr)
+            return 2
+
+    cache = open_cache(args)
+    start = time.perf_counter()
+    results = batch.grade(args.programs, args.tests, jobs=args.jobs, timeout=args.timeout,
+                          max_steps=args.max_steps, memory_mb=args.memory_mb, cache=cache, intern=args.intern)
+    seconds = time.perf_counter() - start
+
+    file = open(args.output, 'w', encoding='utf-8', newline='') if args.output else sys.stdout
+    try:
+        if args.format == 'csv':
+            batch.write_csv(results, file)
+        else:
+            batch.write_json(results, file, seconds, cache)
+    finally:
+        if args.output:
+            file.close()
+
+    summary = batch.summarize(results)
+    print(f"graded {len(results)} runs in {seconds:.2f} s: " +
+          ", ".join(f"{count} {status}" for status, count in summary.items()), file=sys.stderr)
+    if cache is not None:
+        stats = cache.stats()
+        print(f"cache: {stats['hits']} hits, {stats['misses']} misses, {stats['uncacheable']} uncacheable",
+              file=sys.stderr)
+    return 0 if set(summary) <= {'passed', 'ran'} else 1
+
+def serve_command(args):
+    """serve: run the local grading service until interrupted"""
+    from .server import GradingServer
+
+    workers = args.workers or os.cpu_count() or 1
+    try:
+        server = GradingServer((args.host, args.port), workers=workers, max_queue=args.max_queue,
+                               timeout=args.timeout, memory_mb=args.memory_mb, cache=open_cache(args))
+    except OSError as e:
+        print(f"Error: cannot listen on {args.host}:{args.port}: {e.strerror}", file=sys.stderr)
+        return 2
+    host, port = server.server_address[:2]
+    print(f"grading service on http://{host}:{port} with {workers} workers", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m pseudocode_interpreter',
+                                     description="Run pseudocode programs without the IDE")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help="run a program file")
+    run_parser.add_argument('file', help="the .pseudo file to run")
+    run_parser.add_argument('--engine', choices=ENGINES, default='tree',
+                            help="'tree' runs in this process; 'sandbox' runs in a child process "
+                                 "with limited CPU time and memory (default: tree)")
+    run_parser.add_argument('--max-steps', type=int,
+                            help="stop after this many steps: each loop iteration counts one per statement of "
+                                 "its body, each call one (tree engine)")
+    run_parser.add_argument('--timeout', type=float, help="stop after this many seconds (tree engine)")
+    run_parser.add_argument('--profile', action='store_true',
+                            help="print the time spent in each function and line to stderr (tree engine)")
+    run_parser.add_argument('--memory', action='store_true',
+                            help="print the values each function and line created, the peak memory and the "
+                                 "largest arrays to stderr (tree engine)")
+    run_parser.add_argument('--sample', metavar='FILE',
+                            help="sample the call stack while the program runs and write a flamegraph to FILE: "
+                                 "speedscope JSON if it ends in .json, else collapsed stacks (tree engine)")
+    run_parser.add_argument('--sample-interval', type=float, default=5, metavar='MS',
+                            help="milliseconds between samples for --sample (default: 5)")
+    run_parser.add_argument('--intern', action='store_true',
+                            help="share one node between identical expressions of the parsed program (tree engine)")
+    run_parser.add_argument('--time', action='store_true', help="print the time of each phase to stderr")
+    run_parser.add_argument('--stats', action='store_true', help="print program statistics to stderr")
+    run_parser.set_defaults(handler=run_command)
+
+    grade_parser = commands.add_parser('grade', help="run a directory of programs on the same tests, in parallel")
+    grade_parser.add_argument('programs', help="directory of .pseudo files to grade")
+    grade_parser.add_argument('--tests', help="directory of NAME.in / NAME.out test fixtures")
+    grade_parser.add_argument('--jobs', type=int, help="worker processes (default: one per core)")
+    grade_parser.add_argument('--timeout', type=float, default=10,
+                              help="wall time limit per test in seconds (default: 10)")
+    grade_parser.add_argument('--max-steps', type=int,
+                              help="step limit per test, as for run --max-steps")
+    grade_parser.add_argument('--memory-mb', type=int, default=512,
+                              help="memory limit per worker process in MB (default: 512)")
+    grade_parser.add_argument('--intern', action='store_true',
+                              help="share one node between identical expressions of each parsed program")
+    grade_parser.add_argument('--format', choices=('json', 'csv'), default='json', help="report format")
+    grade_parser.add_argument('--output', help="write the report to this file instead of stdout")
+    add_cache_arguments(grade_parser)
+    grade_parser.set_defaults(handler=grade_command)
+
+    serve_parser = commands.add_parser('serve', help="run programs sent over HTTP in warm worker processes")
+    serve_parser.add_argument('--host', default='127.0.0.1', help="address to listen on (default: 127.0.0.1)")
+    serve_parser.add_argument('--port', type=int, default=8000, help="port to listen on (default: 8000)")
+    serve_parser.add_argument('--workers', type=int, help="programs run at once (default: one per core)")
+    serve_parser.add_argument('--max-queue', type=int, default=64,
+                              help="jobs that may wait for a worker before new ones are refused (default: 64)")
+    serve_parser.add_argument('--timeout', type=float, default=10,
+                              help="longest time a job may run, in seconds (default: 10)")
+    serve_parser.add_argument('--memory-mb', type=int, default=512,
+                              help="memory limit per program in MB (default: 512)")
+    add_cache_arguments(serve_parser)
+    serve_parser.set_defaults(handler=serve_command)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,263 @@
+"""
+Batch grading: run a directory of programs against the same test inputs,
+in parallel across all cores, and report per-program results.
+
+A tests directory holds fixtures in pairs: NAME.in is fed to INPUT line by
+line and NAME.out is the expected output. Either file may be missing: a
+test without .in gets no input and one without .out is only run.
+"""
+
+import csv
+import difflib
+import json
+import multiprocessing
+import os
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from .core.lexer import Lexer
+from .core.parser import Parser
+from .core.interning import intern_ast
+from .core.interpreter import Interpreter, preload_stdlib
+from .core.values import Variable
+from .core.errors import StepLimitExceeded, TimeLimitExceeded
+from .core.sandbox import set_limits
+
+STATUSES = ('passed', 'failed', 'ran', 'error', 'timeout', 'step_limit', 'memory', 'crashed')
+CSV_FIELDS = ('program', 'test', 'status', 'seconds', 'parse_seconds', 'steps', 'error', 'diff')
+MAX_DIFF_CHARS = 2000
+ALARM_GRACE = 1.0  # Seconds past the time limit before SIGALRM interrupts a run
+UNCACHED_STATUSES = ('timeout', 'memory', 'crashed')  # Depend on the machine, not only the program
+
+def find_programs(directory):
+    """Paths of the .pseudo files in directory, sorted by name"""
+    return sorted(os.path.join(directory, name) for name in os.listdir(directory)
+                  if name.endswith('.pseudo'))
+
+def load_tests(directory):
+    """[(name, input text, expected output or None)] from the .in/.out fixtures in directory"""
+    if directory is None:
+        return [("", "", None)]
+    names = sorted({os.path.splitext(name)[0] for name in os.listdir(directory)
+                    if name.endswith(('.in', '.out'))})
+    tests = []
+    for name in names:
+        texts = []
+        for extension in ('.in', '.out'):
+            path = os.path.join(directory, name + extension)
+            if os.path.exists(path):
+                with open(path, 'r', encoding='utf-8') as file:
+                    texts.append(file.read())
+            else:
+                texts.append(None)
+        tests.append((name, texts[0] or "", texts[1]))
+    return tests
+
+def normalize(text):
+    """Output lines without trailing whitespace or trailing blank lines, for comparison"""
+    lines = [line.rstrip() for line in text.split('\n')]
+    while lines and not lines[-1]:
+        lines.pop()
+    return lines
+
+def output_diff(expected, actual):
+    """Unified diff of the expected and actual output, cut to MAX_DIFF_CHARS"""
+    diff = "\n".join(difflib.unified_diff(normalize(expected), normalize(actual),
+                                          'expected', 'actual', n=1, lineterm=''))
+    if len(diff) > MAX_DIFF_CHARS:
+        diff = diff[:MAX_DIFF_CHARS] + "\n..."
+    return diff
+
+def error_status(error):
+    """Result status for an error raised by a run"""
+    cause = error
+    while cause is not None:
+        if isinstance(cause, TimeLimitExceeded):
+            return 'timeout'
+        if isinstance(cause, StepLimitExceeded):
+            return 'step_limit'
+        if isinstance(cause, MemoryError):
+            return 'memory'
+        cause = cause.__cause__
+    return 'error'
+
+def _time_limit_exceeded(signum, frame):
+    raise TimeLimitExceeded("Time limit exceeded")
+
+def _init_worker(memory_mb):
+    """Worker process: parse the stdlib unless inherited from the parent, and limit memory"""
+    preload_stdlib()
+    if memory_mb is not None:
+        set_limits(None, memory_mb * 2**20)
+    if hasattr(signal, 'SIGALRM'):
+        signal.signal(signal.SIGALRM, _time_limit_exceeded)
+
+def run_test(ast, line_index, cwd, input_text, timeout, max_steps):
+    """Run a parsed program on one input; return (output, error or None, seconds, steps)"""
+    interpreter = Interpreter()
+    interpreter.cwd = cwd
+    interpreter.max_steps = max_steps
+    interpreter.max_seconds = timeout
+    lines = iter(input_text.splitlines())
+
+    def read_input(node):
+        """INPUT: the next line of the test input"""
+        result = next(lines, None)
+        if result is None:
+            raise Exception(f"No input left for INPUT {node.name}")
+        try:
+            value = Variable(float(result))
+        except ValueError:
+            value = Variable(result)
+        interpreter.current_symbol_table.set(node.name, value)
+        return value
+
+    interpreter.visit_input = read_input
+    error = None
+    start = time.perf_counter()
+    try:
+        # The interpreter checks the time at loop iterations and calls; the alarm
+        # stops a run stuck in one long operation
+        if timeout is not None and hasattr(signal, 'setitimer'):
+            signal.setitimer(signal.ITIMER_REAL, timeout + ALARM_GRACE)
+        try:
+            interpreter.interpret(ast, line_index)
+        finally:
+            if timeout is not None and hasattr(signal, 'setitimer'):
+                signal.setitimer(signal.ITIMER_REAL, 0)
+    except (Exception, MemoryError) as e:
+        error = e
+    return interpreter.output_text, error, time.perf_counter() - start, interpreter.steps
+
+def grade_program(path, code, tests, timeout, max_steps, intern=False):
+    """Worker job: parse a program once, interning it if asked, and run it on every test"""
+    program = os.path.basename(path)
+    results = []
+    start = time.perf_counter()
+    try:
+        lexer = Lexer(code)
+        ast = Parser(lexer.generate_tokens(), lexer.line_index).parse()
+        if intern:
+            ast = intern_ast(ast)[0]
+        parse_error = None
+    except Exception as e:
+        parse_error = e
+    parse_seconds = time.perf_counter() - start
+
+    for name, input_text, expected in tests:
+        result = {'program': program, 'test': name, 'status': None, 'seconds': 0.0,
+                  'parse_seconds': round(parse_seconds, 6), 'steps': 0, 'error': None, 'diff': ""}
+        if parse_error is not None:
+            result.update(status='error', error=str(parse_error))
+            results.append(result)
+            continue
+
+        output, error, seconds, steps = run_test(ast, lexer.line_index, os.path.dirname(path),
+                                                 input_text, timeout, max_steps)
+        result.update(seconds=round(seconds, 6), steps=steps)
+        if error is not None:
+            status = error_status(error)
+            result.update(status=status, error="Memory limit exceeded" if status == 'memory' else str(error))
+        elif expected is None:
+            result['status'] = 'ran'
+        elif normalize(output) == normalize(expected):
+            result['status'] = 'passed'
+        else:
+            result.update(status='failed', diff=output_diff(expected, output))
+        results.append(result)
+    return results
+
+def grade(programs_dir, tests_dir=None, jobs=None, timeout=10, max_steps=None, memory_mb=512, cache=None,
+          intern=False):
+    """Run every program in programs_dir on every test in tests_dir and return the results.
+
+    Each result is a dict with the keys in CSV_FIELDS. The stdlib is parsed
+    here once, and worker processes started with 'fork' inherit it. With a
+    ResultCache, runs already in the cache are not repeated, and results
+    other than time, memory and crash failures are stored in it. With
+    intern, each program's AST is interned after parsing, which does not
+    change its results.
+    """
+    tests = load_tests(tests_dir)
+    sources = {}
+    for path in find_programs(programs_dir):
+        with open(path, 'r', encoding='utf-8') as file:
+            sources[path] = file.read()
+
+    results = {}
+    keys = {}
+    pending = {}
+    for path, code in sources.items():
+        results[path] = {}
+        missing = []
+        for test in tests:
+            key = None
+            if cache is not None:
+                key = cache.key(code, test[1].splitlines(), os.path.dirname(path),
+                                [max_steps, test[2]])
+            cached = cache.get(key) if key is not None else None
+            if cached is not None:
+                results[path][test[0]] = dict(cached, program=os.path.basename(path), test=test[0])
+            else:
+                keys[path, test[0]] = key
+                missing.append(test)
+        if missing:
+            pending[path] = (code, missing)
+
+    if pending:
+        preload_stdlib()
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context('fork' if 'fork' in methods else 'spawn')
+
+    # A crashed worker breaks the whole pool; rerun what it took down in a new
+    # pool until a round completes nothing, then report the rest as crashed
+    while pending:
+        with ProcessPoolExecutor(max_workers=jobs, mp_context=context,
+                                 initializer=_init_worker, initargs=(memory_mb,)) as pool:
+            futures = {path: pool.submit(grade_program, path, code, missing, timeout, max_steps, intern)
+                       for path, (code, missing) in pending.items()}
+            broken = {}
+            for path, future in futures.items():
+                try:
+                    for result in future.result():
+                        results[path][result['test']] = result
+                        key = keys[path, result['test']]
+                        if key is not None and result['status'] not in UNCACHED_STATUSES:
+                            cache.put(key, result)
+                except BrokenProcessPool:
+                    broken[path] = pending[path]
+        if len(broken) == len(pending):
+            for path, (code, missing) in broken.items():
+                for name, _, _ in missing:
+                    results[path][name] = {'program': os.path.basename(path), 'test': name, 'status': 'crashed',
+                                           'seconds': 0.0, 'parse_seconds': 0.0, 'steps': 0,
+                                           'error': "The process running the program crashed", 'diff': ""}
+            break
+        pending = broken
+
+    return [results[path][name] for path in sorted(results) for name, _, _ in tests]
+
+def summarize(results):
+    """Number of results with each status"""
+    summary = {status: 0 for status in STATUSES}
+    for result in results:
+        summary[result['status']] += 1
+    return {status: count for status, count in summary.items() if count}
+
+def write_json(results, file, seconds=None, cache=None):
+    """Write the results and their summary, and the stats of a ResultCache if given, as JSON"""
+    report = {'summary': summarize(results), 'results': results}
+    if seconds is not None:
+        report['seconds'] = round(seconds, 3)
+    if cache is not None:
+        report['cache'] = cache.stats()
+    json.dump(report, file, indent=2)
+    file.write("\n")
+
+def write_csv(results, file):
+    """Write one CSV row per result"""
+    writer = csv.DictWriter(file, fieldnames=CSV_FIELDS)
+    writer.writeheader()
+    writer.writerows(results)
@@ -0,0 +1,204 @@
+"""
+On-disk cache of run results, for grading the same programs over and over.
+
+A result is stored under a hash of the program's normalized source, the
+source of every file it INCLUDEs (directly or not), its input lines and
+the interpreter version. Programs that READ files or call shell() are
+never cached, since their output can change between runs.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from .core.lexer import Lexer
+from .core.parser import Parser
+from .core.interpreter import STDLIB_DIR
+from .core.ast_nodes import AST, Read, Call, Include
+
+UNCACHEABLE_CALLS = {'shell'}
+
+_version = None
+
+def interpreter_version():
+    """The package version and a hash of the core sources, so any change to the interpreter misses the cache"""
+    global _version
+    if _version is None:
+        from . import __version__
+        digest = hashlib.sha256(__version__.encode('utf-8'))
+        core = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'core')
+        for name in sorted(os.listdir(core)):
+            if name.endswith('.py'):
+                with open(os.path.join(core, name), 'rb') as file:
+                    digest.update(name.encode('utf-8') + b'\0' + file.read())
+        _version = f"{__version__}-{digest.hexdigest()[:16]}"
+    return _version
+
+def normalize_source(code):
+    """Source with uniform line endings and no trailing whitespace, which do not change what it does"""
+    lines = [line.rstrip() for line in code.replace('\r\n', '\n').replace('\r', '\n').split('\n')]
+    while lines and not lines[-1]:
+        lines.pop()
+    return "\n".join(lines)
+
+def resolve_include(filename, cwd):
+    """Path INCLUDE filename would read, searched like Interpreter.visit_include, or None"""
+    if os.path.isabs(filename):
+        return filename if os.path.isfile(filename) else None
+    for directory in (cwd, STDLIB_DIR):
+        path = os.path.join(directory, filename)
+        if os.path.isfile(path):
+            return path
+    return None
+
+def scan(root):
+    """(INCLUDE filenames, whether the AST reads files or runs shell commands)"""
+    includes = []
+    impure = False
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, Include):
+            includes.append(node.filename)
+        elif isinstance(node, Read) or (isinstance(node, Call) and node.name in UNCACHEABLE_CALLS):
+            impure = True
+        for field in type(node).__slots__:
+            value = getattr(node, field, None)
+            if isinstance(value, AST):
+                stack.append(value)
+            elif isinstance(value, list):
+                stack.extend(child for child in value if isinstance(child, AST))
+    return includes, impure
+
+# LRU cache of run results in a directory of JSON files
+class ResultCache:
+    """Results of deterministic runs, kept as one file each in directory.
+
+    The least recently used entries are removed once the files take more
+    than max_bytes. Use key() to get the key of a run, or None if the run
+    must not be cached, then get() and put(). Counters of hits and misses
+    are kept per ResultCache and returned by stats().
+    """
+
+    def __init__(self, directory, max_bytes=64 * 2**20):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.scanned = {}  # (path, source) of INCLUDE files -> scan() of that source
+        self.hits = self.misses = self.uncacheable = self.stores = self.evictions = 0
+
+        # Entries from oldest to most recently used, as key -> size in bytes
+        os.makedirs(directory, exist_ok=True)
+        entries = []
+        for name in os.listdir(directory):
+            if name.endswith('.json'):
+                status = os.stat(os.path.join(directory, name))
+                entries.append((status.st_mtime, name[:-len('.json')], status.st_size))
+        self.entries = OrderedDict((key, size) for _, key, size in sorted(entries))
+        self.size = sum(self.entries.values())
+
+    def path(self, key):
+        return os.path.join(self.directory, key + '.json')
+
+    def scan_source(self, path, source):
+        """scan() of a source; INCLUDE files (path given) are parsed once per ResultCache"""
+        result = self.scanned.get((path, source)) if path is not None else None
+        if result is None:
+            lexer = Lexer(source)
+            result = scan(Parser(lexer.generate_tokens(), lexer.line_index).parse())
+            if path is not None:
+                self.scanned[(path, source)] = result
+        return result
+
+    def key(self, code, input_lines, cwd="", context=None):
+        """Key of running code on input_lines in cwd, or None if the run must not be cached.
+
+        context is anything else, encodable as JSON, that changes the
+        result, such as a step limit.
+        """
+        digest = hashlib.sha256()
+        for part in (interpreter_version(), json.dumps(context), normalize_source(code)):
+            digest.update(part.encode('utf-8') + b'\0')
+
+        # Follow the INCLUDE closure, hashing each file once
+        seen = set()
+        pending = [(None, code)]
+        try:
+            while pending:
+                path, source = pending.pop()
+                includes, impure = self.scan_source(path, source)
+                if impure:
+                    break
+                for filename in includes:
+                    include_path = resolve_include(filename, cwd)
+                    if include_path is None:
+                        impure = True  # Fails now, but the file may appear later
+                        break
+                    if include_path not in seen:
+                        seen.add(include_path)
+                        with open(include_path, 'r') as file:
+                            include_source = file.read()
+                        digest.update(f"{filename}\0{include_source}\0".encode('utf-8'))
+                        pending.append((include_path, include_source))
+                if impure:
+                    break
+        except Exception:
+            impure = True  # Syntax errors in includes show when the program runs
+        if impure:
+            with self.lock:
+                self.uncacheable += 1
+            return None
+
+        digest.update(json.dumps(list(input_lines)).encode('utf-8'))
+        return digest.hexdigest()
+
+    def get(self, key):
+        """The result stored under key, or None"""
+        try:
+            with open(self.path(key), 'r', encoding='utf-8') as file:
+                result = json.load(file)
+        except (OSError, ValueError):
+            with self.lock:
+                self.misses += 1
+            return None
+        with self.lock:
+            self.hits += 1
+            if key in self.entries:
+                self.entries.move_to_end(key)
+        try:
+            os.utime(self.path(key))  # Keeps the order for the next ResultCache on this directory
+        except OSError:
+            pass
+        return result
+
+    def put(self, key, result):
+        """Store result, a value encodable as JSON, under key and evict old entries to fit"""
+        data = json.dumps(result).encode('utf-8')
+        temporary = f"{self.path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporary, 'wb') as file:
+            file.write(data)
+        os.replace(temporary, self.path(key))
+
+        with self.lock:
+            self.stores += 1
+            self.size += len(data) - self.entries.pop(key, 0)
+            self.entries[key] = len(data)
+            while self.size > self.max_bytes and len(self.entries) > 1:
+                old_key, old_size = self.entries.popitem(last=False)
+                self.size -= old_size
+                self.evictions += 1
+                try:
+                    os.remove(self.path(old_key))
+                except OSError:
+                    pass
+
+    def stats(self):
+        """Counters of this cache's use, and its size"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {'hits': self.hits, 'misses': self.misses, 'uncacheable': self.uncacheable,
+                    'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                    'stores': self.stores, 'evictions': self.evictions,
+                    'entries': len(self.entries), 'bytes': self.size}
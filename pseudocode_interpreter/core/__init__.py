@@ -2,12 +2,20 @@ from .tokens import Token, TokenType
 from .lexer import Lexer
 from .ast_nodes import Node, NodeType
 from .parser import Parser
-from .values import Variable, Number, String, List, Function, SymbolTable
+from .values import Variable, Number, String, List, Map, Set, Stack, Queue, Function, SymbolTable
 from .interpreter import Interpreter
+from .profiler import ProfilingInterpreter
+from .memory_profiler import MemoryProfilingInterpreter
+from .sampler import SamplingProfiler
+from .source import LineIndex
+from .errors import PseudocodeError, ProgramStopped, StepLimitExceeded, TimeLimitExceeded
+from .output import OutputSink, BufferSink, RingBufferSink, FileSink, CallbackSink
 
 __all__ = [
     'Token', 'TokenType', 'Lexer',
     'Node', 'NodeType', 'Parser',
-    'Variable', 'Number', 'String', 'List', 'Function', 'SymbolTable',
-    'Interpreter'
+    'Variable', 'Number', 'String', 'List', 'Map', 'Set', 'Stack', 'Queue', 'Function', 'SymbolTable',
+    'Interpreter', 'ProfilingInterpreter', 'MemoryProfilingInterpreter', 'SamplingProfiler', 'LineIndex', 'PseudocodeError', 'ProgramStopped',
+    'StepLimitExceeded', 'TimeLimitExceeded',
+    'OutputSink', 'BufferSink', 'RingBufferSink', 'FileSink', 'CallbackSink'
 ] 
\ No newline at end of file
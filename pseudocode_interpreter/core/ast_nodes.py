@@ -22,15 +22,18 @@ class NodeType(Enum):
     LTE = auto()
     EE = auto()
     NE = auto()
+    IN = auto()       # Membership: element IN set, map or list
     IF = auto()
     IF_ELSE = auto()
     FOR = auto()
+    FOR_EACH = auto()
     WHILE = auto()
     PRINT = auto()
     READ = auto()
     INPUT = auto()
     STRING = auto()
     LIST = auto()
+    MAP = auto()
     BLOCK = auto()
     DEF = auto()
     ARGS = auto()
@@ -48,14 +51,16 @@ class NodeType(Enum):
     BOOLEAN = auto()
     ARRAY_ACCESS = auto()
     ARRAY_ASSIGN = auto()
+    LAZY_BODY = auto()  # Function body parsed on first call
 
-# Node class
+# Node class: the generic form of an AST node, with positional children
 class Node:
-    def __init__(self, type_: NodeType, value=None, name=None, nodes=None):
+    def __init__(self, type_: NodeType, value=None, name=None, nodes=None, pos=None):
         self.type = type_
         self.value = value
         self.name = name
         self.nodes = nodes or []
+        self.pos = pos  # Source offset, recorded for statements
 
     def __repr__(self):
         result = f"{self.type.name}"
@@ -68,4 +73,399 @@ class Node:
         if self.nodes:
             result += f"[{', '.join(str(node) for node in self.nodes)}]"
 
-        return result
\ No newline at end of file
+        return result
+
+    def to_node(self):
+        """Nodes are already in Node form"""
+        return self
+
+# AST node classes
+#
+# The parser builds one compact class per kind of node, with named fields
+# instead of a positional `nodes` list. `type` is the NodeType the
+# interpreter dispatches on. to_node() converts a tree to the Node form,
+# whose repr is also used for these classes.
+class AST:
+    __slots__ = ('pos',)  # Source offset, recorded for statements
+
+    def to_node(self):
+        """Convert to a tree of Node objects"""
+        raise NotImplementedError
+
+    def __repr__(self):
+        return repr(self.to_node())
+
+class Null(AST):
+    __slots__ = ()
+    type = NodeType.NULL
+
+    def __init__(self):
+        self.pos = None
+
+    def to_node(self):
+        return Node(NodeType.NULL)
+
+class NumberLiteral(AST):
+    __slots__ = ('value',)
+    type = NodeType.NUMBER
+
+    def __init__(self, value):
+        self.value = value
+        self.pos = None
+
+    def to_node(self):
+        return Node(NodeType.NUMBER, value=self.value)
+
+class StringLiteral(AST):
+    __slots__ = ('value',)
+    type = NodeType.STRING
+
+    def __init__(self, value):
+        self.value = value
+        self.pos = None
+
+    def to_node(self):
+        return Node(NodeType.STRING, name=self.value)
+
+class BooleanLiteral(AST):
+    __slots__ = ('value',)  # 'TRUE' or 'FALSE'
+    type = NodeType.BOOLEAN
+
+    def __init__(self, value):
+        self.value = value
+        self.pos = None
+
+    def to_node(self):
+        return Node(NodeType.BOOLEAN, name=self.value)
+
+class ListLiteral(AST):
+    __slots__ = ('elements',)
+    type = NodeType.LIST
+
+    def __init__(self, elements):
+        self.elements = elements
+        self.pos = None
+
+    def to_node(self):
+        return Node(NodeType.LIST, nodes=[element.to_node() for element in self.elements])
+
+class MapLiteral(AST):
+    __slots__ = ('keys', 'values')  # Key and value expressions, in source order
+    type = NodeType.MAP
+
+    def __init__(self, keys, values):
+        self.keys = keys
+        self.values = values
+        self.pos = None
+
+    def to_node(self):
+        nodes = []
+        for key, value in zip(self.keys, self.values):
+            nodes += [key.to_node(), value.to_node()]
+        return Node(NodeType.MAP, nodes=nodes)
+
+class VarAccess(AST):
+    __slots__ = ('name',)
+    type = NodeType.VAR_ACCESS
+
+    def __init__(self, name):
+        self.name = name
+        self.pos = None
+
+    def to_node(self):
+        return Node(NodeType.VAR_ACCESS, name=self.name)
+
+class VarAssign(AST):
+    __slots__ = ('name', 'value', 'self_append')
+    type = NodeType.VAR_ASSIGN
+
+    def __init__(self, name, value):
+        self.name = name
+        self.value = value
+        self.pos = None
+        # x <- x + expr, which the interpreter can run as an in-place append when x is a list
+        self.self_append = (value.type is NodeType.ADD and value.left.type is NodeType.VAR_ACCESS
+                            and value.left.name == name)
+
+    def to_node(self):
+        return Node(NodeType.VAR_ASSIGN, name=self.name, nodes=[self.value.to_node()])
+
+class ArrayAccess(AST):
+    __slots__ = ('name', 'indices')
+    type = NodeType.ARRAY_ACCESS
+
+    def __init__(self, name, indices):
+        self.name = name
+        self.indices = indices
+        self.pos = None
+
+    def to_node(self):
+        return Node(NodeType.ARRAY_ACCESS, name=self.name, nodes=[index.to_node() for index in self.indices])
+
+class ArrayAssign(AST):
+    __slots__ = ('name', 'indices', 'value')
+    type = NodeType.ARRAY_ASSIGN
+
+    def __init__(self, name, indices, value):
+        self.name = name
+        self.indices = indices
+        self.value = value
+        self.pos = None
+
+    def to_node(self):
+        nodes = [index.to_node() for index in self.indices] + [self.value.to_node()]
+        return Node(NodeType.ARRAY_ASSIGN, name=self.name, nodes=nodes)
+
+class BinOp(AST):
+    __slots__ = ('type', 'left', 'right')  # type is ADD, EE, AND, ...
+
+    def __init__(self, type_, left, right):
+        self.type = type_
+        self.left = left
+        self.right = right
+        self.pos = None
+
+    def to_node(self):
+        return Node(self.type, nodes=[self.left.to_node(), self.right.to_node()])
+
+class UnaryOp(AST):
+    __slots__ = ('type', 'operand')  # type is PLUS, MINUS or NOT
+
+    def __init__(self, type_, operand):
+        self.type = type_
+        self.operand = operand
+        self.pos = None
+
+    def to_node(self):
+        return Node(self.type, nodes=[self.operand.to_node()])
+
+class Call(AST):
+    __slots__ = ('name', 'args')
+    type = NodeType.FUNCTION_CALL
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+        self.pos = None
+
+    def to_node(self):
+        return Node(NodeType.FUNCTION_CALL, name=self.name, nodes=[arg.to_node() for arg in self.args])
+
+class Block(AST):
+    __slots__ = ('statements',)
+    type = NodeType.BLOCK
+
+    def __init__(self, statements):
+        self.statements = statements
+        self.pos = None
+
+    def to_node(self):
+        return Node(NodeType.BLOCK, nodes=[statement.to_node() for statement in self.statements])
+
+class If(AST):
+    __slots__ = ('condition', 'body')
+    type = NodeType.IF
+
+    def __init__(self, condition, body):
+        self.condition = condition
+        self.body = body
+        self.pos = None
+
+    def to_node(self):
+        return Node(NodeType.IF, nodes=[self.condition.to_node(), self.body.to_node()])
+
+class IfElse(AST):
+    __slots__ = ('condition', 'body', 'else_body')
+    type = NodeType.IF_ELSE
+
+    def __init__(self, condition, body, else_body):
+        self.condition = condition
+        self.body = body
+        self.else_body = else_body
+        self.pos = None
+
+    def to_node(self):
+        return Node(NodeType.IF_ELSE, nodes=[self.condition.to_node(), self.body.to_node(),
+                                             self.else_body.to_node()])
+
+class For(AST):
+    __slots__ = ('var', 'start', 'end', 'step', 'body')
+    type = NodeType.FOR
+
+    def __init__(self, var, start, end, step, body):
+        self.var = var
+        self.start = start
+        self.end = end
+        self.step = step
+        self.body = body
+        self.pos = None
+
+    def to_node(self):
+        return Node(NodeType.FOR, name=self.var, nodes=[self.start.to_node(), self.end.to_node(),
+                                                        self.step.to_node(), self.body.to_node()])
+
+class ForEach(AST):
+    __slots__ = ('var', 'iterable', 'body')
+    type = NodeType.FOR_EACH
+
+    def __init__(self, var, iterable, body):
+        self.var = var
+        self.iterable = iterable
+        self.body = body
+        self.pos = None
+
+    def to_node(self):
+        return Node(NodeType.FOR_EACH, name=self.var, nodes=[self.iterable.to_node(), self.body.to_node()])
+
+class While(AST):
+    __slots__ = ('condition', 'body')
+    type = NodeType.WHILE
+
+    def __init__(self, condition, body):
+        self.condition = condition
+        self.body = body
+        self.pos = None
+
+    def to_node(self):
+        return Node(NodeType.WHILE, nodes=[self.condition.to_node(), self.body.to_node()])
+
+class RepeatUntil(AST):
+    __slots__ = ('body', 'condition')
+    type = NodeType.REPEAT_UNTIL
+
+    def __init__(self, body, condition):
+        self.body = body
+        self.condition = condition
+        self.pos = None
+
+    def to_node(self):
+        return Node(NodeType.REPEAT_UNTIL, nodes=[self.body.to_node(), self.condition.to_node()])
+
+class Def(AST):
+    __slots__ = ('name', 'params', 'body', 'return_expr', 'lazy_body')
+    type = NodeType.DEF
+
+    def __init__(self, name, params, body, return_expr, lazy_body=None):
+        self.name = name
+        self.params = params            # Parameter names
+        self.body = body                # None until a lazy body is parsed
+        self.return_expr = return_expr
+        self.lazy_body = lazy_body      # LazyBody to parse body and return_expr from
+        self.pos = None
+
+    def to_node(self):
+        args = Node(NodeType.ARGS, nodes=[Node(NodeType.ARG, name=param) for param in self.params])
+        if self.body is None:
+            return Node(NodeType.DEF, name=self.name, nodes=[args, Node(NodeType.LAZY_BODY, value=self.lazy_body)])
+        return Node(NodeType.DEF, name=self.name, nodes=[args, self.body.to_node(), self.return_expr.to_node()])
+
+class Return(AST):
+    __slots__ = ('value',)
+    type = NodeType.RETURN
+
+    def __init__(self, value):
+        self.value = value
+        self.pos = None
+
+    def to_node(self):
+        return Node(NodeType.RETURN, nodes=[self.value.to_node()])
+
+class Print(AST):
+    __slots__ = ('args',)
+    type = NodeType.PRINT
+
+    def __init__(self, args):
+        self.args = args
+        self.pos = None
+
+    def to_node(self):
+        return Node(NodeType.PRINT, nodes=[arg.to_node() for arg in self.args])
+
+class Read(AST):
+    __slots__ = ('args',)
+    type = NodeType.READ
+
+    def __init__(self, args):
+        self.args = args
+        self.pos = None
+
+    def to_node(self):
+        return Node(NodeType.READ, nodes=[arg.to_node() for arg in self.args])
+
+class Input(AST):
+    __slots__ = ('name',)
+    type = NodeType.INPUT
+
+    def __init__(self, name):
+        self.name = name
+        self.pos = None
+
+    def to_node(self):
+        return Node(NodeType.INPUT, name=self.name)
+
+class Include(AST):
+    __slots__ = ('filename',)
+    type = NodeType.INCLUDE
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.pos = None
+
+    def to_node(self):
+        return Node(NodeType.INCLUDE, name=self.filename)
+
+class Declare(AST):
+    __slots__ = ('name', 'type_name')
+    type = NodeType.DECLARE
+
+    def __init__(self, name, type_name):
+        self.name = name
+        self.type_name = type_name
+        self.pos = None
+
+    def to_node(self):
+        return Node(NodeType.DECLARE, name=self.name, nodes=[Node(NodeType.STRING, name=self.type_name)])
+
+class Case(AST):
+    __slots__ = ('name', 'items', 'otherwise', 'table')
+    type = NodeType.CASE
+
+    def __init__(self, name, items, otherwise=None):
+        self.name = name
+        self.items = items
+        self.otherwise = otherwise  # CaseOtherwise or None
+        self.table = None           # CaseTable built on first run, False if a label is not constant
+        self.pos = None
+
+    def to_node(self):
+        nodes = [item.to_node() for item in self.items]
+        if self.otherwise is not None:
+            nodes.append(self.otherwise.to_node())
+        return Node(NodeType.CASE, name=self.name, nodes=nodes)
+
+class CaseItem(AST):
+    __slots__ = ('value', 'range_end', 'body')
+    type = NodeType.CASE_ITEM
+
+    def __init__(self, value, range_end, body):
+        self.value = value
+        self.range_end = range_end  # Upper bound of a 'value TO range_end' label, or None
+        self.body = body            # List of statements
+        self.pos = None
+
+    def to_node(self):
+        nodes = [self.value.to_node()]
+        if self.range_end is not None:
+            nodes.append(self.range_end.to_node())
+        return Node(NodeType.CASE_ITEM, nodes=nodes + [statement.to_node() for statement in self.body])
+
+class CaseOtherwise(AST):
+    __slots__ = ('body',)
+    type = NodeType.CASE_OTHERWISE
+
+    def __init__(self, body):
+        self.body = body
+        self.pos = None
+
+    def to_node(self):
+        return Node(NodeType.CASE_OTHERWISE, nodes=[statement.to_node() for statement in self.body])
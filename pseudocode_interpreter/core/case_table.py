@@ -0,0 +1,86 @@
+from bisect import bisect_left
+from .ast_nodes import NodeType, NumberLiteral, StringLiteral, BooleanLiteral, UnaryOp
+
+def is_constant_label(expr):
+    """Whether a CASE label always evaluates to the same value, with no side effects"""
+    if isinstance(expr, (NumberLiteral, StringLiteral, BooleanLiteral)):
+        return True
+    return (isinstance(expr, UnaryOp) and expr.type in (NodeType.PLUS, NodeType.MINUS)
+            and isinstance(expr.operand, NumberLiteral))
+
+# Jump table for a CASE whose labels are all constants
+class CaseTable:
+    """Find the first CASE arm matching a value without walking the arms.
+
+    Single labels go into a dict from value to the first arm with that label.
+    Range labels are cut into disjoint pieces: every distinct bound is a
+    point, and between two neighbouring points lies an open gap. Each piece
+    records the first range arm covering it, and a value's piece is found
+    with bisect. The answer is the earlier of the two candidates, which is
+    the arm the linear walk would have stopped at.
+    """
+
+    def __init__(self, labels):
+        """labels holds, for each arm in order, (value, None) or (low, high) as Variables"""
+        self.values = {}           # Single label value -> index of the first arm with it
+        self.first_range = None    # Index of the first range arm
+        self.bad_range = None      # Index of the first range arm with a non-number bound
+        ranges = []
+
+        for index, (value, range_end) in enumerate(labels):
+            if range_end is None:
+                if value.type in ("number", "string"):
+                    self.values.setdefault(value.value.value, index)
+                continue
+
+            if self.first_range is None:
+                self.first_range = index
+            if value.type != "number" or range_end.type != "number":
+                if self.bad_range is None:
+                    self.bad_range = index
+                continue
+            low, high = value.value.value, range_end.value.value
+            if low <= high:  # Also drops NaN bounds, which nothing lies between
+                ranges.append((index, low, high))
+
+        self.points = sorted({bound for _, low, high in ranges for bound in (low, high)})
+        self.point_arms = [None] * len(self.points)
+        self.gap_arms = [None] * len(self.points)  # gap_arms[i] lies between points[i - 1] and points[i]
+        for index, low, high in ranges:
+            first = bisect_left(self.points, low)
+            last = bisect_left(self.points, high)
+            for piece in range(first, last + 1):
+                if self.point_arms[piece] is None:
+                    self.point_arms[piece] = index
+                if piece > first and self.gap_arms[piece] is None:
+                    self.gap_arms[piece] = index
+
+    def range_arm(self, number):
+        """Index of the first range arm containing number, or None"""
+        piece = bisect_left(self.points, number)
+        if piece < len(self.points) and self.points[piece] == number:
+            return self.point_arms[piece]
+        if 0 < piece < len(self.points):
+            return self.gap_arms[piece]
+        return None
+
+    def lookup(self, var_value):
+        """Index of the arm var_value selects, or None to fall through to OTHERWISE"""
+        index = None
+        if var_value.type == "number":
+            number = var_value.value.value
+            index = self.values.get(number)
+            if number == number:  # NaN is in no range
+                arm = self.range_arm(number)
+                if arm is not None and (index is None or arm < index):
+                    index = arm
+        else:
+            if var_value.type == "string":
+                index = self.values.get(var_value.value.value)
+            # The linear walk checks a non-number against the first range arm and fails there
+            if self.first_range is not None and (index is None or index > self.first_range):
+                raise Exception("Range values must be numbers")
+
+        if self.bad_range is not None and (index is None or index > self.bad_range):
+            raise Exception("Range values must be numbers")
+        return index
@@ -0,0 +1,41 @@
+# Error raised by the lexer, parser and interpreter
+class PseudocodeError(Exception):
+    def __init__(self, message, line=None, column=None):
+        self.message = message
+        self.line = line
+        self.column = column
+
+        if line is not None:
+            message = f"{message} (line {line}:{column})"
+        super().__init__(message)
+
+    @classmethod
+    def locate(cls, error, line_index, offset):
+        """Return a copy of error tagged with the position of offset.
+
+        Errors that already carry a position, and errors raised where no
+        position is known, are returned unchanged.
+        """
+        if line_index is None or offset is None:
+            return error
+        if isinstance(error, PseudocodeError):
+            if error.line is not None:
+                return error
+            located = type(error)(error.message, *line_index.line_col(offset))
+            for name, value in vars(error).items():
+                located.__dict__.setdefault(name, value)  # e.g. call_stack
+            return located
+
+        return cls(str(error), *line_index.line_col(offset))
+
+# Raised when a running program is asked to stop
+class ProgramStopped(PseudocodeError):
+    pass
+
+# Raised when a run takes more steps than Interpreter.max_steps allows
+class StepLimitExceeded(PseudocodeError):
+    pass
+
+# Raised when a run goes on for longer than its time limit
+class TimeLimitExceeded(PseudocodeError):
+    pass
@@ -0,0 +1,255 @@
+from bisect import bisect_right
+from .tokens import Token, TokenType
+from .lexer import Lexer
+from .parser import Parser, in_operator_at
+from .ast_nodes import NodeType, Block
+from .source import LineIndex
+from .errors import PseudocodeError
+
+# Keywords that open and close a block of statements
+BLOCK_OPENERS = {'IF', 'FOR', 'WHILE', 'DEF', 'FUNCTION', 'PROCEDURE', 'REPEAT', 'CASE'}
+BLOCK_CLOSERS = {'ENDIF', 'NEXT', 'ENDWHILE', 'ENDEF', 'ENDFUNCTION', 'ENDPROCEDURE', 'UNTIL', 'ENDCASE'}
+
+# Keywords that may end a complete statement
+COMPLETE_KEYWORDS = BLOCK_CLOSERS | {'TRUE', 'FALSE', 'INTEGER', 'REAL', 'STRING', 'BOOLEAN'}
+
+# Tokens after which a statement must carry on
+OPERATOR_TYPES = {TokenType.PLUS, TokenType.MINUS, TokenType.MULTIPLY, TokenType.DIVIDE,
+                  TokenType.POW, TokenType.EQ, TokenType.EE, TokenType.NE, TokenType.LT,
+                  TokenType.GT, TokenType.LTE, TokenType.GTE, TokenType.COMMA,
+                  TokenType.LPAREN, TokenType.LSQBRACKET, TokenType.LBRACE, TokenType.COLON}
+
+# Tokens that can only continue the statement of the previous line
+CONTINUATION_TYPES = OPERATOR_TYPES | {TokenType.RPAREN, TokenType.RSQBRACKET, TokenType.RBRACE}
+CONTINUATION_KEYWORDS = {'AND', 'OR', 'MOD', 'DIV', 'TO', 'STEP', 'THEN', 'DO', 'OF', 'RETURNS'}
+
+# Lexed form of one source line
+class LineInfo:
+    __slots__ = ('tokens', 'depth', 'brackets', 'error', 'open_string')
+
+    def __init__(self, line):
+        self.tokens = []
+        self.depth = 0       # Change in block nesting over the line
+        self.brackets = 0    # Change in bracket nesting over the line
+        self.error = None
+        lexer = Lexer(line)
+        try:
+            self.tokens = lexer.generate_tokens()
+        except PseudocodeError as e:
+            self.error = e
+        self.open_string = lexer.unterminated_string
+
+        for token in self.tokens:
+            if token.type == TokenType.KEYWORD:
+                if token.name in BLOCK_OPENERS:
+                    self.depth += 1
+                elif token.name in BLOCK_CLOSERS:
+                    self.depth -= 1
+            elif token.type in (TokenType.LPAREN, TokenType.LSQBRACKET, TokenType.LBRACE):
+                self.brackets += 1
+            elif token.type in (TokenType.RPAREN, TokenType.RSQBRACKET, TokenType.RBRACE):
+                self.brackets -= 1
+
+    def continues_after(self):
+        """Whether the statement on this line must carry on onto the next line"""
+        last = self.tokens[-1]
+        if last.type == TokenType.KEYWORD:
+            return last.name not in COMPLETE_KEYWORDS
+        return last.type in OPERATOR_TYPES
+
+    def continues_before(self):
+        """Whether this line continues the statement of the line before it"""
+        first = self.tokens[0]
+        if first.type == TokenType.KEYWORD:
+            return first.name in CONTINUATION_KEYWORDS
+        if first.type == TokenType.IDENTIFIER:
+            return in_operator_at(self.tokens, 0)
+        return first.type in CONTINUATION_TYPES
+
+# A run of lines holding whole top-level statements
+class Chunk:
+    __slots__ = ('start', 'end', 'statements', 'errors')
+
+    def __init__(self, start, end):
+        self.start = start
+        self.end = end
+        self.statements = []
+        self.errors = []
+
+# Incremental lexer/parser front end for live checking in the editor
+class IncrementalParser:
+    """Keep the tokens, top-level statements and syntax errors of an edited
+    document up to date.
+
+    Each line is lexed on its own and the lines are grouped into chunks that
+    end where block and bracket nesting return to zero and the next line
+    starts a new statement. An edit re-lexes only the changed lines, then
+    rescans chunk boundaries from the chunk before the edit until they line
+    up with the old boundaries again, and re-parses only the chunks in
+    between. Documents containing a string that spans lines fall back to a
+    full parse.
+    """
+
+    def __init__(self, text=""):
+        self.lines = []
+        self.infos = []
+        self.chunks = []
+        self.full_parse = False
+        self.update(text)
+
+    def update(self, text):
+        """Bring the front end up to date with the new document text"""
+        new_lines = text.split('\n')
+        old_lines = self.lines
+
+        # Find the changed line range by trimming the common prefix and suffix
+        limit = min(len(old_lines), len(new_lines))
+        first = 0
+        while first < limit and old_lines[first] == new_lines[first]:
+            first += 1
+        old_end = len(old_lines)
+        new_end = len(new_lines)
+        while old_end > first and new_end > first and old_lines[old_end - 1] == new_lines[new_end - 1]:
+            old_end -= 1
+            new_end -= 1
+
+        if old_lines and first == old_end and first == new_end:
+            return  # Nothing changed
+        self.edit(first, old_end, new_lines[first:new_end])
+
+    def edit(self, first, last, new_lines):
+        """Replace lines first..last (exclusive) with new_lines"""
+        self.lines[first:last] = new_lines
+        self.infos[first:last] = [LineInfo(line) for line in new_lines]
+        shift = len(new_lines) - (last - first)
+
+        if any(info.open_string for info in self.infos):
+            self.parse_everything()
+            return
+        if self.full_parse or not self.chunks:
+            self.full_parse = False
+            self.chunks = []
+            self.rescan(0, 0, 0, 0, shift)
+            return
+
+        # Rescan from the chunk before the one holding the edit, since the
+        # boundary in front of the edited line depends on its first token
+        starts = [chunk.start for chunk in self.chunks]
+        index = max(bisect_right(starts, first) - 2, 0)
+        self.rescan(index, first, first + len(new_lines), last, shift)
+
+    def rescan(self, index, edit_start, edit_end, old_edit_end, shift):
+        """Rebuild the chunks from self.chunks[index] for an edit of lines edit_start..edit_end"""
+        old_chunks = self.chunks
+        old_starts = {chunk.start: i for i, chunk in enumerate(old_chunks)
+                      if chunk.start >= old_edit_end}
+        start = old_chunks[index].start if old_chunks else 0
+        new_chunks = []
+        depth = 0
+        brackets = 0
+        chunk_start = start
+        reuse_from = None
+        infos = self.infos
+        count = len(infos)
+        line = start
+
+        while line < count:
+            info = infos[line]
+            line += 1
+            if not info.tokens:
+                continue
+            depth = max(depth + info.depth, 0)
+            brackets = max(brackets + info.brackets, 0)
+            if depth or brackets or info.continues_after():
+                continue
+
+            # The statement may still continue onto the next non-blank line
+            following = line
+            while following < count and not infos[following].tokens:
+                following += 1
+            if following < count and infos[following].continues_before():
+                continue
+
+            position = index + len(new_chunks)
+            old = old_chunks[position] if position < len(old_chunks) else None
+            if old is not None and line <= edit_start and (old.start, old.end) == (chunk_start, line):
+                new_chunks.append(old)  # Unchanged chunk in front of the edit
+            else:
+                new_chunks.append(self.parse_chunk(chunk_start, line))
+            chunk_start = line
+            if line >= edit_end and line - shift in old_starts:
+                reuse_from = old_starts[line - shift]
+                break
+
+        if reuse_from is None:
+            if chunk_start < count or not new_chunks:
+                new_chunks.append(self.parse_chunk(chunk_start, count))
+            tail = []
+        else:
+            tail = old_chunks[reuse_from:]
+            for chunk in tail:
+                chunk.start += shift
+                chunk.end += shift
+
+        self.chunks = old_chunks[:index] + new_chunks + tail
+
+    def parse_chunk(self, start, end):
+        """Parse lines start..end (exclusive) as a standalone run of statements"""
+        chunk = Chunk(start, end)
+        tokens = []
+        offset = 0
+
+        for number in range(start, end):
+            info = self.infos[number]
+            if info.error is not None:
+                chunk.errors.append(PseudocodeError(info.error.message, number + 1, info.error.column))
+            for token in info.tokens:
+                tokens.append(Token(token.type, token.value, token.name, token.pos + offset))
+            offset += len(self.lines[number]) + 1
+
+        if chunk.errors:
+            return chunk
+
+        try:
+            node = Parser(tokens, LineIndex('\n'.join(self.lines[start:end]))).parse()
+        except PseudocodeError as e:
+            line = e.line + start if e.line is not None else None
+            chunk.errors.append(PseudocodeError(e.message, line, e.column))
+            return chunk
+
+        if node.type == NodeType.BLOCK:
+            chunk.statements = node.statements
+        elif node.type != NodeType.NULL:
+            chunk.statements = [node]
+        return chunk
+
+    def parse_everything(self):
+        """Lex and parse the whole document in one go"""
+        self.full_parse = True
+        chunk = Chunk(0, len(self.lines))
+        lexer = Lexer('\n'.join(self.lines))
+        try:
+            node = Parser(lexer.generate_tokens(), lexer.line_index).parse()
+            if node.type == NodeType.BLOCK:
+                chunk.statements = node.statements
+            elif node.type != NodeType.NULL:
+                chunk.statements = [node]
+        except PseudocodeError as e:
+            chunk.errors.append(e)
+        self.chunks = [chunk]
+
+    @property
+    def errors(self):
+        """Syntax errors of the document, with absolute line numbers"""
+        return [error for chunk in self.chunks for error in chunk.errors]
+
+    def statements(self):
+        """Top-level statements of the document.
+
+        Statement positions are offsets within their chunk.
+        """
+        return [statement for chunk in self.chunks for statement in chunk.statements]
+
+    def ast(self):
+        """The document as a single Block"""
+        return Block(self.statements())
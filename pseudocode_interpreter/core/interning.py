@@ -0,0 +1,116 @@
+from .ast_nodes import (AST, NodeType, NumberLiteral, StringLiteral, BooleanLiteral, ListLiteral,
+                        VarAccess, ArrayAccess, BinOp, UnaryOp)
+
+# Interning (hash-consing) of identical expression subtrees
+class Interner:
+    """Replace structurally identical pure expressions with one shared node.
+
+    Literals, variable reads, list literals, array reads and operators over
+    such expressions never change once parsed and evaluate the same way
+    wherever they appear, so every copy can point at the same node. Function
+    calls, assignments and statements are never shared. Nodes that carry a
+    statement position are not shared either, but their children may be.
+
+    One Interner can be used for several trees, which then share nodes too.
+    """
+
+    def __init__(self):
+        self.table = {}          # Structural key -> shared node
+        self.shared = set()      # ids of the shared nodes
+        self.seen = 0            # Pure expression nodes visited
+        self.reused = 0          # ... of which were replaced by a shared node
+
+    def intern(self, root):
+        """Intern the pure subtrees of root in place and return the interned root"""
+        # Post-order walk on an explicit stack, so deeply nested trees are fine.
+        # Each frame is [node, its child references, index of the next child].
+        stack = [[root, self.child_refs(root), 0]]
+        result = root
+
+        while stack:
+            frame = stack[-1]
+            node, refs, index = frame
+            if index < len(refs):
+                frame[2] += 1
+                child = refs[index][2]
+                if id(child) not in self.shared:
+                    stack.append([child, self.child_refs(child), 0])
+                continue
+
+            stack.pop()
+            result = self.share(node)
+            if stack:
+                parent, parent_refs, parent_index = stack[-1]
+                field, position, _ = parent_refs[parent_index - 1]
+                if position is None:
+                    setattr(parent, field, result)
+                else:
+                    getattr(parent, field)[position] = result
+
+        return result
+
+    def child_refs(self, node):
+        """(field, list position or None, child) for every child node of node"""
+        refs = []
+        for field in type(node).__slots__:
+            value = getattr(node, field, None)
+            if isinstance(value, AST):
+                refs.append((field, None, value))
+            elif isinstance(value, list):
+                for position, child in enumerate(value):
+                    if isinstance(child, AST):
+                        refs.append((field, position, child))
+        return refs
+
+    def share(self, node):
+        """The shared node structurally identical to node, if node is a pure expression"""
+        key = self.key(node)
+        if key is None:
+            return node
+
+        self.seen += 1
+        shared = self.table.get(key)
+        if shared is None:
+            self.table[key] = node
+            self.shared.add(id(node))
+            return node
+        self.reused += 1
+        return shared
+
+    def key(self, node):
+        """Structural key of a pure expression whose children are already interned, else None"""
+        if node.pos is not None:
+            return None
+        node_class = type(node)
+        if node_class is NumberLiteral or node_class is StringLiteral or node_class is BooleanLiteral:
+            return (node.type, type(node.value), node.value)
+        elif node_class is VarAccess:
+            return (NodeType.VAR_ACCESS, node.name)
+        elif node_class is BinOp:
+            if id(node.left) in self.shared and id(node.right) in self.shared:
+                return (node.type, id(node.left), id(node.right))
+        elif node_class is UnaryOp:
+            if id(node.operand) in self.shared:
+                return (node.type, id(node.operand))
+        elif node_class is ArrayAccess:
+            if all(id(index) in self.shared for index in node.indices):
+                return (NodeType.ARRAY_ACCESS, node.name, tuple(id(index) for index in node.indices))
+        elif node_class is ListLiteral:
+            if all(id(element) in self.shared for element in node.elements):
+                return (NodeType.LIST, tuple(id(element) for element in node.elements))
+        return None
+
+    @property
+    def ratio(self):
+        """Fraction of the pure expression nodes visited that were replaced by a shared node"""
+        return self.reused / self.seen if self.seen else 0.0
+
+    def report(self):
+        """One-line summary of the deduplication"""
+        return (f"Interned {self.seen} expression nodes into {len(self.table)} shared nodes "
+                f"({self.ratio:.1%} deduplicated)")
+
+def intern_ast(root):
+    """Intern the pure subtrees of root, returning the new root and the Interner used"""
+    interner = Interner()
+    return interner.intern(root), interner
@@ -1,19 +1,135 @@
 import sys
 import os
-from PyQt6.QtWidgets import QDialog
+import time
 from .ast_nodes import Node, NodeType
-from .values import Variable, Number, String, List, Function, SymbolTable
+from .values import (Variable, Number, String, StringBuilder, List, Map, Set, Stack, Queue, Function,
+                     SymbolTable)
+from .errors import PseudocodeError, ProgramStopped, StepLimitExceeded, TimeLimitExceeded
+from .output import BufferSink
+from .case_table import CaseTable, is_constant_label
+
+# Directory searched for INCLUDE files not found next to the program
+STDLIB_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'stdlib')
+
+# Steps between two looks at the clock when a run has a time limit
+TIME_CHECK_STEPS = 1000
+
+# Functions the interpreter provides: name -> (Interpreter method, number of arguments).
+# A user function of the same name takes their place.
+BUILTIN_FUNCTIONS = {
+    'KEYS': ('builtin_keys', 1),
+    'HAS': ('builtin_has', 2),
+    'REMOVE': ('builtin_remove', 2),
+    'SET': ('builtin_set', 1),
+    'ADD': ('builtin_add', 2),
+    'UNION': ('builtin_union', 2),
+    'INTERSECTION': ('builtin_intersection', 2),
+    'DIFFERENCE': ('builtin_difference', 2),
+    'STACK': ('builtin_stack', 0),
+    'QUEUE': ('builtin_queue', 0),
+    'PUSH': ('builtin_push', 2),
+    'POP': ('builtin_pop', 1),
+    'ENQUEUE': ('builtin_enqueue', 2),
+    'DEQUEUE': ('builtin_dequeue', 1),
+    'PEEK': ('builtin_peek', 1),
+    'ISEMPTY': ('builtin_isempty', 1),
+}
+
+# Parsed INCLUDE files, shared by all interpreters: path -> (source, AST, LineIndex)
+parsed_includes = {}
+
+def parse_include(path, source):
+    """Parse an INCLUDE file, reusing the AST from an earlier INCLUDE of the same source"""
+    from .lexer import Lexer
+    from .parser import Parser
+
+    parsed = parsed_includes.get(path)
+    if parsed is None or parsed[0] != source:
+        # Tokenize the included file
+        lexer = Lexer(source)
+        tokens = lexer.generate_tokens()
+
+        # Parse the tokens, leaving function bodies until they are called
+        parser = Parser(tokens, lexer.line_index, lazy_functions=True)
+        parsed = (source, parser.parse(), lexer.line_index)
+        parsed_includes[path] = parsed
+    return parsed[1], parsed[2]
+
+def loop_steps(body):
+    """Steps counted for one iteration of a loop: one per statement of its body, at least one.
+
+    A call also counts one step. Counting per iteration, not per statement,
+    keeps the cost to one addition whichever way the body runs.
+    """
+    return max(1, len(getattr(body, 'statements', ())))
+
+def boolean(flag):
+    """TRUE or FALSE as a Variable"""
+    result = Variable(1.0 if flag else 0.0)
+    result.is_boolean = True
+    result.boolean_name = "TRUE" if flag else "FALSE"
+    return result
+
+def references(table, name):
+    """sys.getrefcount of the value bound to name in the dict table"""
+    return sys.getrefcount(table[name])
+
+def unshared_references():
+    """references() of a value that only its table and one local variable refer to,
+    or None where Python does not count references"""
+    if not hasattr(sys, 'getrefcount'):
+        return None
+    table = {'value': Variable()}
+    value = table['value']  # Like target in visit_append_assign
+    return references(table, 'value')
+
+# visit_append_assign changes a list or string in place only when its Variable has exactly
+# this many references. This relies on CPython's reference counting: every other variable,
+# list element, map entry or argument holding the same Variable adds one more. What
+# sys.getrefcount counts besides those differs between versions (its own argument, borrowed
+# references on the evaluation stack in 3.14), so the number is measured here in the same
+# shape as visit_append_assign rather than written down. testing/test_append.py checks that
+# the in-place path is taken. Where there is no sys.getrefcount this is None and x <- x + expr
+# always copies.
+UNSHARED_REFERENCES = unshared_references()
+
+def preload_stdlib():
+    """Parse every stdlib file ahead of its first INCLUDE"""
+    for filename in sorted(os.listdir(STDLIB_DIR)):
+        path = os.path.join(STDLIB_DIR, filename)
+        try:
+            with open(path, 'r') as file:
+                parse_include(path, file.read())
+        except Exception:
+            pass  # INCLUDE reports the error if a program uses the file
+
+# The program or a running call, kept on Interpreter.frames for call_stack() and the sampling profiler
+class CallFrame:
+    __slots__ = ('name', 'line_index', 'pos')
+
+    def __init__(self, name, line_index):
+        self.name = name              # Function name, None for the program
+        self.line_index = line_index  # LineIndex of the source the frame is running
+        self.pos = None               # Offset of the statement it is running, None if not known
 
 # Interpreter class
 class Interpreter:
-    def __init__(self, symbol_table=None):
+    def __init__(self, symbol_table=None, output=None):
         self.global_symbol_table = symbol_table or SymbolTable()
         self.current_symbol_table = self.global_symbol_table
         self.return_value = None
-        self.output_text = ""
+        self.output = output or BufferSink()  # OutputSink that PRINT writes to
+        self.stop_requested = False  # Set from another thread to stop the running program
+        self.max_steps = None        # Steps a run may take, None for no limit
+        self.max_seconds = None      # Seconds a run may take, None for no limit
+        self.steps = 0               # Steps taken by the current run; see loop_steps()
+        self.step_limit = sys.maxsize  # Steps after which check_limits() runs
+        self.deadline = None         # time.monotonic() at which the current run must end
         self.cwd = ""
         self.recursion_depth = 0
         self.max_recursion_depth = 1000
+        self.line_index = None  # Maps statement offsets of the running source to lines
+        self.frames = [CallFrame(None, None)]  # The program and each running call, outermost first
 
         # Initialize global variables
         self._init_globals()
@@ -35,10 +151,104 @@ class Interpreter:
         elif os.name == 'posix':
             self.global_symbol_table.set("OS", Variable(4.0))
 
-    def interpret(self, node):
-        """Interpret an AST node and return the result"""
-        self.output_text = ""
-        return self.visit(node)
+    def interpret(self, node, line_index=None):
+        """Interpret an AST node and return the result.
+
+        If the LineIndex of the program source is given, runtime errors
+        report the line and column of the statement that raised them.
+        """
+        self.output.clear()
+        self.line_index = line_index
+        self.frames = [CallFrame(None, line_index)]
+        self.steps = 0
+        self.deadline = time.monotonic() + self.max_seconds if self.max_seconds is not None else None
+        self.set_step_limit()
+        try:
+            return self.visit(node)
+        except Exception as e:
+            self.locate_error(e, node)
+        finally:
+            self.frames = [CallFrame(None, line_index)]  # Idle again, for the sampling profiler
+            self.output.flush()
+
+    @property
+    def output_text(self):
+        """Everything the output sink has kept of the program's output"""
+        return self.output.getvalue()
+
+    @output_text.setter
+    def output_text(self, text):
+        self.output.clear()
+        if text:
+            self.output.write(text)
+
+    def request_stop(self):
+        """Ask the running program to stop at its next loop iteration or call.
+
+        The program then raises ProgramStopped. The request stays set until
+        stop_requested is cleared, so clear it before the next run.
+        """
+        self.stop_requested = True
+        self.step_limit = -1  # set_step_limit() checks stop_requested after writing, so this is not lost
+
+    def set_step_limit(self):
+        """Set the step count at which check_limits() runs next"""
+        limit = self.max_steps if self.max_steps is not None else sys.maxsize
+        if self.deadline is not None:
+            limit = min(limit, self.steps + TIME_CHECK_STEPS)
+        self.step_limit = limit
+        if self.stop_requested:
+            self.step_limit = -1  # Set after the limit, so a request made meanwhile is not lost
+
+    def check_limits(self):
+        """Called at a loop iteration or call once the step count passes step_limit.
+
+        Raises ProgramStopped if a stop was requested, StepLimitExceeded or
+        TimeLimitExceeded if a limit was passed, and otherwise sets the
+        step count of the next check.
+        """
+        if self.stop_requested:
+            raise ProgramStopped("Program stopped")
+        if self.max_steps is not None and self.steps > self.max_steps:
+            raise self.limit_error(StepLimitExceeded, f"Step limit exceeded ({self.max_steps} steps)")
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            raise self.limit_error(TimeLimitExceeded, f"Time limit exceeded ({self.max_seconds:g} s)")
+        self.set_step_limit()
+
+    def limit_error(self, error_class, message):
+        """An error_class error for a passed limit, naming the calls that were running"""
+        stack = self.call_stack()
+        if stack:
+            message += "; call stack: " + " > ".join(
+                f"{name}() called at line {line}" if line is not None else f"{name}()" for name, line in stack)
+        error = error_class(message)
+        error.call_stack = stack
+        return error
+
+    def call_stack(self):
+        """[(function name, line it was called from)] of the running calls, outermost first"""
+        frames = self.running_frames()
+        stack = []
+        for (name, line_index, pos), (_, caller_index, call_pos) in zip(frames[1:], frames):
+            line = caller_index.line_col(call_pos)[0] if caller_index is not None and call_pos is not None else None
+            stack.append((name, line))
+        return stack
+
+    def running_frames(self):
+        """[(function name, LineIndex, offset of the statement it is running)] for the
+        program and each running call, outermost first.
+
+        The program is named None, and the offset is None where it is not known.
+        Other threads may call this to sample a run.
+        """
+        return [(frame.name, frame.line_index, frame.pos) for frame in list(self.frames)]
+
+    def locate_error(self, error, node):
+        """Re-raise error tagged with the position of the statement node"""
+        located = PseudocodeError.locate(error, self.line_index, node.pos)
+        if located is error:
+            raise error
+        raise located from error
 
     def visit(self, node):
         """Visit a node and call the appropriate method based on node type"""
@@ -60,26 +270,35 @@ class Interpreter:
 
     def visit_string(self, node):
         """Visit a string node"""
-        return Variable(node.name)
+        return Variable(node.value)
 
     def visit_boolean(self, node):
         """Visit a boolean node"""
         # Store boolean values as numbers but display them as TRUE/FALSE
-        value = 1.0 if node.name == 'TRUE' else 0.0
+        value = 1.0 if node.value == 'TRUE' else 0.0
         var = Variable(value)
         # Add a special flag to indicate this is a boolean
         var.is_boolean = True
-        var.boolean_name = node.name
+        var.boolean_name = node.value
         return var
 
     def visit_list(self, node):
         """Visit a list node"""
         elements = []
-        for element_node in node.nodes:
+        for element_node in node.elements:
             elements.append(self.visit(element_node))
 
         return Variable(elements)
 
+    def visit_map(self, node):
+        """Visit a map node"""
+        entries = {}
+        for key_node, value_node in zip(node.keys, node.values):
+            key = Map.key(self.visit(key_node))
+            entries[key] = self.visit(value_node)
+
+        return Variable(Map(entries))
+
     def visit_var_access(self, node):
         """Visit a variable access node"""
         var_name = node.name
@@ -91,16 +310,62 @@ class Interpreter:
 
     def visit_var_assign(self, node):
         """Visit a variable assignment node"""
+        if node.self_append:
+            return self.visit_append_assign(node)
         var_name = node.name
-        value = self.visit(node.nodes[0])
+        value = self.visit(node.value)
 
         self.current_symbol_table.set(var_name, value)
         return value
 
+    def visit_append_assign(self, node):
+        """Visit x <- x + expr, appending to x's list or string in place when nothing else refers to it.
+
+        A list or string that another variable or list also holds is copied
+        as before, so assignment keeps its meaning, but building one a piece
+        at a time no longer copies it on every step. A string becomes a
+        StringBuilder, which joins its pieces the next time it is read.
+        """
+        var_name = node.name
+        symbols = self.current_symbol_table.symbols
+        target = symbols.get(var_name)
+        if target is None or target.type not in ("list", "string"):
+            # Not a list or string of this scope: a number, or an outer variable this makes a local copy of
+            value = self.visit(node.value)
+            self.current_symbol_table.set(var_name, value)
+            return value
+
+        right = self.visit(node.value.right)
+        if not isinstance(right, Variable):
+            right = Variable(right)
+        unshared = symbols.get(var_name) is target and references(symbols, var_name) == UNSHARED_REFERENCES
+        if target.type == "string":
+            # String + anything is string concatenation, as in visit_add
+            if unshared:
+                builder = target.value
+                if not isinstance(builder, StringBuilder):
+                    builder = target.value = StringBuilder(builder.value)
+                builder.append(str(right))
+            else:
+                target = Variable(str(target) + str(right))
+                self.current_symbol_table.set(var_name, target)
+        elif right.type != "list":
+            value = Variable(str(target) + str(right))  # As visit_add does for mixed types
+            self.current_symbol_table.set(var_name, value)
+            return value
+        elif unshared:
+            target.value.values.extend(right.value.values)
+        else:
+            target = Variable(target.value.values + right.value.values)
+            self.current_symbol_table.set(var_name, target)
+        # The statement's value is a new Variable for the same list or string, so that loops
+        # keeping it as their last value do not count as references to the variable next time
+        return Variable(target.value)
+
     def visit_add(self, node):
         """Visit an addition node"""
-        left = self.visit(node.nodes[0])
-        right = self.visit(node.nodes[1])
+        left = self.visit(node.left)
+        right = self.visit(node.right)
         
         # Ensure both operands are Variable instances
         if not isinstance(left, Variable):
@@ -125,8 +390,8 @@ class Interpreter:
 
     def visit_subtract(self, node):
         """Visit a subtraction node"""
-        left = self.visit(node.nodes[0])
-        right = self.visit(node.nodes[1])
+        left = self.visit(node.left)
+        right = self.visit(node.right)
 
         if left.type != "number" or right.type != "number":
             raise Exception("Cannot subtract non-number values")
@@ -135,8 +400,8 @@ class Interpreter:
 
     def visit_multiply(self, node):
         """Visit a multiplication node"""
-        left = self.visit(node.nodes[0])
-        right = self.visit(node.nodes[1])
+        left = self.visit(node.left)
+        right = self.visit(node.right)
 
         # Handle different type combinations
         if left.type == "number" and right.type == "number":
@@ -155,8 +420,8 @@ class Interpreter:
 
     def visit_divide(self, node):
         """Visit a division node"""
-        left = self.visit(node.nodes[0])
-        right = self.visit(node.nodes[1])
+        left = self.visit(node.left)
+        right = self.visit(node.right)
 
         if left.type != "number" or right.type != "number":
             raise Exception("Cannot divide non-number values")
@@ -168,8 +433,8 @@ class Interpreter:
 
     def visit_power(self, node):
         """Visit a power node"""
-        left = self.visit(node.nodes[0])
-        right = self.visit(node.nodes[1])
+        left = self.visit(node.left)
+        right = self.visit(node.right)
 
         if left.type != "number" or right.type != "number":
             raise Exception("Cannot perform power operation on non-number values")
@@ -178,8 +443,8 @@ class Interpreter:
 
     def visit_modulo(self, node):
         """Visit a modulo node"""
-        left = self.visit(node.nodes[0])
-        right = self.visit(node.nodes[1])
+        left = self.visit(node.left)
+        right = self.visit(node.right)
 
         if left.type != "number" or right.type != "number":
             raise Exception("Cannot perform modulo operation on non-number values")
@@ -191,8 +456,8 @@ class Interpreter:
 
     def visit_int_divide(self, node):
         """Visit an integer division node"""
-        left = self.visit(node.nodes[0])
-        right = self.visit(node.nodes[1])
+        left = self.visit(node.left)
+        right = self.visit(node.right)
 
         if left.type != "number" or right.type != "number":
             raise Exception("Cannot perform integer division on non-number values")
@@ -204,7 +469,7 @@ class Interpreter:
 
     def visit_plus(self, node):
         """Visit a unary plus node"""
-        value = self.visit(node.nodes[0])
+        value = self.visit(node.operand)
 
         if value.type != "number":
             raise Exception("Cannot apply unary plus to non-number value")
@@ -213,7 +478,7 @@ class Interpreter:
 
     def visit_minus(self, node):
         """Visit a unary minus node"""
-        value = self.visit(node.nodes[0])
+        value = self.visit(node.operand)
 
         if value.type != "number":
             raise Exception("Cannot apply unary minus to non-number value")
@@ -222,8 +487,8 @@ class Interpreter:
 
     def visit_ee(self, node):
         """Visit an equals equals node"""
-        left = self.visit(node.nodes[0])
-        right = self.visit(node.nodes[1])
+        left = self.visit(node.left)
+        right = self.visit(node.right)
         
         # Ensure both are Variable instances
         if not isinstance(left, Variable):
@@ -252,8 +517,8 @@ class Interpreter:
 
     def visit_ne(self, node):
         """Visit a not equals node"""
-        left = self.visit(node.nodes[0])
-        right = self.visit(node.nodes[1])
+        left = self.visit(node.left)
+        right = self.visit(node.right)
         
         # Ensure both are Variable instances
         if not isinstance(left, Variable):
@@ -281,8 +546,8 @@ class Interpreter:
 
     def visit_lt(self, node):
         """Visit a less than node"""
-        left = self.visit(node.nodes[0])
-        right = self.visit(node.nodes[1])
+        left = self.visit(node.left)
+        right = self.visit(node.right)
         
         # Ensure both are Variable instances
         if not isinstance(left, Variable):
@@ -310,8 +575,8 @@ class Interpreter:
 
     def visit_gt(self, node):
         """Visit a greater than node"""
-        left = self.visit(node.nodes[0])
-        right = self.visit(node.nodes[1])
+        left = self.visit(node.left)
+        right = self.visit(node.right)
         
         # Ensure both are Variable instances
         if not isinstance(left, Variable):
@@ -339,8 +604,8 @@ class Interpreter:
 
     def visit_lte(self, node):
         """Visit a less than or equal node"""
-        left = self.visit(node.nodes[0])
-        right = self.visit(node.nodes[1])
+        left = self.visit(node.left)
+        right = self.visit(node.right)
         
         # Ensure both are Variable instances
         if not isinstance(left, Variable):
@@ -368,8 +633,8 @@ class Interpreter:
 
     def visit_gte(self, node):
         """Visit a greater than or equal node"""
-        left = self.visit(node.nodes[0])
-        right = self.visit(node.nodes[1])
+        left = self.visit(node.left)
+        right = self.visit(node.right)
         
         # Ensure both are Variable instances
         if not isinstance(left, Variable):
@@ -395,9 +660,22 @@ class Interpreter:
         result.boolean_name = "TRUE" if is_greater_than_or_equal else "FALSE"
         return result
 
+    def visit_in(self, node):
+        """Visit an IN node: whether the left value is in the set, map keys or list on the right"""
+        element = self.visit(node.left)
+        collection = self.visit(node.right)
+
+        if collection.type == "set":
+            return boolean(Set.key(element) in collection.value.elements)
+        elif collection.type == "map":
+            return boolean(Map.key(element) in collection.value.entries)
+        elif collection.type == "list":
+            return boolean(element in collection.value.values)
+        raise Exception(f"IN needs a set, map or list, not a {collection.type}")
+
     def visit_and(self, node):
         """Visit an AND node"""
-        left = self.visit(node.nodes[0])
+        left = self.visit(node.left)
 
         # Short circuit evaluation
         if left.type == "number" and left.value.value == 0:
@@ -406,7 +684,7 @@ class Interpreter:
             result.boolean_name = "FALSE"
             return result
 
-        right = self.visit(node.nodes[1])
+        right = self.visit(node.right)
 
         if left.type != "number" or right.type != "number":
             raise Exception("AND operation requires number operands")
@@ -418,7 +696,7 @@ class Interpreter:
 
     def visit_or(self, node):
         """Visit an OR node"""
-        left = self.visit(node.nodes[0])
+        left = self.visit(node.left)
 
         # Short circuit evaluation
         if left.type == "number" and left.value.value != 0:
@@ -427,7 +705,7 @@ class Interpreter:
             result.boolean_name = "TRUE"
             return result
 
-        right = self.visit(node.nodes[1])
+        right = self.visit(node.right)
 
         if left.type != "number" or right.type != "number":
             raise Exception("OR operation requires number operands")
@@ -439,7 +717,7 @@ class Interpreter:
 
     def visit_not(self, node):
         """Visit a NOT node"""
-        value = self.visit(node.nodes[0])
+        value = self.visit(node.operand)
 
         if value.type != "number":
             raise Exception("NOT operation requires a number operand")
@@ -451,38 +729,39 @@ class Interpreter:
 
     def visit_if(self, node):
         """Visit an IF node"""
-        condition = self.visit(node.nodes[0])
+        condition = self.visit(node.condition)
 
         if condition.type != "number":
             raise Exception("IF condition must evaluate to a number")
 
         if condition.value.value != 0:
-            return self.visit(node.nodes[1])  # Execute the if block
+            return self.visit(node.body)  # Execute the if block
 
         return Variable()  # Return nothing if condition is false
 
     def visit_if_else(self, node):
         """Visit an IF-ELSE node"""
-        condition = self.visit(node.nodes[0])
+        condition = self.visit(node.condition)
 
         if condition.type != "number":
             raise Exception("IF condition must evaluate to a number")
 
         if condition.value.value != 0:
-            return self.visit(node.nodes[1])  # Execute the if block
+            return self.visit(node.body)  # Execute the if block
         else:
-            return self.visit(node.nodes[2])  # Execute the else block
+            return self.visit(node.else_body)  # Execute the else block
 
     def visit_for(self, node):
         """Visit a FOR loop node"""
-        var_name = node.name
-        start_val = self.visit(node.nodes[0])
-        end_val = self.visit(node.nodes[1])
-        step_val = self.visit(node.nodes[2])
-        body = node.nodes[3]
+        var_name = node.var
+        start_val = self.visit(node.start)
+        end_val = self.visit(node.end)
+        step_val = self.visit(node.step)
+        body = node.body
 
         if start_val.type != "number" or end_val.type != "number" or step_val.type != "number":
             raise Exception("FOR loop values must be numbers")
+        steps = loop_steps(body)
 
         self.current_symbol_table.set(var_name, start_val)
         last_value = Variable()
@@ -490,6 +769,9 @@ class Interpreter:
         # Different loop behavior based on step direction
         if step_val.value.value >= 0:
             while self.current_symbol_table.get(var_name).value.value <= end_val.value.value:
+                self.steps += steps
+                if self.steps > self.step_limit:
+                    self.check_limits()
                 last_value = self.visit(body)
 
                 # Check if a return was requested
@@ -502,6 +784,9 @@ class Interpreter:
                                             Variable(current_val + step_val.value.value))
         else:
             while self.current_symbol_table.get(var_name).value.value >= end_val.value.value:
+                self.steps += steps
+                if self.steps > self.step_limit:
+                    self.check_limits()
                 last_value = self.visit(body)
 
                 # Check if a return was requested
@@ -515,13 +800,50 @@ class Interpreter:
 
         return last_value
 
+    def visit_for_each(self, node):
+        """Visit a FOR EACH loop node"""
+        var_name = node.var
+        collection = self.visit(node.iterable)
+        body = node.body
+
+        # Loop over a snapshot, so the body may change the collection
+        if collection.type == "set":
+            items = [Variable(element) for element in collection.value.elements]
+        elif collection.type == "map":
+            items = [Variable(key) for key in collection.value.entries]
+        elif collection.type == "list":
+            items = list(collection.value.values)
+        elif collection.type == "string":
+            items = [Variable(char) for char in collection.value.value]
+        else:
+            raise Exception(f"FOR EACH needs a set, map, list or string, not a {collection.type}")
+        steps = loop_steps(body)
+        last_value = Variable()
+
+        for item in items:
+            self.steps += steps
+            if self.steps > self.step_limit:
+                self.check_limits()
+            self.current_symbol_table.set(var_name, item)
+            last_value = self.visit(body)
+
+            # Check if a return was requested
+            if self.return_value is not None:
+                return self.return_value
+
+        return last_value
+
     def visit_while(self, node):
         """Visit a WHILE loop node"""
-        condition = node.nodes[0]
-        body = node.nodes[1]
+        condition = node.condition
+        body = node.body
         last_value = Variable()
+        steps = loop_steps(body)
 
         while True:
+            self.steps += steps
+            if self.steps > self.step_limit:
+                self.check_limits()
             cond_value = self.visit(condition)
 
             if cond_value.type != "number":
@@ -541,9 +863,14 @@ class Interpreter:
     def visit_block(self, node):
         """Visit a block of code"""
         last_value = Variable()
-
-        for statement in node.nodes:
-            last_value = self.visit(statement)
+        frame = self.frames[-1]
+        for statement in node.statements:
+            last_value = None  # Not held while the next statement runs, see visit_append_assign
+            frame.pos = statement.pos
+            try:
+                last_value = self.visit(statement)
+            except Exception as e:
+                self.locate_error(e, statement)
 
             # Check if a return was requested
             if self.return_value is not None:
@@ -554,7 +881,13 @@ class Interpreter:
     def visit_def(self, node):
         """Visit a function definition node"""
         func_name = node.name
-        function = Function(func_name, node.nodes[0], node.nodes[1], node.nodes[2])
+        if node.body is None:
+            # The body is parsed when the function is first called
+            function = Function(func_name, node.params)
+            function.lazy_body = node.lazy_body
+        else:
+            function = Function(func_name, node.params, node.body, node.return_expr)
+        function.line_index = self.line_index
         self.current_symbol_table.set(func_name, Variable(function))
         return Variable(function)
 
@@ -562,6 +895,10 @@ class Interpreter:
         """Visit a function call node"""
         func_name = node.name
 
+        self.steps += 1
+        if self.steps > self.step_limit:
+            self.check_limits()
+
         # Check recursion depth
         if self.recursion_depth >= self.max_recursion_depth:
             # Raise an exception instead of silently returning a value
@@ -569,6 +906,9 @@ class Interpreter:
             raise Exception(f"Maximum recursion depth exceeded ({self.max_recursion_depth})")
 
         if not self.current_symbol_table.has(func_name):
+            builtin = BUILTIN_FUNCTIONS.get(func_name)
+            if builtin is not None:
+                return self.call_builtin(func_name, builtin, node.args)
             raise Exception(f"Function '{func_name}' not defined")
 
         function_var = self.current_symbol_table.get(func_name)
@@ -577,17 +917,25 @@ class Interpreter:
             raise Exception(f"'{func_name}' is not a function")
 
         function = function_var.value
+        if function.body_node is None and function.lazy_body is not None:
+            function.body_node, function.return_node = function.lazy_body.parse()
 
         # Evaluate function arguments in the current scope
         # It's important to do this before creating the new scope
         arg_values = []
-        if node.nodes:
-            for arg_node in node.nodes:
-                arg_values.append(self.visit(arg_node))
+        for arg_node in node.args:
+            arg_values.append(self.visit(arg_node))
 
         # Increment recursion depth before executing function body
         self.recursion_depth += 1
 
+        # Save current state
+        old_symbol_table = self.current_symbol_table
+        old_return_value = self.return_value
+        old_line_index = self.line_index
+        frame = CallFrame(func_name, function.line_index)
+        self.frames.append(frame)
+
         try:
             # Create a new completely independent symbol table for this function call
             # Unlike before, we create a child table of the current table to preserve scope chain
@@ -597,24 +945,20 @@ class Interpreter:
             function_symbol_table.set(func_name, function_var)
 
             # Process and set arguments in the function's symbol table
-            if function.args_node:
-                arg_nodes = function.args_node.nodes
+            if function.params is not None:
+                params = function.params
 
-                if len(arg_nodes) != len(arg_values):
-                    raise Exception(f"Function '{func_name}' expects {len(arg_nodes)} arguments, got {len(arg_values)}")
+                if len(params) != len(arg_values):
+                    raise Exception(f"Function '{func_name}' expects {len(params)} arguments, got {len(arg_values)}")
 
-                for i, arg_node in enumerate(arg_nodes):
-                    arg_name = arg_node.name
+                for i, arg_name in enumerate(params):
                     # Create new copies of values for function arguments to prevent side effects
                     function_symbol_table.set(arg_name, arg_values[i].copy() if hasattr(arg_values[i], 'copy') else arg_values[i])
 
-            # Save current state
-            old_symbol_table = self.current_symbol_table
-            old_return_value = self.return_value
-            
             # Switch context to the function's environment
             self.current_symbol_table = function_symbol_table
             self.return_value = None
+            self.line_index = function.line_index
 
             # Execute the function body
             body_result = self.visit(function.body_node)
@@ -625,11 +969,9 @@ class Interpreter:
                 return_value = self.return_value
             else:
                 # No explicit RETURN, use the function's return expression
+                frame.pos = function.return_node.pos
                 return_value = self.visit(function.return_node)
 
-            # Restore the original context
-            self.current_symbol_table = old_symbol_table
-            
             # Reset return value properly
             # This fix is crucial for recursive functions like Fibonacci
             # We only want to preserve return values for the immediate caller
@@ -637,6 +979,11 @@ class Interpreter:
 
             return return_value
         finally:
+            # Always restore the caller's context, even when the body raised
+            self.current_symbol_table = old_symbol_table
+            self.line_index = old_line_index
+            self.frames.pop()
+
             # Always decrement recursion depth
             self.recursion_depth -= 1
 
@@ -644,12 +991,11 @@ class Interpreter:
         """Visit a PRINT node"""
         values = []
 
-        for arg_node in node.nodes:
+        for arg_node in node.args:
             value = self.visit(arg_node)
             values.append(str(value))
 
-        output = " ".join(values)
-        self.output_text += output + "\n"
+        self.output.write(" ".join(values) + "\n")
         return Variable()
 
     def visit_input(self, node):
@@ -672,10 +1018,10 @@ class Interpreter:
 
     def visit_read(self, node):
         """Visit a READ node"""
-        if not node.nodes:
+        if not node.args:
             raise Exception("READ requires a filename")
 
-        filename_var = self.visit(node.nodes[0])
+        filename_var = self.visit(node.args[0])
         filename = str(filename_var)
 
         # Check if the path is relative or absolute
@@ -691,12 +1037,9 @@ class Interpreter:
 
     def visit_include(self, node):
         """Visit an INCLUDE node"""
-        from .lexer import Lexer
-        from .parser import Parser
-        import importlib.resources as pkg_resources
-
-        filename = node.name
+        filename = node.filename
         file_content = None
+        path = filename
         error_message = ""
 
         # Paths to try in order:
@@ -714,14 +1057,14 @@ class Interpreter:
         else:
             # Try relative to current directory first
             try:
-                local_path = os.path.join(self.cwd, filename)
-                with open(local_path, 'r') as file:
+                path = os.path.join(self.cwd, filename)
+                with open(path, 'r') as file:
                     file_content = file.read()
             except Exception as local_error:
                 # If not found locally, try stdlib directory
-                stdlib_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'stdlib', filename)
+                path = os.path.join(STDLIB_DIR, filename)
                 try:
-                    with open(stdlib_path, 'r') as file:
+                    with open(path, 'r') as file:
                         file_content = file.read()
                 except Exception as stdlib_error:
                     error_message = f"Could not find '{filename}' in current directory or stdlib: {str(local_error)}"
@@ -729,21 +1072,26 @@ class Interpreter:
         if file_content is None:
             raise Exception(error_message)
 
-        # Tokenize the included file
-        lexer = Lexer(file_content)
-        tokens = lexer.generate_tokens()
-
-        # Parse the tokens
-        parser = Parser(tokens)
-        included_ast = parser.parse()
+        included_ast, line_index = parse_include(path, file_content)
 
-        # Execute the included code
-        return self.visit(included_ast)
+        # Execute the included code, reporting errors against the included file
+        old_line_index = self.line_index
+        self.line_index = line_index
+        frame = self.frames[-1]
+        old_pos = frame.pos
+        frame.line_index = line_index
+        try:
+            return self.visit(included_ast)
+        except Exception as e:
+            self.locate_error(e, included_ast)
+        finally:
+            self.line_index = old_line_index
+            frame.line_index, frame.pos = old_line_index, old_pos
 
     def visit_return(self, node):
         """Visit a RETURN node"""
         # Evaluate the return expression
-        return_value = self.visit(node.nodes[0])
+        return_value = self.visit(node.value)
         
         # Make sure we have a Variable instance
         if not isinstance(return_value, Variable):
@@ -766,41 +1114,64 @@ class Interpreter:
 
         var_value = self.current_symbol_table.get(var_name)
 
-        # Evaluate each case item in order
-        for case_item in node.nodes:
-            if case_item.type == NodeType.CASE_OTHERWISE:
-                return self.visit(case_item)
-
-            # Get the case value
-            case_value = self.visit(case_item.nodes[0])
-
-            # Check if this is a range case (has two value nodes)
-            if len(case_item.nodes) >= 2 and case_item.nodes[1].type not in [NodeType.BLOCK, NodeType.PRINT, NodeType.INPUT, NodeType.READ]:
-                range_end = self.visit(case_item.nodes[1])
-
-                # Check if value is in the range
-                if case_value.type != "number" or range_end.type != "number" or var_value.type != "number":
-                    raise Exception("Range values must be numbers")
-
-                if (var_value.value.value >= case_value.value.value and
-                    var_value.value.value <= range_end.value.value):
-                    # Execute the statements for this case
-                    last_value = Variable()
-                    for statement in case_item.nodes[2:]:
-                        last_value = self.visit(statement)
-                    return last_value
-            else:
-                # Simple equality check
-                if var_value == case_value:
-                    # Execute the statements for this case
-                    last_value = Variable()
-                    for statement in case_item.nodes[1:]:
-                        last_value = self.visit(statement)
-                    return last_value
+        # Constant labels are evaluated once, into a jump table
+        if node.table is None:
+            node.table = self.case_table(node)
+
+        if node.table is not False:
+            index = node.table.lookup(var_value)
+            if index is not None:
+                return self.visit_case_body(node.items[index].body)
+        else:
+            # Evaluate each case item in order
+            for case_item in node.items:
+                # Get the case value
+                case_value = self.visit(case_item.value)
+
+                # Check if this is a range case
+                if case_item.range_end is not None:
+                    range_end = self.visit(case_item.range_end)
+
+                    # Check if value is in the range
+                    if case_value.type != "number" or range_end.type != "number" or var_value.type != "number":
+                        raise Exception("Range values must be numbers")
+
+                    if (var_value.value.value >= case_value.value.value and
+                        var_value.value.value <= range_end.value.value):
+                        return self.visit_case_body(case_item.body)
+                else:
+                    # Simple equality check
+                    if var_value == case_value:
+                        return self.visit_case_body(case_item.body)
+
+        if node.otherwise is not None:
+            return self.visit(node.otherwise)
 
         # If no cases matched and there's no OTHERWISE clause, return an empty value
         return Variable()
 
+    def case_table(self, node):
+        """Build the CaseTable for a CASE node, or False if any label is not a constant"""
+        labels = []
+        for case_item in node.items:
+            if not is_constant_label(case_item.value):
+                return False
+            if case_item.range_end is None:
+                labels.append((self.visit(case_item.value), None))
+            elif is_constant_label(case_item.range_end):
+                labels.append((self.visit(case_item.value), self.visit(case_item.range_end)))
+            else:
+                return False
+        return CaseTable(labels)
+
+    def visit_case_body(self, statements):
+        """Execute the statements of the CASE arm that matched"""
+        last_value = Variable()
+        for statement in statements:
+            last_value = None
+            last_value = self.visit(statement)
+        return last_value
+
     def visit_case_item(self, node):
         """Visit a CASE_ITEM node"""
         # This should not be directly visited, as the CASE node handles it
@@ -810,17 +1181,22 @@ class Interpreter:
         """Visit a CASE_OTHERWISE node"""
         # Execute all statements in the OTHERWISE clause
         last_value = Variable()
-        for statement in node.nodes:
+        for statement in node.body:
             last_value = self.visit(statement)
         return last_value
 
     def visit_repeat_until(self, node):
         """Visit a REPEAT-UNTIL loop node"""
-        body = node.nodes[0]
-        condition = node.nodes[1]
+        body = node.body
+        condition = node.condition
         last_value = Variable()
+        steps = loop_steps(body)
 
         while True:
+            self.steps += steps
+            if self.steps > self.step_limit:
+                self.check_limits()
+
             # First execute the body
             last_value = self.visit(body)
 
@@ -843,8 +1219,7 @@ class Interpreter:
     def visit_declare(self, node):
         """Visit a DECLARE node"""
         var_name = node.name
-        type_node = node.nodes[0]
-        type_name = type_node.name
+        type_name = node.type_name
 
         # Initialize the variable based on its type
         if type_name == "INTEGER":
@@ -875,6 +1250,15 @@ class Interpreter:
 
         array_var = self.current_symbol_table.get(var_name)
 
+        if array_var.type == "map":
+            if len(node.indices) != 1:
+                raise Exception("A map takes a single key")
+            key_var = self.visit(node.indices[0])
+            value = array_var.value.entries.get(Map.key(key_var))
+            if value is None:
+                raise Exception(f"Key {key_var} not in map '{var_name}'")
+            return value
+
         if array_var.type != "list":
             raise Exception(f"'{var_name}' is not an array")
 
@@ -882,9 +1266,10 @@ class Interpreter:
         array_data = array_var.value.values
 
         # Calculate the index
-        if len(node.nodes) == 1:
+        indices = node.indices
+        if len(indices) == 1:
             # One-dimensional array
-            index_val = self.visit(node.nodes[0])
+            index_val = self.visit(indices[0])
             if index_val.type != "number":
                 raise Exception("Array index must be a number")
 
@@ -895,10 +1280,10 @@ class Interpreter:
 
             return array_data[index]
 
-        elif len(node.nodes) == 2:
+        elif len(indices) == 2:
             # Two-dimensional array
-            row_val = self.visit(node.nodes[0])
-            col_val = self.visit(node.nodes[1])
+            row_val = self.visit(indices[0])
+            col_val = self.visit(indices[1])
 
             if row_val.type != "number" or col_val.type != "number":
                 raise Exception("Array indices must be numbers")
@@ -931,19 +1316,27 @@ class Interpreter:
 
         array_var = self.current_symbol_table.get(var_name)
 
+        if array_var.type == "map":
+            if len(node.indices) != 1:
+                raise Exception("A map takes a single key")
+            value = self.visit(node.value)
+            array_var.value.entries[Map.key(self.visit(node.indices[0]))] = value
+            return value
+
         if array_var.type != "list":
             raise Exception(f"'{var_name}' is not an array")
 
         # Get the array data
         array_data = array_var.value.values
 
-        # Get the value to assign (last node)
-        value = self.visit(node.nodes[-1])
+        # Get the value to assign
+        value = self.visit(node.value)
 
         # Calculate the index
-        if len(node.nodes) == 2:  # 1 index + 1 value
+        indices = node.indices
+        if len(indices) == 1:
             # One-dimensional array
-            index_val = self.visit(node.nodes[0])
+            index_val = self.visit(indices[0])
             if index_val.type != "number":
                 raise Exception("Array index must be a number")
 
@@ -958,10 +1351,10 @@ class Interpreter:
 
             array_data[index] = value
 
-        elif len(node.nodes) == 3:  # 2 indices + 1 value
+        elif len(indices) == 2:
             # Two-dimensional array
-            row_val = self.visit(node.nodes[0])
-            col_val = self.visit(node.nodes[1])
+            row_val = self.visit(indices[0])
+            col_val = self.visit(indices[1])
 
             if row_val.type != "number" or col_val.type != "number":
                 raise Exception("Array indices must be numbers")
@@ -994,4 +1387,139 @@ class Interpreter:
         else:
             raise Exception("Arrays with more than 2 dimensions not supported")
 
-        return value
\ No newline at end of file
+        return value
+
+    def call_builtin(self, name, builtin, arg_nodes):
+        """Call one of the BUILTIN_FUNCTIONS with the values of arg_nodes"""
+        method, arity = builtin
+        if len(arg_nodes) != arity:
+            raise Exception(f"Function '{name}' expects {arity} arguments, got {len(arg_nodes)}")
+        args = [self.visit(arg_node) for arg_node in arg_nodes]
+        return getattr(self, method)(*args)
+
+    def map_argument(self, name, variable):
+        """The Map of a map argument to the built-in function name"""
+        if variable.type != "map":
+            raise Exception(f"{name} expects a map, not a {variable.type}")
+        return variable.value
+
+    def set_argument(self, name, variable):
+        """The Set of a set argument to the built-in function name"""
+        if variable.type != "set":
+            raise Exception(f"{name} expects a set, not a {variable.type}")
+        return variable.value
+
+    def builtin_keys(self, map_var):
+        """KEYS(map): a list of the map's keys, in the order they were added"""
+        return Variable(List([Variable(key) for key in self.map_argument('KEYS', map_var).entries]))
+
+    def builtin_has(self, collection, key):
+        """HAS(map, key) or HAS(set, element): whether the map has the key or the set the element"""
+        if collection.type == "set":
+            return boolean(Set.key(key) in collection.value.elements)
+        elif collection.type == "map":
+            return boolean(Map.key(key) in collection.value.entries)
+        raise Exception(f"HAS expects a map or set, not a {collection.type}")
+
+    def builtin_remove(self, collection, key):
+        """REMOVE(map, key) or REMOVE(set, element): take the key or element out and return its value"""
+        if collection.type == "set":
+            elements = collection.value.elements
+            element = Set.key(key)
+            if element not in elements:
+                raise Exception(f"{key} not in set")
+            del elements[element]
+            return key
+        elif collection.type == "map":
+            value = collection.value.entries.pop(Map.key(key), None)
+            if value is None:
+                raise Exception(f"Key {key} not in map")
+            return value
+        raise Exception(f"REMOVE expects a map or set, not a {collection.type}")
+
+    def builtin_set(self, items):
+        """SET(list): a new set of the list's elements, without duplicates; SET(set) copies a set"""
+        if items.type == "set":
+            return Variable(Set(dict(items.value.elements)))
+        if items.type != "list":
+            raise Exception(f"SET expects a list, not a {items.type}")
+        return Variable(Set({Set.key(item): None for item in items.value.values}))
+
+    def builtin_add(self, set_var, element):
+        """ADD(set, element): add the element to the set"""
+        self.set_argument('ADD', set_var).elements[Set.key(element)] = None
+        return Variable()
+
+    def builtin_union(self, left, right):
+        """UNION(a, b): a new set of the elements in a or b"""
+        elements = dict(self.set_argument('UNION', left).elements)
+        elements.update(self.set_argument('UNION', right).elements)
+        return Variable(Set(elements))
+
+    def builtin_intersection(self, left, right):
+        """INTERSECTION(a, b): a new set of the elements in both a and b"""
+        right_elements = self.set_argument('INTERSECTION', right).elements
+        return Variable(Set({element: None for element in self.set_argument('INTERSECTION', left).elements
+                             if element in right_elements}))
+
+    def builtin_difference(self, left, right):
+        """DIFFERENCE(a, b): a new set of the elements of a that are not in b"""
+        right_elements = self.set_argument('DIFFERENCE', right).elements
+        return Variable(Set({element: None for element in self.set_argument('DIFFERENCE', left).elements
+                             if element not in right_elements}))
+
+    def builtin_stack(self):
+        """STACK(): a new empty stack"""
+        return Variable(Stack())
+
+    def builtin_queue(self):
+        """QUEUE(): a new empty queue"""
+        return Variable(Queue())
+
+    def builtin_push(self, stack, item):
+        """PUSH(stack, item): put the item on top of the stack"""
+        if stack.type != "stack":
+            raise Exception(f"PUSH expects a stack, not a {stack.type}")
+        stack.value.items.append(item)
+        return Variable()
+
+    def builtin_pop(self, stack):
+        """POP(stack): take the item off the top of the stack"""
+        if stack.type != "stack":
+            raise Exception(f"POP expects a stack, not a {stack.type}")
+        if not stack.value.items:
+            raise Exception("POP from an empty stack")
+        return stack.value.items.pop()
+
+    def builtin_enqueue(self, queue, item):
+        """ENQUEUE(queue, item): add the item to the back of the queue"""
+        if queue.type != "queue":
+            raise Exception(f"ENQUEUE expects a queue, not a {queue.type}")
+        queue.value.items.append(item)
+        return Variable()
+
+    def builtin_dequeue(self, queue):
+        """DEQUEUE(queue): take the item off the front of the queue"""
+        if queue.type != "queue":
+            raise Exception(f"DEQUEUE expects a queue, not a {queue.type}")
+        if not queue.value.items:
+            raise Exception("DEQUEUE from an empty queue")
+        return queue.value.items.popleft()
+
+    def builtin_peek(self, collection):
+        """PEEK(stack) or PEEK(queue): the item POP or DEQUEUE would take, leaving it there"""
+        if collection.type == "stack":
+            index = -1
+        elif collection.type == "queue":
+            index = 0
+        else:
+            raise Exception(f"PEEK expects a stack or queue, not a {collection.type}")
+        if not collection.value.items:
+            raise Exception(f"PEEK at an empty {collection.type}")
+        return collection.value.items[index]
+
+    def builtin_isempty(self, collection):
+        """ISEMPTY(stack) or ISEMPTY(queue): whether it has no items"""
+        if collection.type != "stack" and collection.type != "queue":
+            raise Exception(f"ISEMPTY expects a stack or queue, not a {collection.type}")
+        return boolean(not collection.value.items)
@@ -1,5 +1,7 @@
 from typing import List
 from .tokens import Token, TokenType
+from .source import LineIndex
+from .errors import PseudocodeError
 
 # Lexer class
 class Lexer:
@@ -15,6 +17,8 @@ class Lexer:
         self.code = code
         self.cursor_pos = 0
         self.current_char = self.code[0] if len(self.code) > 0 else None
+        self.line_index = LineIndex(code)
+        self.unterminated_string = False  # Set when a string runs to the end of the code
 
     def advance(self):
         """Advance the cursor position and set the current character"""
@@ -24,15 +28,20 @@ class Lexer:
         else:
             self.current_char = None
 
+    def error(self, message, pos):
+        """Build an error pointing at the given source offset"""
+        return PseudocodeError(message, *self.line_index.line_col(pos))
+
     def generate_tokens(self) -> List[Token]:
         """Convert code string into a list of tokens"""
         tokens = []
 
         while self.current_char is not None:
+            start = self.cursor_pos
             if self.current_char.isspace():
                 self.advance()
             elif self.current_char == '\n':
-                tokens.append(Token(TokenType.NL))
+                tokens.append(Token(TokenType.NL, pos=start))
                 self.advance()
             elif self.current_char.isdigit() or self.current_char == '.':
                 tokens.append(self.generate_number())
@@ -43,13 +52,13 @@ class Lexer:
             elif self.current_char == '"' or self.current_char == "'":
                 tokens.append(self.generate_string())
             elif self.current_char == '+':
-                tokens.append(Token(TokenType.PLUS))
+                tokens.append(Token(TokenType.PLUS, pos=start))
                 self.advance()
             elif self.current_char == '-':
-                tokens.append(Token(TokenType.MINUS))
+                tokens.append(Token(TokenType.MINUS, pos=start))
                 self.advance()
             elif self.current_char == '*':
-                tokens.append(Token(TokenType.MULTIPLY))
+                tokens.append(Token(TokenType.MULTIPLY, pos=start))
                 self.advance()
             elif self.current_char == '/':
                 # Check for '//' comment
@@ -60,79 +69,86 @@ class Lexer:
                         self.advance()
                 else:
                     # It's a division operator
-                    tokens.append(Token(TokenType.DIVIDE))
+                    tokens.append(Token(TokenType.DIVIDE, pos=start))
             elif self.current_char == '^':
-                tokens.append(Token(TokenType.POW))
+                tokens.append(Token(TokenType.POW, pos=start))
                 self.advance()
             elif self.current_char == '(':
-                tokens.append(Token(TokenType.LPAREN))
+                tokens.append(Token(TokenType.LPAREN, pos=start))
                 self.advance()
             elif self.current_char == ')':
-                tokens.append(Token(TokenType.RPAREN))
+                tokens.append(Token(TokenType.RPAREN, pos=start))
                 self.advance()
             elif self.current_char == '[':
-                tokens.append(Token(TokenType.LSQBRACKET))
+                tokens.append(Token(TokenType.LSQBRACKET, pos=start))
                 self.advance()
             elif self.current_char == ']':
-                tokens.append(Token(TokenType.RSQBRACKET))
+                tokens.append(Token(TokenType.RSQBRACKET, pos=start))
+                self.advance()
+            elif self.current_char == '{':
+                tokens.append(Token(TokenType.LBRACE, pos=start))
+                self.advance()
+            elif self.current_char == '}':
+                tokens.append(Token(TokenType.RBRACE, pos=start))
                 self.advance()
             elif self.current_char == ':':
-                tokens.append(Token(TokenType.COLON))
+                tokens.append(Token(TokenType.COLON, pos=start))
                 self.advance()
             elif self.current_char == '←':
-                tokens.append(Token(TokenType.EQ))
+                tokens.append(Token(TokenType.EQ, pos=start))
                 self.advance()
             elif self.current_char == '=':
                 # Check for '=='
                 self.advance()
                 if self.current_char == '=':
-                    tokens.append(Token(TokenType.EE))
+                    tokens.append(Token(TokenType.EE, pos=start))
                     self.advance()
                 else:
-                    tokens.append(Token(TokenType.EQ))
+                    tokens.append(Token(TokenType.EQ, pos=start))
             elif self.current_char == '<':
                 self.advance()
                 # Check for '<=' or '<-' or '<>'
                 if self.current_char == '=':
-                    tokens.append(Token(TokenType.LTE))
+                    tokens.append(Token(TokenType.LTE, pos=start))
                     self.advance()
                 elif self.current_char == '-':
-                    tokens.append(Token(TokenType.EQ))  # Treat '<-' as assignment
+                    tokens.append(Token(TokenType.EQ, pos=start))  # Treat '<-' as assignment
                     self.advance()
                 elif self.current_char == '>':
-                    tokens.append(Token(TokenType.NE))  # '<>' is not equal
+                    tokens.append(Token(TokenType.NE, pos=start))  # '<>' is not equal
                     self.advance()
                 else:
-                    tokens.append(Token(TokenType.LT))
+                    tokens.append(Token(TokenType.LT, pos=start))
             elif self.current_char == '>':
                 # Check for '>='
                 self.advance()
                 if self.current_char == '=':
-                    tokens.append(Token(TokenType.GTE))
+                    tokens.append(Token(TokenType.GTE, pos=start))
                     self.advance()
                 else:
-                    tokens.append(Token(TokenType.GT))
+                    tokens.append(Token(TokenType.GT, pos=start))
             elif self.current_char == '!':
                 # Check for '!='
                 self.advance()
                 if self.current_char == '=':
-                    tokens.append(Token(TokenType.NE))
+                    tokens.append(Token(TokenType.NE, pos=start))
                     self.advance()
                 else:
-                    raise Exception("Invalid character after '!'")
+                    raise self.error("Invalid character after '!'", start)
             elif self.current_char == ',':
-                tokens.append(Token(TokenType.COMMA))
+                tokens.append(Token(TokenType.COMMA, pos=start))
                 self.advance()
             elif self.current_char == ';':
-                tokens.append(Token(TokenType.SEP))
+                tokens.append(Token(TokenType.SEP, pos=start))
                 self.advance()
             else:
-                raise Exception(f"Illegal character '{self.current_char}'")
+                raise self.error(f"Illegal character '{self.current_char}'", start)
 
         return tokens
 
     def generate_number(self) -> Token:
         """Generate a number token from consecutive digits and decimal point"""
+        start = self.cursor_pos
         num_str = ""
         decimal_point_count = 0
 
@@ -150,10 +166,11 @@ class Lexer:
         if num_str.endswith('.'):
             num_str += '0'
 
-        return Token(TokenType.NUMBER, float(num_str))
+        return Token(TokenType.NUMBER, float(num_str), pos=start)
 
     def generate_word(self) -> Token:
         """Generate an identifier or keyword token from consecutive letters"""
+        start = self.cursor_pos
         word = ""
 
         while self.current_char is not None and (self.current_char.isalnum() or self.current_char == '_'):
@@ -169,12 +186,13 @@ class Lexer:
             return None
 
         if word.upper() in self.KEYWORDS:
-            return Token(TokenType.KEYWORD, name=word.upper())
+            return Token(TokenType.KEYWORD, name=word.upper(), pos=start)
         else:
-            return Token(TokenType.IDENTIFIER, name=word)
+            return Token(TokenType.IDENTIFIER, name=word, pos=start)
 
     def generate_string(self) -> Token:
         """Generate a string token from text between quotes"""
+        start = self.cursor_pos
         string = ""
         quote_char = self.current_char
         self.advance()  # Skip the opening quote
@@ -182,7 +200,11 @@ class Lexer:
         # Handle escape characters and collect the string
         while self.current_char is not None and self.current_char != quote_char:
             if self.current_char == '\\':
+                escape = self.cursor_pos
                 self.advance()
+                if self.current_char is None:
+                    self.unterminated_string = True
+                    raise self.error("Unterminated escape at end of input", escape)
                 if self.current_char == 'n':
                     string += '\n'
                 elif self.current_char == 't':
@@ -197,7 +219,10 @@ class Lexer:
                 string += self.current_char
             self.advance()
 
+        if self.current_char is None:
+            self.unterminated_string = True
+
         # Skip the closing quote
         self.advance()
 
-        return Token(TokenType.STRING, name=string)
\ No newline at end of file
+        return Token(TokenType.STRING, name=string, pos=start)
\ No newline at end of file
@@ -0,0 +1,298 @@
+import functools
+import sys
+import threading
+import tracemalloc
+from collections import deque
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from .interpreter import Interpreter
+from .profiler import ProfilingInterpreter
+from .values import Variable, Number, String, List, Map, Set, Stack, Queue
+
+VALUE_CLASSES = (Variable, Number, String, List, Map, Set, Stack, Queue)
+
+# Bytes of each value object with its attributes, not counting the str, list, dict or
+# deque a String, List, Map, Set, Stack or Queue holds; measured with tracemalloc by measure_value_bytes()
+VALUE_BYTES = {}
+
+def measure_value_bytes(count=1000):
+    """Fill VALUE_BYTES with the memory tracemalloc sees per value object"""
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    try:
+        for cls in VALUE_CLASSES:
+            if cls is Number:
+                args = [(i + 0.5,) for i in range(count)]
+            else:
+                args = [(["shared"],) if cls is List else ({"shared": None},) if cls is Map or cls is Set
+                        else (deque(),) if cls is Stack or cls is Queue
+                        else ("shared",) if cls is String else ()] * count
+            before = tracemalloc.get_traced_memory()[0]
+            instances = [cls(*arg) for arg in args]
+            VALUE_BYTES[cls] = round((tracemalloc.get_traced_memory()[0] - before - sys.getsizeof(instances)) / count)
+            del instances
+    finally:
+        if started:
+            tracemalloc.stop()
+
+def value_bytes(variable):
+    """Bytes taken by a Variable and everything in it, counting shared values once"""
+    total = 0
+    seen = set()
+    stack = [variable]
+    while stack:
+        value = stack.pop()
+        if id(value) in seen:
+            continue
+        seen.add(id(value))
+        total += VALUE_BYTES.get(type(value), 0)
+        if isinstance(value, Variable):
+            stack.append(value.value)
+        elif isinstance(value, String):
+            total += sys.getsizeof(value.value)
+        elif isinstance(value, List):
+            total += sys.getsizeof(value.values)
+            stack.extend(value.values)
+        elif isinstance(value, Map):
+            total += sys.getsizeof(value.entries)
+            stack.extend(value.entries.values())
+        elif isinstance(value, Set):
+            total += sys.getsizeof(value.elements)
+        elif isinstance(value, (Stack, Queue)):
+            total += sys.getsizeof(value.items)
+            stack.extend(value.items)
+    return total
+
+def max_rss():
+    """Peak resident memory of this process in bytes, or 0 where that is not known"""
+    if resource is None:
+        return 0
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == 'darwin' else rss * 1024
+
+counters = {}        # Thread id -> MemoryProfilingInterpreter counting the values created on it
+counters_lock = threading.Lock()
+original_inits = {}  # Value class -> its own __init__, while counting
+
+def counting_init(cls, init):
+    """An __init__ for cls that also counts the value for the profiler of the thread, if any"""
+    size = VALUE_BYTES[cls]
+
+    @functools.wraps(init)
+    def __init__(self, *args, **kwargs):
+        init(self, *args, **kwargs)
+        profiler = counters.get(threading.get_ident())
+        if profiler is not None:
+            profiler.objects += 1
+            if cls is List:
+                profiler.allocated += size + sys.getsizeof(self.values)
+            elif cls is String:
+                profiler.allocated += size + sys.getsizeof(self.value)
+            elif cls is Map:
+                profiler.allocated += size + sys.getsizeof(self.entries)
+            elif cls is Set:
+                profiler.allocated += size + sys.getsizeof(self.elements)
+            elif cls is Stack or cls is Queue:
+                profiler.allocated += size + sys.getsizeof(self.items)
+            else:
+                profiler.allocated += size
+    return __init__
+
+def start_counting(profiler):
+    """Count the values created on this thread for profiler, wrapping the value classes' __init__"""
+    with counters_lock:
+        if not VALUE_BYTES:
+            measure_value_bytes()
+        if not counters:
+            for cls in VALUE_CLASSES:
+                original_inits[cls] = cls.__init__
+                cls.__init__ = counting_init(cls, cls.__init__)
+        counters[threading.get_ident()] = profiler
+
+def stop_counting():
+    """Stop counting the values created on this thread, and unwrap __init__ once no thread counts"""
+    with counters_lock:
+        counters.pop(threading.get_ident(), None)
+        if not counters:
+            for cls, init in original_inits.items():
+                cls.__init__ = init
+            original_inits.clear()
+
+# Interpreter that records where a program allocates memory
+class MemoryProfilingInterpreter(ProfilingInterpreter):
+    """Interpreter that counts the values every statement and user function call creates.
+
+    While it runs, the __init__ of each value class, from Variable to
+    Queue, is wrapped to count each value created on its thread and add up
+    its size, including the list a List holds. So a line like l <- [x] + l that
+    copies a growing list shows up with allocations growing with it. The
+    peak resident memory of the process is checked after each statement to
+    find the one running when it was reached; in a process that has used
+    more memory before, such as the IDE, only a new peak is seen. At the
+    end, arrays() lists the largest arrays left in global variables.
+    """
+
+    def reset(self):
+        super().reset()
+        self.statement_memory = {}  # (LineIndex, offset) -> [hits, objects, total bytes, own objects, own bytes]
+        self.function_memory = {}   # name -> [calls, objects, total bytes, own objects, own bytes]
+        self.nested_statements = [[0, 0]]  # Per running statement, the objects and bytes of the statements it ran
+        self.nested_calls = [[0, 0]]       # Per running call, the objects and bytes of the calls it made
+        self.objects = 0     # Values created so far in the run
+        self.allocated = 0   # ... and their bytes
+        self.start_rss = self.peak_rss = max_rss()
+        self.peak_statement = None  # (LineIndex, offset) of the statement running at a new peak, if any
+        self.live_arrays = []
+
+    def interpret(self, node, line_index=None):
+        start_counting(self)
+        try:
+            return super().interpret(node, line_index)
+        finally:
+            stop_counting()
+            self.live_arrays = self.find_arrays()
+
+    def visit_measured(self, statement):
+        """Visit a statement and add its hit and the values it created to its line"""
+        nested = self.nested_statements
+        nested.append([0, 0])
+        key = (self.line_index, statement.pos)
+        active = self.active_statements
+        active[key] = active.get(key, 0) + 1
+        objects, allocated = self.objects, self.allocated
+        try:
+            return Interpreter.visit(self, statement)
+        finally:
+            objects = self.objects - objects
+            allocated = self.allocated - allocated
+            inner_objects, inner_bytes = nested.pop()
+            nested[-1][0] += objects
+            nested[-1][1] += allocated
+            active[key] -= 1
+            entry = self.statement_memory.get(key)
+            if entry is None:
+                entry = self.statement_memory[key] = [0, 0, 0, 0, 0]
+            entry[0] += 1
+            if active[key] == 0:
+                entry[1] += objects
+                entry[2] += allocated
+            entry[3] += objects - inner_objects
+            entry[4] += allocated - inner_bytes
+
+            # The first statement to end after a new peak is the innermost one running at it
+            peak = max_rss()
+            if peak > self.peak_rss:
+                self.peak_rss = peak
+                self.peak_statement = key
+
+    def visit_function_call(self, node):
+        """Call a function and add the call and the values it created to the function"""
+        name = node.name
+        nested = self.nested_calls
+        nested.append([0, 0])
+        active = self.active_calls
+        active[name] = active.get(name, 0) + 1
+        objects, allocated = self.objects, self.allocated
+        try:
+            return Interpreter.visit_function_call(self, node)
+        finally:
+            objects = self.objects - objects
+            allocated = self.allocated - allocated
+            inner_objects, inner_bytes = nested.pop()
+            nested[-1][0] += objects
+            nested[-1][1] += allocated
+            active[name] -= 1
+            if name in self.definitions:
+                entry = self.function_memory.get(name)
+                if entry is None:
+                    entry = self.function_memory[name] = [0, 0, 0, 0, 0]
+                entry[0] += 1
+                if active[name] == 0:
+                    entry[1] += objects
+                    entry[2] += allocated
+                entry[3] += objects - inner_objects
+                entry[4] += allocated - inner_bytes
+
+    def find_arrays(self):
+        """[(name, length, bytes)] of the arrays in global variables, largest first"""
+        arrays = []
+        for name, variable in self.global_symbol_table.symbols.items():
+            if isinstance(variable, Variable) and variable.type == "list":
+                arrays.append((name, len(variable.value.values), value_bytes(variable)))
+        arrays.sort(key=lambda array: array[2], reverse=True)
+        return arrays
+
+    def position(self, key):
+        """(file, line) of a (LineIndex, offset) key, or None"""
+        line_index, pos = key
+        if line_index is None or pos is None:
+            return None
+        return self.source_name(line_index), line_index.line_col(pos)[0]
+
+    def functions(self):
+        """Per user function: name, calls, objects and bytes in total and its own, and where it is defined; by own bytes"""
+        rows = []
+        for name, (calls, objects, total, own_objects, own) in self.function_memory.items():
+            where = self.position(self.definitions[name])
+            rows.append({'function': name, 'calls': calls, 'objects': objects, 'bytes': total,
+                         'own_objects': own_objects, 'own_bytes': own,
+                         'file': where[0] if where else self.source_name(self.definitions[name][0]),
+                         'line': where[1] if where else None})
+        rows.sort(key=lambda row: row['own_bytes'], reverse=True)
+        return rows
+
+    def lines(self):
+        """Per source line: file, line, hits, objects and bytes in total and its own, and its text; by own bytes"""
+        by_line = {}
+        for key, (hits, objects, total, own_objects, own) in self.statement_memory.items():
+            where = self.position(key)
+            if where is None:
+                continue
+            row = by_line.get(where)
+            if row is None:
+                line_index, line = key[0], where[1]
+                row = by_line[where] = {'file': where[0], 'line': line, 'hits': 0, 'objects': 0, 'bytes': 0,
+                                        'own_objects': 0, 'own_bytes': 0,
+                                        'text': line_index.code.split('\n', line)[line - 1].strip()}
+            row['hits'] += hits
+            row['objects'] += objects
+            row['bytes'] += total
+            row['own_objects'] += own_objects
+            row['own_bytes'] += own
+        rows = list(by_line.values())
+        rows.sort(key=lambda row: row['own_bytes'], reverse=True)
+        return rows
+
+    def arrays(self):
+        """[{name, length, bytes}] of the arrays left in global variables at the end of the run, largest first"""
+        return [{'name': name, 'length': length, 'bytes': size} for name, length, size in self.live_arrays]
+
+    def peak(self):
+        """Peak resident memory in bytes, its growth during the run and the (file, line) running then or None"""
+        where = self.position(self.peak_statement) if self.peak_statement is not None else None
+        return self.peak_rss, self.peak_rss - self.start_rss, where
+
+    def report(self, limit=15):
+        """The lines and functions of the last run that created the most, and the largest arrays, as text"""
+        peak, growth, where = self.peak()
+        out = [f"Memory profile: {self.objects} values, {self.allocated / 1024:.1f} KB allocated; "
+               f"peak RSS {peak / 2**20:.1f} MB, {growth / 1024:.0f} KB more than at the start"
+               + (f", reached at {where[0]}:{where[1]}" if where else ""), "",
+               f"{'function':<20} {'calls':>8} {'values':>10} {'total KB':>10} {'own KB':>10}  defined at"]
+        for row in self.functions()[:limit]:
+            where = f"{row['file']}:{row['line']}" if row['line'] is not None else row['file']
+            out.append(f"{row['function']:<20} {row['calls']:>8} {row['own_objects']:>10} "
+                       f"{row['bytes'] / 1024:>10.1f} {row['own_bytes'] / 1024:>10.1f}  {where}")
+        out += ["", f"{'line':<20} {'hits':>8} {'values':>10} {'total KB':>10} {'own KB':>10}  source"]
+        for row in self.lines()[:limit]:
+            out.append(f"{row['file'] + ':' + str(row['line']):<20} {row['hits']:>8} {row['own_objects']:>10} "
+                       f"{row['bytes'] / 1024:>10.1f} {row['own_bytes'] / 1024:>10.1f}  {row['text'][:50]}")
+        out += ["", f"{'array':<20} {'length':>8} {'KB':>10}"]
+        for row in self.arrays()[:limit]:
+            out.append(f"{row['name']:<20} {row['length']:>8} {row['bytes'] / 1024:>10.1f}")
+        return "\n".join(out) + "\n"
@@ -0,0 +1,127 @@
+import time
+from collections import deque
+
+# Output sinks: where the interpreter sends PRINT output
+class OutputSink:
+    """Base class for the destinations of program output.
+
+    The interpreter calls write() once per PRINT with the text including its
+    newline, flush() when a run ends, and clear() when a new run starts.
+    """
+
+    def write(self, text):
+        raise NotImplementedError
+
+    def flush(self):
+        """Pass on any output still held back"""
+
+    def clear(self):
+        """Forget the output kept for getvalue(), if any"""
+
+    def getvalue(self):
+        """The output kept by this sink, as one string"""
+        return ""
+
+    def close(self):
+        """Flush and release any file the sink owns"""
+        self.flush()
+
+class BufferSink(OutputSink):
+    """Keep all output in memory, as a list of pieces joined on demand"""
+
+    def __init__(self):
+        self.parts = []
+
+    def write(self, text):
+        self.parts.append(text)
+
+    def clear(self):
+        self.parts = []
+
+    def getvalue(self):
+        if len(self.parts) > 1:
+            self.parts = ["".join(self.parts)]
+        return self.parts[0] if self.parts else ""
+
+class RingBufferSink(OutputSink):
+    """Keep only the last max_lines writes, so memory stays bounded"""
+
+    def __init__(self, max_lines=10000):
+        self.lines = deque(maxlen=max_lines)
+        self.dropped = 0  # Writes pushed out of the buffer
+
+    def write(self, text):
+        if len(self.lines) == self.lines.maxlen:
+            self.dropped += 1
+        self.lines.append(text)
+
+    def clear(self):
+        self.lines.clear()
+        self.dropped = 0
+
+    def getvalue(self):
+        return "".join(self.lines)
+
+class BatchedSink(OutputSink):
+    """Collect writes and pass them on in batches through emit().
+
+    A batch is emitted once batch_lines writes are pending or, if interval
+    is given, once interval seconds have passed since the last batch.
+    """
+
+    def __init__(self, batch_lines=1000, interval=None):
+        self.batch_lines = batch_lines
+        self.interval = interval
+        self.pending = []
+        self.last_emit = time.monotonic()
+
+    def write(self, text):
+        self.pending.append(text)
+        if len(self.pending) >= self.batch_lines:
+            self.flush()
+        elif self.interval is not None and time.monotonic() - self.last_emit >= self.interval:
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            text = "".join(self.pending)
+            self.pending = []
+            self.emit(text)
+        self.last_emit = time.monotonic()
+
+    def emit(self, text):
+        raise NotImplementedError
+
+class FileSink(BatchedSink):
+    """Stream output to a file, given as a path (opened and owned by the sink) or a file object"""
+
+    def __init__(self, file, batch_lines=1000, encoding="utf-8", interval=None):
+        super().__init__(batch_lines, interval)
+        if isinstance(file, (str, bytes)) or hasattr(file, '__fspath__'):
+            self.file = open(file, 'w', encoding=encoding)
+            self.owns_file = True
+        else:
+            self.file = file
+            self.owns_file = False
+
+    def emit(self, text):
+        self.file.write(text)
+
+    def flush(self):
+        super().flush()
+        self.file.flush()
+
+    def close(self):
+        self.flush()
+        if self.owns_file:
+            self.file.close()
+
+class CallbackSink(BatchedSink):
+    """Pass output in batches to callback(text), e.g. to show it while the program runs"""
+
+    def __init__(self, callback, batch_lines=100, interval=0.05):
+        super().__init__(batch_lines, interval)
+        self.callback = callback
+
+    def emit(self, text):
+        self.callback(text)
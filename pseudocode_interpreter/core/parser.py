@@ -1,11 +1,123 @@
 from typing import List
 from .tokens import Token, TokenType
-from .ast_nodes import Node, NodeType
+from .ast_nodes import (NodeType, Null, NumberLiteral, StringLiteral, BooleanLiteral, ListLiteral,
+                        MapLiteral, VarAccess, VarAssign, ArrayAccess, ArrayAssign, BinOp, UnaryOp, Call, Block,
+                        If, IfElse, For, ForEach, While, RepeatUntil, Def, Return, Print, Read, Input, Include,
+                        Declare, Case, CaseItem, CaseOtherwise)
+from .errors import PseudocodeError
+
+# Binary operators: (left binding power, right binding power, node type).
+# An operator takes the operand to its right together with every following
+# operator whose left binding power is higher than its right binding power,
+# so equal powers associate to the left and a lower right power to the right.
+# AND/OR take a whole comparison (possibly starting with NOT) on their right.
+INFIX_OPERATORS = {
+    TokenType.EQ: (20, 20, NodeType.EE),
+    TokenType.EE: (20, 20, NodeType.EE),
+    TokenType.NE: (20, 20, NodeType.NE),
+    TokenType.LT: (20, 20, NodeType.LT),
+    TokenType.GT: (20, 20, NodeType.GT),
+    TokenType.LTE: (20, 20, NodeType.LTE),
+    TokenType.GTE: (20, 20, NodeType.GTE),
+    TokenType.PLUS: (30, 30, NodeType.ADD),
+    TokenType.MINUS: (30, 30, NodeType.SUBTRACT),
+    TokenType.MULTIPLY: (40, 40, NodeType.MULTIPLY),
+    TokenType.DIVIDE: (40, 40, NodeType.DIVIDE),
+    TokenType.POW: (50, 49, NodeType.POWER),
+}
+KEYWORD_OPERATORS = {
+    'AND': (10, 0, NodeType.AND),
+    'OR': (10, 0, NodeType.OR),
+    'MOD': (40, 40, NodeType.MODULO),
+    'DIV': (40, 40, NodeType.INT_DIVIDE),
+}
+# IN is not reserved, so that programs may still use in and each as names: it is lexed
+# as an identifier and only read as an operator where one can stand; see in_operator_at
+IN_OPERATOR = (20, 20, NodeType.IN)
+
+# Unary operators bind more tightly than * and / but less than ^
+PREFIX_OPERATORS = {
+    TokenType.PLUS: NodeType.PLUS,
+    TokenType.MINUS: NodeType.MINUS,
+}
+UNARY_BINDING_POWER = 45
+
+# Default limit on how deeply blocks and brackets may nest
+MAX_NESTING_DEPTH = 1000
+
+# Keywords that open and close function definitions
+FUNCTION_OPENERS = {'DEF', 'FUNCTION', 'PROCEDURE'}
+FUNCTION_CLOSERS = {'ENDEF', 'ENDFUNCTION', 'ENDPROCEDURE'}
+
+def is_word(token, word):
+    """Whether token is the identifier word, in any case, for the words that are keywords only in context"""
+    return token.type == TokenType.IDENTIFIER and token.name.upper() == word
+
+def in_operator_at(tokens, index):
+    """Whether tokens[index] is the IN operator, rather than a variable named in.
+
+    It is a variable when an assignment to it follows, as in in <- 1 or
+    in[i] <- 1, since a new statement may start on the next line.
+    """
+    if not is_word(tokens[index], 'IN'):
+        return False
+    following = index + 1
+    if following < len(tokens) and tokens[following].type == TokenType.LSQBRACKET:
+        depth = 0
+        while following < len(tokens):
+            if tokens[following].type == TokenType.LSQBRACKET:
+                depth += 1
+            elif tokens[following].type == TokenType.RSQBRACKET:
+                depth -= 1
+                if depth == 0:
+                    break
+            following += 1
+        following += 1
+    return following < len(tokens) and tokens[following].type != TokenType.EQ
+
+# Function body whose parsing is put off until the function is first called
+class LazyBody:
+    def __init__(self, tokens, line_index, max_depth, depth, end_keyword, terminators):
+        self.tokens = tokens          # Body tokens up to and including the end keyword
+        self.line_index = line_index
+        self.max_depth = max_depth
+        self.depth = depth            # Nesting depth of the definition
+        self.end_keyword = end_keyword
+        self.terminators = terminators
+        self.parsed = None
+
+    def parse(self):
+        """Parse the body once, returning the body block and the return expression"""
+        if self.parsed is None:
+            parser = Parser(self.tokens, self.line_index, self.max_depth)
+            self.parsed = parser.parse_function_body(self.depth, self.end_keyword, self.terminators)
+            self.tokens = None
+        return self.parsed
+
+    def __repr__(self):
+        return "<unparsed body>" if self.parsed is None else "<parsed body>"
 
 # Parser class
 class Parser:
-    def __init__(self, tokens: List[Token]):
+    """Recursive descent parser that keeps its recursion on an explicit stack.
+
+    Parsing methods that need a nested construct parsed yield the generator
+    for it and are resumed with the resulting node (see run), so deeply
+    nested programs grow a Python list rather than the interpreter stack.
+    How deeply blocks and brackets may nest is limited by max_depth (None
+    for no limit).
+
+    With lazy_functions, function bodies are only checked for their end
+    keyword and are parsed when the function is first called (see LazyBody),
+    so syntax errors inside them are reported at that point.
+    """
+    def __init__(self, tokens: List[Token], line_index=None, max_depth=MAX_NESTING_DEPTH,
+                 lazy_functions=False):
         self.tokens = tokens
+        self.line_index = line_index  # Used to report error positions
+        self.max_depth = max_depth
+        self.lazy_functions = lazy_functions
+        self.depth = 0  # Current block and bracket nesting
         self.cursor_pos = 0
         self.current_token = self.tokens[0] if tokens else Token(TokenType.NONE)
 
@@ -23,10 +135,37 @@ class Parser:
         if self.cursor_pos >= 0:
             self.current_token = self.tokens[self.cursor_pos]
 
+    def run(self, frame):
+        """Run a parsing generator, and the generators it yields, to completion"""
+        stack = [frame]
+        value = None
+        while True:
+            try:
+                nested = stack[-1].send(value)
+            except StopIteration as done:
+                stack.pop()
+                if not stack:
+                    return done.value
+                value = done.value
+            else:
+                stack.append(nested)
+                value = None
+
+    def enter(self):
+        """Enter a nested block or bracket, enforcing the nesting limit"""
+        self.depth += 1
+        if self.max_depth is not None and self.depth > self.max_depth:
+            raise Exception(f"Nesting too deep: more than {self.max_depth} levels")
+
+    def leave(self):
+        """Leave a nested block or bracket"""
+        self.depth -= 1
+
     def parse(self):
         """Parse the tokens and return the AST"""
         if not self.tokens:
-            return Node(NodeType.NULL)
+            return Null()
+        self.depth = 0
 
         # Skip any leading separators/newlines
         self.sep_expr()
@@ -34,22 +173,57 @@ class Parser:
         statements = []
 
         # Parse multiple statements
-        while self.current_token.type != TokenType.NONE:
-            if self.current_token.type in [TokenType.SEP, TokenType.NL]:
-                self.sep_expr()
-                continue
+        try:
+            while self.current_token.type != TokenType.NONE:
+                if self.current_token.type in [TokenType.SEP, TokenType.NL]:
+                    self.sep_expr()
+                    continue
 
-            statement = self.expr()
-            statements.append(statement)
-            self.sep_expr()  # Skip any separators after the statement
+                statements.append(self.run(self.statement()))
+                self.sep_expr()  # Skip any separators after the statement
+        except Exception as e:
+            self.raise_located(e)
 
         # If we have multiple statements, wrap them in a block
         if len(statements) == 0:
-            return Node(NodeType.NULL)
+            return Null()
         elif len(statements) == 1:
             return statements[0]
         else:
-            return Node(NodeType.BLOCK, nodes=statements)
+            return Block(statements)
+
+    def parse_function_body(self, depth, end_keyword, terminators):
+        """Parse the tokens as a function body at the given nesting depth.
+
+        Returns the body block and the return expression.
+        """
+        self.depth = depth
+        try:
+            return self.run(self.function_body(end_keyword, terminators))
+        except Exception as e:
+            self.raise_located(e)
+
+    def raise_located(self, error):
+        """Re-raise error tagged with the position of the current token"""
+        located = PseudocodeError.locate(error, self.line_index, self.error_pos())
+        if located is error:
+            raise error
+        raise located from error
+
+    def error_pos(self):
+        """Source offset of the current token, falling back to the last token at end of input"""
+        if self.current_token.pos is not None:
+            return self.current_token.pos
+        if self.tokens:
+            return self.tokens[-1].pos
+        return None
+
+    def statement(self):
+        """Parse one statement and record where it starts"""
+        pos = self.current_token.pos
+        node = (yield self.expr())
+        node.pos = pos
+        return node
 
     def declare_expr(self):
         """Handle variable declarations: DECLARE identifier : type"""
@@ -80,21 +254,21 @@ class Parser:
             dimensions = []
 
             # Parse first dimension
-            start_expr = self.expr()
+            start_expr = (yield self.expr())
             if self.current_token.type != TokenType.COLON:
                 raise Exception("Expected ':' in array dimension")
             self.advance()  # Skip ':'
-            end_expr = self.expr()
+            end_expr = (yield self.expr())
             dimensions.append((start_expr, end_expr))
 
             # Check for additional dimensions
             while self.current_token.type == TokenType.COMMA:
                 self.advance()  # Skip ','
-                start_expr = self.expr()
+                start_expr = (yield self.expr())
                 if self.current_token.type != TokenType.COLON:
                     raise Exception("Expected ':' in array dimension")
                 self.advance()  # Skip ':'
-                end_expr = self.expr()
+                end_expr = (yield self.expr())
                 dimensions.append((start_expr, end_expr))
 
             if self.current_token.type != TokenType.RSQBRACKET:
@@ -116,11 +290,12 @@ class Parser:
             # Create array type string
             dim_strs = []
             for start, end in dimensions:
-                # For now, just use simple representation
-                dim_strs.append(f"{start.value if hasattr(start, 'value') else '?'}:{end.value if hasattr(end, 'value') else '?'}")
+                # For now, just use simple representation: only number bounds are shown
+                dim_strs.append(f"{start.value if start.type == NodeType.NUMBER else None}:"
+                                f"{end.value if end.type == NodeType.NUMBER else None}")
             array_type = f"ARRAY[{','.join(dim_strs)}] OF {element_type}"
 
-            return Node(NodeType.DECLARE, name=var_name, nodes=[Node(NodeType.STRING, name=array_type)])
+            return Declare(var_name, array_type)
         else:
             # Simple type declaration
             if self.current_token.type != TokenType.KEYWORD:
@@ -129,280 +304,254 @@ class Parser:
             type_name = self.current_token.name
             self.advance()  # Skip type name
 
-            return Node(NodeType.DECLARE, name=var_name, nodes=[Node(NodeType.STRING, name=type_name)])
+            return Declare(var_name, type_name)
 
     def expr(self, allow_assignment=True):
         """Parse expressions"""
-        # Handle variable assignments (only if assignments are allowed)
-        if (allow_assignment and
-            self.current_token.type == TokenType.IDENTIFIER and
-            self.cursor_pos + 1 < len(self.tokens) and
-            self.tokens[self.cursor_pos + 1].type == TokenType.EQ):
-
-            var_name = self.current_token.name
-            self.advance()  # Skip identifier
-            self.advance()  # Skip equals
-
-            expr = self.expr()
-            return Node(NodeType.VAR_ASSIGN, name=var_name, nodes=[expr])
-
-        # Handle array assignments (only if assignments are allowed)
-        elif (allow_assignment and
-              self.current_token.type == TokenType.IDENTIFIER and
-              self.cursor_pos + 1 < len(self.tokens) and
-              self.tokens[self.cursor_pos + 1].type == TokenType.LSQBRACKET):
-
-            # Look ahead to see if this is an array assignment
-            temp_pos = self.cursor_pos + 2
-            bracket_count = 1
-            while temp_pos < len(self.tokens) and bracket_count > 0:
-                if self.tokens[temp_pos].type == TokenType.LSQBRACKET:
-                    bracket_count += 1
-                elif self.tokens[temp_pos].type == TokenType.RSQBRACKET:
-                    bracket_count -= 1
-                temp_pos += 1
-
-            # Check if there's an equals sign after the closing bracket
-            if (temp_pos < len(self.tokens) and
-                self.tokens[temp_pos].type == TokenType.EQ):
-
-                var_name = self.current_token.name
-                self.advance()  # Skip identifier
-                self.advance()  # Skip '['
-
-                # Parse array indices
-                indices = []
-                indices.append(self.expr())
-
-                while self.current_token.type == TokenType.COMMA:
-                    self.advance()  # Skip ','
-                    indices.append(self.expr())
-
-                if self.current_token.type != TokenType.RSQBRACKET:
-                    raise Exception("Expected ']' to close array assignment")
-
-                self.advance()  # Skip ']'
-                self.advance()  # Skip '='
-
-                value_expr = self.expr()
-                return Node(NodeType.ARRAY_ASSIGN, name=var_name, nodes=indices + [value_expr])
+        # Handle assignments (only if assignments are allowed). The target is
+        # parsed once as an ordinary expression; if an assignment sign follows
+        # it is turned into an assignment, otherwise parsing carries on with
+        # it as the left operand.
+        if allow_assignment and self.current_token.type == TokenType.IDENTIFIER:
+            target = self.literal()
+            if target is None:
+                target = (yield self.atom())
+
+            if (self.current_token.type == TokenType.EQ and
+                target.type in [NodeType.VAR_ACCESS, NodeType.ARRAY_ACCESS]):
+                self.advance()  # Skip equals
+
+                value_expr = (yield self.expr())
+                if target.type == NodeType.VAR_ACCESS:
+                    return VarAssign(target.name, value_expr)
+                return ArrayAssign(target.name, target.indices, value_expr)
+
+            return (yield self.operator_expr(left=target))
 
         # Handle keywords
-        elif self.current_token.type == TokenType.KEYWORD:
+        if self.current_token.type == TokenType.KEYWORD:
             keyword = self.current_token.name
 
             if keyword == 'IF':
-                return self.if_expr()
+                return (yield self.if_expr())
             elif keyword == 'FOR':
-                return self.for_expr()
+                return (yield self.for_expr())
             elif keyword == 'WHILE':
-                return self.while_expr()
+                return (yield self.while_expr())
             elif keyword in ['DEF', 'FUNCTION', 'PROCEDURE']:
-                return self.def_expr()
+                return (yield self.def_expr())
             elif keyword in ['PRINT', 'INPUT', 'read']:
-                return self.builtin_expr()
+                return (yield self.builtin_expr())
             elif keyword == 'INCLUDE':
                 return self.include_expr()
             elif keyword == 'CASE':
-                return self.case_expr()
+                return (yield self.case_expr())
             elif keyword == 'REPEAT':
-                return self.repeat_until_expr()
+                return (yield self.repeat_until_expr())
             elif keyword == 'DECLARE':
-                return self.declare_expr()
+                return (yield self.declare_expr())
             elif keyword == 'RETURN':
-                return self.return_expr()
+                return (yield self.return_expr())
             elif keyword == 'ENDEF':
                 # This should only appear at the end of a function definition, so it's an error if we see it here
                 raise Exception("Unexpected ENDEF outside of function definition")
 
-        # Handle logical expressions
-        return self.comp_expr()
-
-    def comp_expr(self):
-        """Handle comparison expressions"""
-        if self.current_token.type == TokenType.KEYWORD and self.current_token.name == 'NOT':
-            self.advance()
-            node = Node(NodeType.NOT, nodes=[self.comp_expr()])
-            return node
-
-        node = self.arith_expr()
-
-        while (self.current_token.type in [TokenType.EQ, TokenType.EE, TokenType.NE, TokenType.LT,
-                                          TokenType.GT, TokenType.LTE, TokenType.GTE] or
-              (self.current_token.type == TokenType.KEYWORD and
-               self.current_token.name in ['AND', 'OR'])):
-
-            if self.current_token.type == TokenType.EQ:
-                self.advance()
-                node = Node(NodeType.EE, nodes=[node, self.arith_expr()])
-            elif self.current_token.type == TokenType.EE:
-                self.advance()
-                node = Node(NodeType.EE, nodes=[node, self.arith_expr()])
-            elif self.current_token.type == TokenType.NE:
-                self.advance()
-                node = Node(NodeType.NE, nodes=[node, self.arith_expr()])
-            elif self.current_token.type == TokenType.LT:
-                self.advance()
-                node = Node(NodeType.LT, nodes=[node, self.arith_expr()])
-            elif self.current_token.type == TokenType.GT:
-                self.advance()
-                node = Node(NodeType.GT, nodes=[node, self.arith_expr()])
-            elif self.current_token.type == TokenType.LTE:
-                self.advance()
-                node = Node(NodeType.LTE, nodes=[node, self.arith_expr()])
-            elif self.current_token.type == TokenType.GTE:
-                self.advance()
-                node = Node(NodeType.GTE, nodes=[node, self.arith_expr()])
-            elif self.current_token.type == TokenType.KEYWORD and self.current_token.name == 'AND':
-                self.advance()
-                node = Node(NodeType.AND, nodes=[node, self.comp_expr()])
-            elif self.current_token.type == TokenType.KEYWORD and self.current_token.name == 'OR':
-                self.advance()
-                node = Node(NodeType.OR, nodes=[node, self.comp_expr()])
-
-        return node
-
-    def arith_expr(self):
-        """Handle arithmetic expressions: addition and subtraction"""
-        node = self.term()
-
-        while self.current_token.type in [TokenType.PLUS, TokenType.MINUS]:
-            if self.current_token.type == TokenType.PLUS:
-                self.advance()
-                node = Node(NodeType.ADD, nodes=[node, self.term()])
-            elif self.current_token.type == TokenType.MINUS:
+        # Handle logical, comparison and arithmetic expressions
+        return (yield self.operator_expr())
+
+    def operator_expr(self, rbp=0, left=None):
+        """Handle unary and binary operators by precedence climbing.
+
+        Operands are parsed for as long as the next operator binds more tightly
+        (has a higher left binding power) than rbp, the binding power of the
+        operator to the left. Parsing may continue from an already parsed left
+        operand. Operators still waiting for their right operand are kept on
+        a stack, so long chains of prefix or right-associative operators do
+        not recurse.
+        """
+        pending = []  # (rbp to restore, node type, left operand or None for prefix operators)
+
+        while True:
+            if left is None:
+                left = self.literal()
+            if left is None:
+                token = self.current_token
+                if token.type in PREFIX_OPERATORS:
+                    self.advance()
+                    pending.append((rbp, PREFIX_OPERATORS[token.type], None))
+                    rbp = UNARY_BINDING_POWER
+                    continue
+                if token.type == TokenType.KEYWORD and token.name == 'NOT' and rbp <= 0:
+                    # NOT takes a whole comparison, so it may only start one
+                    self.advance()
+                    pending.append((rbp, NodeType.NOT, None))
+                    rbp = 0
+                    continue
+                left = (yield self.atom())
+
+            token = self.current_token
+            if token.type == TokenType.KEYWORD:
+                operator = KEYWORD_OPERATORS.get(token.name)
+            elif token.type == TokenType.IDENTIFIER:
+                operator = IN_OPERATOR if in_operator_at(self.tokens, self.cursor_pos) else None
+            else:
+                operator = INFIX_OPERATORS.get(token.type)
+            if operator is not None and operator[0] > rbp:
                 self.advance()
-                node = Node(NodeType.SUBTRACT, nodes=[node, self.term()])
-
-        return node
-
-    def term(self):
-        """Handle term expressions: multiplication, division, MOD, and DIV"""
-        node = self.factor()
+                pending.append((rbp, operator[2], left))
+                rbp = operator[1]
+                left = None
+                continue
 
-        while (self.current_token.type in [TokenType.MULTIPLY, TokenType.DIVIDE] or
-               (self.current_token.type == TokenType.KEYWORD and
-                self.current_token.name in ['MOD', 'DIV'])):
-            if self.current_token.type == TokenType.MULTIPLY:
-                self.advance()
-                node = Node(NodeType.MULTIPLY, nodes=[node, self.factor()])
-            elif self.current_token.type == TokenType.DIVIDE:
-                self.advance()
-                node = Node(NodeType.DIVIDE, nodes=[node, self.factor()])
-            elif self.current_token.type == TokenType.KEYWORD and self.current_token.name == 'MOD':
-                self.advance()
-                node = Node(NodeType.MODULO, nodes=[node, self.factor()])
-            elif self.current_token.type == TokenType.KEYWORD and self.current_token.name == 'DIV':
-                self.advance()
-                node = Node(NodeType.INT_DIVIDE, nodes=[node, self.factor()])
+            # Nothing binds to the operand any more: complete the innermost pending operator
+            if not pending:
+                return left
+            rbp, node_type, operand = pending.pop()
+            if operand is None:
+                left = UnaryOp(node_type, left)
+            else:
+                left = BinOp(node_type, operand, left)
 
-        return node
+    def literal(self):
+        """Handle atoms without nested expressions: numbers, strings, booleans and plain variables.
 
-    def factor(self):
-        """Handle unary operators +/- followed by a power"""
+        Returns None, without consuming anything, for any other atom.
+        """
         token = self.current_token
+        token_type = token.type
 
-        if token.type == TokenType.PLUS:
+        if token_type == TokenType.NUMBER:
             self.advance()
-            return Node(NodeType.PLUS, nodes=[self.factor()])
-        elif token.type == TokenType.MINUS:
+            return NumberLiteral(token.value)
+        elif token_type == TokenType.STRING:
             self.advance()
-            return Node(NodeType.MINUS, nodes=[self.factor()])
-
-        return self.power()
-
-    def power(self):
-        """Handle exponentiation: base ^ exponent"""
-        node = self.atom()
-
-        if self.current_token.type == TokenType.POW:
+            return StringLiteral(token.name)
+        elif token_type == TokenType.IDENTIFIER:
+            # Function calls and array accesses are left to atom
+            following = self.cursor_pos + 1
+            if following < len(self.tokens) and self.tokens[following].type in (TokenType.LPAREN, TokenType.LSQBRACKET):
+                return None
+            self.advance()
+            return VarAccess(token.name)
+        elif token_type == TokenType.KEYWORD and token.name in ['TRUE', 'FALSE']:
             self.advance()
-            return Node(NodeType.POWER, nodes=[node, self.factor()])
+            return BooleanLiteral(token.name)
 
-        return node
+        return None
 
     def atom(self):
         """Handle atomic expressions: numbers, variables, parentheses, lists, function calls"""
+        node = self.literal()
+        if node is not None:
+            return node
+
         token = self.current_token
 
-        if token.type == TokenType.NUMBER:
-            self.advance()
-            return Node(NodeType.NUMBER, value=token.value)
-        elif token.type == TokenType.STRING:
-            self.advance()
-            return Node(NodeType.STRING, name=token.name)
-        elif token.type == TokenType.LSQBRACKET:
-            return self.list_expr()
+        if token.type == TokenType.LSQBRACKET:
+            return (yield self.list_expr())
+        elif token.type == TokenType.LBRACE:
+            return (yield self.map_expr())
         elif token.type == TokenType.LPAREN:
+            self.enter()
             self.advance()
-            expr = self.expr()
+            expr = (yield self.expr())
 
             if self.current_token.type != TokenType.RPAREN:
                 raise Exception("Expected closing parenthesis")
 
             self.advance()
+            self.leave()
             return expr
         elif token.type == TokenType.IDENTIFIER:
+            # Only identifiers followed by '(' or '[' get here
             self.advance()
 
             # Check if this is a function call
             if self.current_token.type == TokenType.LPAREN:
                 self.devance()  # Go back to the identifier for function_call to handle
-                return self.function_call()
+                return (yield self.function_call())
 
             # Check if this is array access
             elif self.current_token.type == TokenType.LSQBRACKET:
                 var_name = token.name
+                self.enter()
                 self.advance()  # Skip '['
 
                 # Parse array indices
                 indices = []
-                indices.append(self.expr())
+                indices.append((yield self.expr()))
 
                 while self.current_token.type == TokenType.COMMA:
                     self.advance()  # Skip ','
-                    indices.append(self.expr())
+                    indices.append((yield self.expr()))
 
                 if self.current_token.type != TokenType.RSQBRACKET:
                     raise Exception("Expected ']' to close array access")
 
                 self.advance()  # Skip ']'
+                self.leave()
 
-                return Node(NodeType.ARRAY_ACCESS, name=var_name, nodes=indices)
-
-            return Node(NodeType.VAR_ACCESS, name=token.name)
-        elif token.type == TokenType.KEYWORD and token.name in ['TRUE', 'FALSE']:
-            self.advance()
-            return Node(NodeType.BOOLEAN, name=token.name)
+                return ArrayAccess(var_name, indices)
 
         raise Exception(f"Invalid syntax: Unexpected token {token}")
 
     def list_expr(self):
         """Handle list expressions: [expr, expr, ...]"""
+        self.enter()
         self.advance()  # Skip the left square bracket
         elements = []
 
         # Handle empty list
         if self.current_token.type == TokenType.RSQBRACKET:
             self.advance()
-            return Node(NodeType.LIST, nodes=elements)
+            self.leave()
+            return ListLiteral(elements)
+
 
         # Parse list elements
-        elements.append(self.expr())
+        elements.append((yield self.expr()))
 
         while self.current_token.type == TokenType.COMMA:
             self.advance()
-            elements.append(self.expr())
+            elements.append((yield self.expr()))
 
         if self.current_token.type != TokenType.RSQBRACKET:
             raise Exception("Expected closing bracket for list")
 
         self.advance()  # Skip the right square bracket
-        return Node(NodeType.LIST, nodes=elements)
+        self.leave()
+        return ListLiteral(elements)
+
+    def map_expr(self):
+        """Handle map expressions: {key: value, key: value, ...}"""
+        self.enter()
+        self.advance()  # Skip the left brace
+        keys = []
+        values = []
+
+        if self.current_token.type != TokenType.RBRACE:
+            while True:
+                keys.append((yield self.expr()))
+                if self.current_token.type != TokenType.COLON:
+                    raise Exception("Expected ':' after map key")
+                self.advance()  # Skip ':'
+                values.append((yield self.expr()))
+
+                if self.current_token.type != TokenType.COMMA:
+                    break
+                self.advance()  # Skip ','
+
+            if self.current_token.type != TokenType.RBRACE:
+                raise Exception("Expected closing brace for map")
+
+        self.advance()  # Skip the right brace
+        self.leave()
+        return MapLiteral(keys, values)
 
     def function_call(self):
         """Handle function calls: func_name(arg1, arg2, ...)"""
         func_name = self.current_token.name
+        self.enter()
         self.advance()  # Skip the identifier
         self.advance()  # Skip the left parenthesis
 
@@ -411,25 +560,27 @@ class Parser:
         # Handle no arguments
         if self.current_token.type == TokenType.RPAREN:
             self.advance()
-            return Node(NodeType.FUNCTION_CALL, name=func_name, nodes=args)
+            self.leave()
+            return Call(func_name, args)
 
         # Parse arguments
-        args.append(self.expr())
+        args.append((yield self.expr()))
 
         while self.current_token.type == TokenType.COMMA:
             self.advance()
-            args.append(self.expr())
+            args.append((yield self.expr()))
 
         if self.current_token.type != TokenType.RPAREN:
             raise Exception("Expected closing parenthesis for function call")
 
         self.advance()  # Skip the right parenthesis
-        return Node(NodeType.FUNCTION_CALL, name=func_name, nodes=args)
+        self.leave()
+        return Call(func_name, args)
 
     def if_expr(self):
         """Handle if expressions: IF condition THEN expr (ELSE expr) ENDIF"""
         self.advance()  # Skip 'IF'
-        condition = self.expr(allow_assignment=False)  # Don't allow assignments in conditions
+        condition = (yield self.expr(allow_assignment=False))  # Don't allow assignments in conditions
 
         if self.current_token.type != TokenType.KEYWORD or self.current_token.name != 'THEN':
             raise Exception("Expected 'THEN' after IF condition")
@@ -437,30 +588,36 @@ class Parser:
         self.advance()  # Skip 'THEN'
 
         # Parse the 'if' block
-        if_block = self.block_expr(['ELSE', 'ENDIF'])
+        if_block = (yield self.block_expr(['ELSE', 'ENDIF']))
 
         # Check if there's an 'else' block
         if self.current_token.type == TokenType.KEYWORD and self.current_token.name == 'ELSE':
             self.advance()  # Skip 'ELSE'
-            else_block = self.block_expr(['ENDIF'])
+            else_block = (yield self.block_expr(['ENDIF']))
 
             if self.current_token.type != TokenType.KEYWORD or self.current_token.name != 'ENDIF':
                 raise Exception("Expected 'ENDIF' to close IF statement")
 
             self.advance()  # Skip 'ENDIF'
-            return Node(NodeType.IF_ELSE, nodes=[condition, if_block, else_block])
+            return IfElse(condition, if_block, else_block)
 
         # No 'else' block
         if self.current_token.type != TokenType.KEYWORD or self.current_token.name != 'ENDIF':
             raise Exception("Expected 'ENDIF' to close IF statement")
 
         self.advance()  # Skip 'ENDIF'
-        return Node(NodeType.IF, nodes=[condition, if_block])
+        return If(condition, if_block)
 
     def for_expr(self):
         """Handle for loops: FOR var = start TO end (STEP step) block NEXT var"""
         self.advance()  # Skip 'FOR'
 
+        # EACH is read as a keyword only before the loop variable, so FOR each <- 1 TO 3 still works
+        following = self.cursor_pos + 1
+        if (is_word(self.current_token, 'EACH') and following < len(self.tokens) and
+                self.tokens[following].type == TokenType.IDENTIFIER):
+            return (yield self.for_each_expr())
+
         if self.current_token.type != TokenType.IDENTIFIER:
             raise Exception("Expected variable name after FOR")
 
@@ -471,22 +628,22 @@ class Parser:
             raise Exception("Expected '=' after variable in FOR loop")
 
         self.advance()  # Skip '='
-        start_value = self.expr()
+        start_value = (yield self.expr())
 
         if self.current_token.type != TokenType.KEYWORD or self.current_token.name != 'TO':
             raise Exception("Expected 'TO' in FOR loop")
 
         self.advance()  # Skip 'TO'
-        end_value = self.expr()
+        end_value = (yield self.expr())
 
         # Check for optional STEP
-        step_value = Node(NodeType.NUMBER, value=1.0)  # Default step is 1
+        step_value = NumberLiteral(1.0)  # Default step is 1
         if self.current_token.type == TokenType.KEYWORD and self.current_token.name == 'STEP':
             self.advance()  # Skip 'STEP'
-            step_value = self.expr()
+            step_value = (yield self.expr())
 
         # Parse loop body
-        body = self.block_expr(['NEXT'])
+        body = (yield self.block_expr(['NEXT']))
 
         if self.current_token.type != TokenType.KEYWORD or self.current_token.name != 'NEXT':
             raise Exception("Expected 'NEXT' to close FOR loop")
@@ -498,13 +655,43 @@ class Parser:
 
         self.advance()  # Skip variable name
 
-        # Create for node: (var_name, start, end, step, body)
-        return Node(NodeType.FOR, name=var_name, nodes=[start_value, end_value, step_value, body])
+        return For(var_name, start_value, end_value, step_value, body)
+
+    def for_each_expr(self):
+        """Handle for-each loops: FOR EACH var IN collection block NEXT var"""
+        self.advance()  # Skip 'EACH'
+
+        if self.current_token.type != TokenType.IDENTIFIER:
+            raise Exception("Expected variable name after FOR EACH")
+
+        var_name = self.current_token.name
+        self.advance()  # Skip variable name
+
+        if not is_word(self.current_token, 'IN'):
+            raise Exception("Expected 'IN' after variable in FOR EACH loop")
+
+        self.advance()  # Skip 'IN'
+        iterable = (yield self.expr(allow_assignment=False))
+
+        # Parse loop body
+        body = (yield self.block_expr(['NEXT']))
+
+        if self.current_token.type != TokenType.KEYWORD or self.current_token.name != 'NEXT':
+            raise Exception("Expected 'NEXT' to close FOR EACH loop")
+
+        self.advance()  # Skip 'NEXT'
+
+        if self.current_token.type != TokenType.IDENTIFIER or self.current_token.name != var_name:
+            raise Exception(f"Expected variable name '{var_name}' after NEXT")
+
+        self.advance()  # Skip variable name
+
+        return ForEach(var_name, iterable, body)
 
     def while_expr(self):
         """Handle while loops: WHILE condition DO block ENDWHILE"""
         self.advance()  # Skip 'WHILE'
-        condition = self.expr(allow_assignment=False)  # Don't allow assignments in conditions
+        condition = (yield self.expr(allow_assignment=False))  # Don't allow assignments in conditions
 
         if self.current_token.type != TokenType.KEYWORD or self.current_token.name != 'DO':
             raise Exception("Expected 'DO' after WHILE condition")
@@ -512,14 +699,14 @@ class Parser:
         self.advance()  # Skip 'DO'
 
         # Parse loop body
-        body = self.block_expr(['ENDWHILE'])
+        body = (yield self.block_expr(['ENDWHILE']))
 
         if self.current_token.type != TokenType.KEYWORD or self.current_token.name != 'ENDWHILE':
             raise Exception("Expected 'ENDWHILE' to close WHILE loop")
 
         self.advance()  # Skip 'ENDWHILE'
 
-        return Node(NodeType.WHILE, nodes=[condition, body])
+        return While(condition, body)
 
     def def_expr(self):
         """Handle function definitions: DEF/FUNCTION/PROCEDURE name(args) DO block RETURN expr ENDEF/ENDFUNCTION/ENDPROCEDURE"""
@@ -537,10 +724,10 @@ class Parser:
 
         self.advance()  # Skip '('
 
-        # Parse arguments
-        arg_nodes = []
+        # Parse parameter names
+        params = []
         if self.current_token.type == TokenType.IDENTIFIER:
-            arg_nodes.append(Node(NodeType.ARG, name=self.current_token.name))
+            params.append(self.current_token.name)
             self.advance()
 
             while self.current_token.type == TokenType.COMMA:
@@ -549,7 +736,7 @@ class Parser:
                 if self.current_token.type != TokenType.IDENTIFIER:
                     raise Exception("Expected identifier after ',' in function definition")
 
-                arg_nodes.append(Node(NodeType.ARG, name=self.current_token.name))
+                params.append(self.current_token.name)
                 self.advance()
 
         if self.current_token.type != TokenType.RPAREN:
@@ -582,17 +769,56 @@ class Parser:
             end_keyword = 'ENDEF'
             body_terminators = ['RETURN', 'ENDEF']
 
-        # Parse function body
-        body = self.block_expr(body_terminators)
+        # Put off parsing the body when it has a matching end keyword
+        if self.lazy_functions:
+            end = self.function_end(end_keyword)
+            if end is not None:
+                body = LazyBody(self.tokens[self.cursor_pos:end + 1], self.line_index,
+                                self.max_depth, self.depth, end_keyword, body_terminators)
+                self.cursor_pos = end
+                self.advance()  # Skip end keyword
+                return Def(func_name, params, None, None, lazy_body=body)
+
+        body, return_expr = (yield self.function_body(end_keyword, body_terminators))
+
+        # Construct function definition node
+        return Def(func_name, params, body, return_expr)
+
+    def function_end(self, end_keyword):
+        """Index of the keyword closing the function body that starts at the current token.
+
+        Only counts function definitions nested in the body, without parsing
+        it. Returns None if the body is not closed by end_keyword.
+        """
+        depth = 0
+        for index in range(self.cursor_pos, len(self.tokens)):
+            token = self.tokens[index]
+            if token.type == TokenType.KEYWORD:
+                if token.name in FUNCTION_OPENERS:
+                    depth += 1
+                elif token.name in FUNCTION_CLOSERS:
+                    if depth == 0:
+                        return index if token.name == end_keyword else None
+                    depth -= 1
+        return None
+
+    def function_body(self, end_keyword, body_terminators):
+        """Handle a function body up to and including its end keyword.
+
+        Returns the body block and the return expression.
+        """
+        body = (yield self.block_expr(body_terminators))
 
         # Default return value (if no explicit return)
-        return_expr = Node(NodeType.NULL)
+        return_expr = Null()
 
         # Handle the return statement if present
         if self.current_token.type == TokenType.KEYWORD and self.current_token.name == 'RETURN':
+            pos = self.current_token.pos
             self.advance()  # Skip 'RETURN'
-            # Parse return expression
-            return_expr = self.expr()
+            # Parse return expression, recording where the RETURN starts like a statement
+            return_expr = (yield self.expr())
+            return_expr.pos = pos
 
             # Check for end keyword after RETURN
             self.sep_expr()  # Skip any separators
@@ -604,10 +830,7 @@ class Parser:
             raise Exception(f"Expected '{end_keyword}' to close function definition")
 
         self.advance()  # Skip end keyword
-
-        # Construct function definition node
-        args_node = Node(NodeType.ARGS, nodes=arg_nodes)
-        return Node(NodeType.DEF, name=func_name, nodes=[args_node, body, return_expr])
+        return body, return_expr
 
     def builtin_expr(self):
         """Handle built-in functions: PRINT/INPUT/read expr"""
@@ -625,7 +848,7 @@ class Parser:
             (self.current_token.type == TokenType.KEYWORD and
              self.current_token.name in ['ELSE', 'ENDIF', 'NEXT', 'ENDWHILE'])
         ):
-            return Node(NodeType.PRINT, nodes=[])
+            return Print([])
 
         # Handle INPUT specifically - it should take an identifier
         if func_type == 'INPUT':
@@ -634,19 +857,19 @@ class Parser:
 
             var_name = self.current_token.name
             self.advance()  # Skip identifier
-            return Node(NodeType.INPUT, name=var_name)
+            return Input(var_name)
 
         # For PRINT and read, we need expressions
-        args.append(self.expr())
+        args.append((yield self.expr()))
 
         while self.current_token.type == TokenType.COMMA:
             self.advance()  # Skip ','
-            args.append(self.expr())
+            args.append((yield self.expr()))
 
         if func_type == 'PRINT':
-            return Node(NodeType.PRINT, nodes=args)
+            return Print(args)
         elif func_type == 'read':
-            return Node(NodeType.READ, nodes=args)
+            return Read(args)
 
     def include_expr(self):
         """Handle include statements: INCLUDE "filename" """
@@ -657,21 +880,22 @@ class Parser:
         filename = self.current_token.name
         self.advance()  # Skip string literal
 
-        return Node(NodeType.INCLUDE, name=filename)
+        return Include(filename)
 
     def return_expr(self):
         """Handle standalone return statements: RETURN expr"""
         self.advance()  # Skip 'RETURN'
 
         # Parse return expression
-        return_value = self.expr()
+        return_value = (yield self.expr())
 
-        return Node(NodeType.RETURN, nodes=[return_value])
+        return Return(return_value)
 
     def block_expr(self, terminators):
         """Parse a block of code until one of the terminator keywords is reached"""
         # Skip any separators
         self.sep_expr()
+        self.enter()
 
         statements = []
 
@@ -679,10 +903,11 @@ class Parser:
                not (self.current_token.type == TokenType.KEYWORD and
                    self.current_token.name in terminators)):
 
-            statements.append(self.expr())
+            statements.append((yield self.statement()))
             self.sep_expr()  # Skip any separators between statements
 
-        return Node(NodeType.BLOCK, nodes=statements)
+        self.leave()
+        return Block(statements)
 
     def sep_expr(self):
         """Skip any separator tokens (semicolons, newlines)"""
@@ -707,6 +932,7 @@ class Parser:
 
         var_name = self.current_token.name
         self.advance()  # Skip identifier
+        self.enter()
 
         # Parse case items
         case_items = []
@@ -726,20 +952,20 @@ class Parser:
                 while not (self.current_token.type == TokenType.KEYWORD and
                           (self.current_token.name == 'ENDCASE' or
                            self.current_token.name in ['OTHERWISE'])):
-                    otherwise_body.append(self.expr())
+                    otherwise_body.append((yield self.statement()))
                     self.sep_expr()  # Skip any separators
 
-                otherwise_node = Node(NodeType.CASE_OTHERWISE, nodes=otherwise_body)
+                otherwise_node = CaseOtherwise(otherwise_body)
                 continue
 
             # Parse the case value
-            value_expr = self.expr()
+            value_expr = (yield self.expr())
 
             # Check for TO range syntax
             range_end = None
             if self.current_token.type == TokenType.KEYWORD and self.current_token.name == 'TO':
                 self.advance()  # Skip 'TO'
-                range_end = self.expr()
+                range_end = (yield self.expr())
 
             if self.current_token.type != TokenType.COLON:
                 raise Exception("Expected ':' after case value")
@@ -754,34 +980,26 @@ class Parser:
                   not (self.current_token.type == TokenType.NUMBER) and \
                   not (self.current_token.type == TokenType.STRING) and \
                   self.current_token.type != TokenType.EOF:
-                case_body.append(self.expr())
+                case_body.append((yield self.statement()))
                 self.sep_expr()  # Skip any separators
 
-            # Create case item node
-            if range_end:
-                # This is a range case: value1 TO value2
-                case_items.append(Node(NodeType.CASE_ITEM, nodes=[value_expr, range_end] + case_body))
-            else:
-                # Regular case: value
-                case_items.append(Node(NodeType.CASE_ITEM, nodes=[value_expr] + case_body))
+            # Create case item node; range_end is None unless this is a range case: value1 TO value2
+            case_items.append(CaseItem(value_expr, range_end, case_body))
 
         if self.current_token.type != TokenType.KEYWORD or self.current_token.name != 'ENDCASE':
             raise Exception("Expected 'ENDCASE' to close CASE statement")
 
         self.advance()  # Skip 'ENDCASE'
+        self.leave()
 
-        # If we have an otherwise node, add it to the case items
-        if otherwise_node:
-            case_items.append(otherwise_node)
-
-        return Node(NodeType.CASE, name=var_name, nodes=case_items)
+        return Case(var_name, case_items, otherwise_node)
 
     def repeat_until_expr(self):
         """Handle REPEAT-UNTIL loops: REPEAT statements UNTIL condition"""
         self.advance()  # Skip 'REPEAT'
 
         # Parse the loop body
-        body = self.block_expr(['UNTIL'])
+        body = (yield self.block_expr(['UNTIL']))
 
         if self.current_token.type != TokenType.KEYWORD or self.current_token.name != 'UNTIL':
             raise Exception("Expected 'UNTIL' after REPEAT block")
@@ -789,6 +1007,6 @@ class Parser:
         self.advance()  # Skip 'UNTIL'
 
         # Parse the condition
-        condition = self.expr()
+        condition = (yield self.expr())
 
-        return Node(NodeType.REPEAT_UNTIL, nodes=[body, condition])
\ No newline at end of file
+        return RepeatUntil(body, condition)
\ No newline at end of file
@@ -0,0 +1,186 @@
+import os
+import time
+
+from .interpreter import Interpreter, parsed_includes
+from .values import Variable
+
+PROGRAM = "<program>"  # File name shown for the lines of the program itself
+
+def source_name(line_index, program_index):
+    """File name of the source a LineIndex belongs to: PROGRAM for program_index, else an INCLUDE file's"""
+    if line_index is program_index:
+        return PROGRAM
+    for path, (source, ast, index) in parsed_includes.items():
+        if index is line_index:
+            return os.path.basename(path)
+    return "?"
+
+# Interpreter that records where a program spends its time
+class ProfilingInterpreter(Interpreter):
+    """Interpreter that counts and times every statement and user function call.
+
+    Profiling overrides visit, visit_block, visit_case_body and visit_function_call
+    instead of checking a flag in Interpreter, so runs that are not
+    profiled pay nothing for it. Total time includes nested statements or
+    calls; own time leaves them out. Recursive calls add to the total time
+    of a function or statement only once, at the outermost one.
+    """
+
+    def __init__(self, symbol_table=None, output=None):
+        super().__init__(symbol_table, output)
+        self.reset()
+
+    def reset(self):
+        """Forget the data of the last run"""
+        self.statement_times = {}  # (LineIndex, offset) -> [hits, total seconds, own seconds]
+        self.function_times = {}   # name -> [calls, total seconds, own seconds]
+        self.definitions = {}      # name -> (LineIndex, offset) of its DEF
+        self.active_calls = {}     # name -> calls of it now running
+        self.active_statements = {}  # (LineIndex, offset) -> runs of it now in progress
+        self.nested_statements = [0.0]  # Per running statement, the time of the statements it ran
+        self.nested_calls = [0.0]       # Per running call, the time of the calls it made
+        self.program_index = None
+        self.seconds = 0.0
+
+    def interpret(self, node, line_index=None):
+        self.reset()
+        self.program_index = line_index
+        start = time.perf_counter()
+        try:
+            return super().interpret(node, line_index)
+        finally:
+            self.seconds = time.perf_counter() - start
+
+    def visit(self, node):
+        # The closing RETURN of a function is an expression, not a statement in its
+        # body, but the parser gives it a position so it is measured like one
+        if node.pos is not None:
+            return self.visit_measured(node)
+        return super().visit(node)
+
+    def visit_block(self, node):
+        """Visit a block of code, measuring each statement"""
+        last_value = Variable()
+        frame = self.frames[-1]
+
+        for statement in node.statements:
+            last_value = None  # Not held while the next statement runs, see visit_append_assign
+            frame.pos = statement.pos
+            try:
+                last_value = self.visit_measured(statement)
+            except Exception as e:
+                self.locate_error(e, statement)
+
+            # Check if a return was requested
+            if self.return_value is not None:
+                return self.return_value
+
+        return last_value
+
+    def visit_case_body(self, statements):
+        """Execute the statements of the CASE arm that matched, measuring each one"""
+        last_value = Variable()
+        for statement in statements:
+            last_value = None
+            last_value = self.visit_measured(statement)
+        return last_value
+
+    def visit_measured(self, statement):
+        """Visit a statement and add its hit and time to its line"""
+        nested = self.nested_statements
+        nested.append(0.0)
+        key = (self.line_index, statement.pos)
+        active = self.active_statements
+        active[key] = active.get(key, 0) + 1
+        start = time.perf_counter()
+        try:
+            return Interpreter.visit(self, statement)
+        finally:
+            elapsed = time.perf_counter() - start
+            own = elapsed - nested.pop()
+            nested[-1] += elapsed
+            active[key] -= 1
+            entry = self.statement_times.get(key)
+            if entry is None:
+                entry = self.statement_times[key] = [0, 0.0, 0.0]
+            entry[0] += 1
+            if active[key] == 0:
+                entry[1] += elapsed
+            entry[2] += own
+
+    def visit_def(self, node):
+        self.definitions[node.name] = (self.line_index, node.pos)
+        return super().visit_def(node)
+
+    def visit_function_call(self, node):
+        """Call a function and add the call and its time to the function"""
+        name = node.name
+        nested = self.nested_calls
+        nested.append(0.0)
+        active = self.active_calls
+        active[name] = active.get(name, 0) + 1
+        start = time.perf_counter()
+        try:
+            return super().visit_function_call(node)
+        finally:
+            elapsed = time.perf_counter() - start
+            own = elapsed - nested.pop()
+            nested[-1] += elapsed
+            active[name] -= 1
+            if name in self.definitions:
+                entry = self.function_times.get(name)
+                if entry is None:
+                    entry = self.function_times[name] = [0, 0.0, 0.0]
+                entry[0] += 1
+                if active[name] == 0:
+                    entry[1] += elapsed
+                entry[2] += own
+
+    def source_name(self, line_index):
+        """File name of the source a LineIndex belongs to"""
+        return source_name(line_index, self.program_index)
+
+    def functions(self):
+        """Per user function: name, calls, total and own seconds, and where it is defined; by own time"""
+        rows = []
+        for name, (calls, total, own) in self.function_times.items():
+            line_index, pos = self.definitions[name]
+            line = line_index.line_col(pos)[0] if line_index is not None and pos is not None else None
+            rows.append({'function': name, 'calls': calls, 'total': total, 'own': own,
+                         'file': self.source_name(line_index), 'line': line})
+        rows.sort(key=lambda row: row['own'], reverse=True)
+        return rows
+
+    def lines(self):
+        """Per source line: file, line, hits, total and own seconds, and its text; by own time"""
+        by_line = {}
+        for (line_index, pos), (hits, total, own) in self.statement_times.items():
+            if line_index is None or pos is None:
+                continue
+            line = line_index.line_col(pos)[0]
+            key = (self.source_name(line_index), line)
+            row = by_line.get(key)
+            if row is None:
+                text = line_index.code.split('\n', line)[line - 1].strip()
+                row = by_line[key] = {'file': key[0], 'line': line, 'hits': 0, 'total': 0.0, 'own': 0.0,
+                                      'text': text}
+            row['hits'] += hits
+            row['total'] += total
+            row['own'] += own
+        rows = list(by_line.values())
+        rows.sort(key=lambda row: row['own'], reverse=True)
+        return rows
+
+    def report(self, limit=15):
+        """The hottest functions and lines of the last run, as text"""
+        out = [f"Profile: {self.seconds * 1000:.1f} ms in total", "",
+               f"{'function':<20} {'calls':>8} {'total ms':>10} {'own ms':>10}  defined at"]
+        for row in self.functions()[:limit]:
+            where = f"{row['file']}:{row['line']}" if row['line'] is not None else row['file']
+            out.append(f"{row['function']:<20} {row['calls']:>8} {row['total'] * 1000:>10.2f} "
+                       f"{row['own'] * 1000:>10.2f}  {where}")
+        out += ["", f"{'line':<20} {'hits':>8} {'total ms':>10} {'own ms':>10}  source"]
+        for row in self.lines()[:limit]:
+            out.append(f"{row['file'] + ':' + str(row['line']):<20} {row['hits']:>8} "
+                       f"{row['total'] * 1000:>10.2f} {row['own'] * 1000:>10.2f}  {row['text'][:50]}")
+        return "\n".join(out) + "\n"
@@ -0,0 +1,131 @@
+import json
+import threading
+import time
+
+from .profiler import PROGRAM, source_name
+
+# Sampling profiler, for flamegraphs of whole runs
+class SamplingProfiler:
+    """Take samples of the pseudocode call stack of a running Interpreter.
+
+    A background thread wakes every interval seconds and reads the calls
+    the interpreter is in with Interpreter.running_frames(), so the run
+    itself does no extra work beyond keeping Interpreter.frames.
+    Python switches threads every sys.getswitchinterval() seconds (5 ms by
+    default), so samples come no more often than that while a program runs.
+
+    Each sample is weighted by the time since the one before. Export them
+    with collapsed() for flamegraph.pl and similar tools, or speedscope()
+    for https://www.speedscope.app.
+    """
+
+    def __init__(self, interpreter, interval=0.005):
+        self.interpreter = interpreter
+        self.interval = interval
+        self.samples = []  # (stack, seconds) in time order; a stack is ((name, LineIndex, offset), ...)
+        self.seconds = 0.0
+        self.thread = None
+        self.stopping = threading.Event()
+
+    def start(self):
+        """Start sampling the interpreter"""
+        self.samples = []
+        self.stopping.clear()
+        self.thread = threading.Thread(target=self.sample_loop, name="pseudocode-sampler", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Stop sampling and wait for the sampling thread to finish"""
+        if self.thread is not None:
+            self.stopping.set()
+            self.thread.join()
+            self.thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def sample_loop(self):
+        """Body of the sampling thread"""
+        start = last = time.perf_counter()
+        while not self.stopping.wait(self.interval):
+            now = time.perf_counter()
+            stack = tuple(self.interpreter.running_frames())
+            if len(stack) > 1 or stack[0][2] is not None:  # Not idle, lexing or parsing
+                self.samples.append((stack, now - last))
+            last = now
+        self.seconds = time.perf_counter() - start
+
+    def stacks(self, lines=True):
+        """[(frame names, seconds)] of the samples in time order, outermost frame first.
+
+        A frame is named after its function, or PROGRAM, with the line it is
+        running when lines is true, e.g. "fib (line 5)" or "twice (lib:5)".
+        """
+        names = {}  # (name, LineIndex, offset) -> frame name
+        program_index = self.samples[0][0][0][1] if self.samples else None
+        result = []
+        for stack, seconds in self.samples:
+            frames = []
+            for frame in stack:
+                frame_name = names.get(frame)
+                if frame_name is None:
+                    frame_name = names[frame] = self.frame_name(frame, program_index, lines)
+                frames.append(frame_name)
+            result.append((tuple(frames), seconds))
+        return result
+
+    def frame_name(self, frame, program_index, lines):
+        name, line_index, pos = frame
+        if name is None:
+            name = PROGRAM
+        if not lines or line_index is None or pos is None:
+            return name
+        line = line_index.line_col(pos)[0]
+        file = source_name(line_index, program_index)
+        return f"{name} (line {line})" if file == PROGRAM else f"{name} ({file}:{line})"
+
+    def collapsed(self, lines=True):
+        """Collapsed stacks, one "frame;frame;frame count" line per distinct stack"""
+        counts = {}
+        for frames, seconds in self.stacks(lines):
+            key = ";".join(frame.replace(";", ",") for frame in frames)
+            counts[key] = counts.get(key, 0) + 1
+        return "".join(f"{key} {count}\n" for key, count in counts.items())
+
+    def speedscope(self, name="pseudocode", lines=True):
+        """The samples as a speedscope sampled profile, a dict encodable as JSON"""
+        frames = []
+        indexes = {}  # frame name -> index in frames
+        samples = []
+        weights = []
+        for stack, seconds in self.stacks(lines):
+            sample = []
+            for frame in stack:
+                index = indexes.get(frame)
+                if index is None:
+                    index = indexes[frame] = len(frames)
+                    frames.append({'name': frame})
+                sample.append(index)
+            samples.append(sample)
+            weights.append(seconds)
+        return {
+            '$schema': "https://www.speedscope.app/file-format-schema.json",
+            'shared': {'frames': frames},
+            'profiles': [{'type': 'sampled', 'name': name, 'unit': 'seconds', 'startValue': 0,
+                          'endValue': sum(weights), 'samples': samples, 'weights': weights}],
+            'name': name,
+            'activeProfileIndex': 0,
+            'exporter': "pseudocode_interpreter",
+        }
+
+    def write(self, path, name="pseudocode", lines=True):
+        """Write the samples to path: speedscope JSON if it ends in .json, else collapsed stacks"""
+        with open(path, 'w', encoding='utf-8') as file:
+            if path.endswith('.json'):
+                json.dump(self.speedscope(name, lines), file)
+            else:
+                file.write(self.collapsed(lines))
@@ -0,0 +1,212 @@
+import os
+import signal
+import threading
+import time
+import multiprocessing
+
+try:
+    import resource
+except ImportError:  # Not available on Windows, where runs are not limited
+    resource = None
+
+from .errors import ProgramStopped
+
+# Programs run in child processes; 'spawn' is safe even when the parent runs Qt threads
+CONTEXT = multiprocessing.get_context('spawn')
+
+def set_limits(cpu_seconds, memory_bytes):
+    """Limit the CPU time and the memory the rest of this process may use"""
+    if resource is None:
+        return
+    if cpu_seconds is not None:
+        used = int(time.process_time()) + 1
+        resource.setrlimit(resource.RLIMIT_CPU, (used + cpu_seconds, used + cpu_seconds + 1))
+    if memory_bytes is not None:
+        resource.setrlimit(resource.RLIMIT_AS, (address_space() + memory_bytes, resource.RLIM_INFINITY))
+
+def address_space():
+    """Bytes of address space this process uses now, or 0 where that is not known"""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[0]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return 0
+
+def _cpu_limit_exceeded(signum, frame):
+    raise Exception("CPU time limit exceeded")
+
+def _error_message(error):
+    """Message for an error raised by a program, naming the resource limit it hit"""
+    cause = error
+    while cause is not None:
+        if isinstance(cause, MemoryError):
+            return "Memory limit exceeded"
+        cause = cause.__cause__
+    return str(error)
+
+def _serve(conn, cpu_seconds, memory_bytes):
+    """Child process: warm up, wait for one program, run it and report back"""
+    from .interpreter import Interpreter, preload_stdlib
+    from .lexer import Lexer
+    from .parser import Parser
+    from .output import CallbackSink
+    from .values import Variable
+
+    # Warm up before the program arrives: imports done, stdlib parsed
+    preload_stdlib()
+    interpreter = Interpreter(output=CallbackSink(lambda text: conn.send(("output", text)),
+                                                  batch_lines=1000, interval=0.05))
+
+    def read_input(node):
+        """INPUT: ask the parent for a value and wait for the answer"""
+        interpreter.output.flush()
+        conn.send(("input", node.name))
+        result = conn.recv()
+        if result is None:
+            raise Exception(f"No input left for INPUT {node.name}")
+        try:
+            value = Variable(float(result))
+        except ValueError:
+            value = Variable(result)
+        interpreter.current_symbol_table.set(node.name, value)
+        return value
+
+    interpreter.visit_input = read_input
+
+    try:
+        code, cwd = conn.recv()
+    except EOFError:
+        return  # The pool was closed before this process was used
+    interpreter.cwd = cwd
+    if hasattr(signal, 'SIGXCPU'):
+        signal.signal(signal.SIGXCPU, _cpu_limit_exceeded)
+    set_limits(cpu_seconds, memory_bytes)
+
+    try:
+        lexer = Lexer(code)
+        ast = Parser(lexer.generate_tokens(), lexer.line_index).parse()
+        result = interpreter.interpret(ast, lexer.line_index)
+        conn.send(("done", str(result)))
+    except BaseException as e:
+        conn.send(("error", _error_message(e)))
+    finally:
+        conn.close()
+
+# One program running in a sandbox process
+class SandboxRun:
+    def __init__(self, process, conn):
+        self.process = process
+        self.conn = conn
+        self.killed = False
+
+    def wait(self, on_output=None, on_input=None):
+        """Relay the program's output and INPUT requests until it ends, and return its result.
+
+        on_output(text) receives batches of output and on_input(name) must
+        return the text entered for an INPUT variable, or None to make the
+        INPUT fail because no input is left. A program that fails
+        raises Exception with its error message, and one that was killed
+        raises ProgramStopped.
+        """
+        try:
+            while True:
+                try:
+                    kind, value = self.conn.recv()
+                except (EOFError, OSError):
+                    self.process.join()
+                    if self.killed:
+                        raise ProgramStopped("Program stopped")
+                    raise Exception(self.crash_message())
+
+                if kind == "output":
+                    if on_output is not None:
+                        on_output(value)
+                elif kind == "input":
+                    self.conn.send(on_input(value) if on_input is not None else "")
+                elif kind == "done":
+                    return value
+                elif kind == "error":
+                    if self.killed:
+                        raise ProgramStopped("Program stopped")
+                    raise Exception(value)
+        finally:
+            # The process exits by itself; multiprocessing reaps it when the next one starts
+            self.conn.close()
+
+    def crash_message(self):
+        """Why the process ended without reporting back"""
+        code = self.process.exitcode
+        if code is not None and code < 0:
+            if hasattr(signal, 'SIGXCPU') and -code in (signal.SIGXCPU, signal.SIGKILL):
+                return "CPU time limit exceeded"
+            return f"Program crashed ({signal.Signals(-code).name})"
+        return f"Program crashed (exit code {code})"
+
+    def kill(self):
+        """Stop the program at once by killing its process"""
+        self.killed = True
+        if self.process.is_alive():
+            self.process.kill()
+
+# Pool of warm sandbox processes
+class SandboxPool:
+    """Run programs in child processes with limited CPU time and memory.
+
+    Each program gets a fresh process, so nothing it does can affect the
+    caller or later runs. size processes are started ahead of time and
+    warmed up, with the stdlib parsed, so a run starts without waiting; each
+    one taken is replaced straight away. start() and close() may be called
+    from several threads.
+    """
+
+    def __init__(self, size=2, cpu_seconds=10, memory_mb=512):
+        self.size = size
+        self.cpu_seconds = cpu_seconds
+        self.memory_bytes = memory_mb * 2**20 if memory_mb is not None else None
+        self.idle = []  # (process, connection) of warm processes waiting for a program
+        self.lock = threading.Lock()
+        self.fill()
+
+    def spawn(self):
+        """Start a sandbox process and return it with the parent's end of its connection"""
+        conn, child_conn = CONTEXT.Pipe()
+        process = CONTEXT.Process(target=_serve, args=(child_conn, self.cpu_seconds, self.memory_bytes),
+                                  daemon=True)
+        process.start()
+        child_conn.close()
+        return process, conn
+
+    def fill(self):
+        """Start processes until size of them are waiting"""
+        self.idle = [(process, conn) for process, conn in self.idle if process.is_alive()]
+        while len(self.idle) < self.size:
+            self.idle.append(self.spawn())
+
+    def start(self, code, cwd=""):
+        """Start running code in a warm process and return its SandboxRun"""
+        with self.lock:
+            process, conn = None, None
+            while self.idle and process is None:
+                process, conn = self.idle.pop(0)
+                if not process.is_alive():
+                    conn.close()
+                    process = None
+            if process is None:
+                process, conn = self.spawn()
+            conn.send((code, cwd))
+            self.fill()
+        return SandboxRun(process, conn)
+
+    def run(self, code, cwd="", on_output=None, on_input=None):
+        """Run code and wait for its result; see SandboxRun.wait"""
+        return self.start(code, cwd).wait(on_output, on_input)
+
+    def close(self):
+        """Stop the waiting processes"""
+        with self.lock:
+            for process, conn in self.idle:
+                conn.close()
+                process.join(1)
+                if process.is_alive():
+                    process.kill()
+            self.idle = []
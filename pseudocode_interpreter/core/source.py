@@ -0,0 +1,31 @@
+from bisect import bisect_right
+
+# Maps character offsets in a piece of source code to line/column positions
+class LineIndex:
+    def __init__(self, code: str):
+        self.code = code
+        self._line_starts = None  # Built on first lookup
+
+    def line_starts(self):
+        """Return the offsets at which each line starts, building the table on first use"""
+        if self._line_starts is None:
+            starts = [0]
+            find = self.code.find
+            pos = find('\n')
+            while pos != -1:
+                starts.append(pos + 1)
+                pos = find('\n', pos + 1)
+            self._line_starts = starts
+
+        return self._line_starts
+
+    def line_col(self, offset):
+        """Convert a character offset into a 1-based (line, column) pair"""
+        starts = self.line_starts()
+        line = bisect_right(starts, offset)
+        return line, offset - starts[line - 1] + 1
+
+    def location(self, offset):
+        """Format a character offset as 'line:col'"""
+        line, col = self.line_col(offset)
+        return f"{line}:{col}"
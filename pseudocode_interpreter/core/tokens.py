@@ -24,6 +24,8 @@ class TokenType(Enum):
     STRING = auto()
     LSQBRACKET = auto()
     RSQBRACKET = auto()
+    LBRACE = auto()  # { opening a map literal
+    RBRACE = auto()
     SEP = auto()  # Block separator - semicolon
     NL = auto()   # Newline - separate instructions
     CASE = auto()
@@ -34,10 +36,14 @@ class TokenType(Enum):
 
 # Token class
 class Token:
-    def __init__(self, type_: TokenType, value=None, name=None):
+    # Tokens are created in bulk, so keep them free of a per-instance __dict__
+    __slots__ = ('type', 'value', 'name', 'pos')
+
+    def __init__(self, type_: TokenType, value=None, name=None, pos=None):
         self.type = type_
         self.value = value
         self.name = name
+        self.pos = pos  # Offset of the token's first character in the source
 
     def __repr__(self):
         if self.value is not None:
@@ -1,3 +1,5 @@
+from collections import deque
+
 # Value Classes for the Interpreter
 class Number:
     def __init__(self, value: float = 0.0):
@@ -28,6 +30,23 @@ class String:
             return self.value == other.value
         return False
 
+class StringBuilder(String):
+    """A String that s <- s + text appends to, joining its chunks only when its value is read"""
+
+    @property
+    def value(self):
+        chunks = self.chunks
+        if len(chunks) > 1:
+            chunks[:] = ["".join(chunks)]
+        return chunks[0]
+
+    @value.setter
+    def value(self, value):
+        self.chunks = [value]
+
+    def append(self, text):
+        self.chunks.append(text)
+
 class List:
     def __init__(self, values=None):
         self.values = values or []
@@ -45,12 +64,82 @@ class List:
             return True
         return False
 
+def value_key(variable, what):
+    """The dict key of a number or string Variable, its float or str; what names it in the error"""
+    if variable.type == "number" or variable.type == "string":
+        return variable.value.value
+    raise Exception(f"{what} must be numbers or strings, not {variable.type}s")
+
+class Map:
+    def __init__(self, entries=None):
+        self.entries = entries or {}  # Key -> Variable; see key()
+
+    @staticmethod
+    def key(variable):
+        """The dict key of a number or string Variable: its float or str"""
+        return value_key(variable, "Map keys")
+
+    def __repr__(self):
+        items = (f"{key if isinstance(key, str) else Number(key)}: {value}" for key, value in self.entries.items())
+        return f"{{{', '.join(items)}}}"
+
+    def __eq__(self, other):
+        if isinstance(other, Map):
+            return self.entries == other.entries
+        return False
+
+class Set:
+    def __init__(self, elements=None):
+        # Key -> None: a dict rather than a set, so elements keep the order they were
+        # added in, and PRINT and FOR EACH do not depend on string hashing
+        self.elements = elements or {}
+
+    @staticmethod
+    def key(variable):
+        """The dict key of a number or string Variable: its float or str"""
+        return value_key(variable, "Set elements")
+
+    def __repr__(self):
+        items = (element if isinstance(element, str) else str(Number(element)) for element in self.elements)
+        return f"{{{', '.join(items)}}}"
+
+    def __eq__(self, other):
+        if isinstance(other, Set):
+            return self.elements.keys() == other.elements.keys()
+        return False
+
+class Stack:
+    def __init__(self, items=None):
+        self.items = items if items is not None else deque()  # Variables, bottom to top
+
+    def __repr__(self):
+        return f"STACK[{', '.join(str(item) for item in self.items)}]"
+
+    def __eq__(self, other):
+        if isinstance(other, Stack):
+            return self.items == other.items
+        return False
+
+class Queue:
+    def __init__(self, items=None):
+        self.items = items if items is not None else deque()  # Variables, front to back
+
+    def __repr__(self):
+        return f"QUEUE[{', '.join(str(item) for item in self.items)}]"
+
+    def __eq__(self, other):
+        if isinstance(other, Queue):
+            return self.items == other.items
+        return False
+
 class Function:
-    def __init__(self, name="", args_node=None, body_node=None, return_node=None):
+    def __init__(self, name="", params=None, body_node=None, return_node=None):
         self.name = name
-        self.args_node = args_node
+        self.params = params  # Parameter names
         self.body_node = body_node
         self.return_node = return_node
+        self.line_index = None  # Source the body was parsed from, for error positions
+        self.lazy_body = None   # LazyBody to parse body_node and return_node from on first call
 
     def __repr__(self):
         return f"<function {self.name}>"
@@ -112,6 +201,14 @@ class Variable:
             return "string"
         elif isinstance(value, List):
             return "list"
+        elif isinstance(value, Map):
+            return "map"
+        elif isinstance(value, Set):
+            return "set"
+        elif isinstance(value, Stack):
+            return "stack"
+        elif isinstance(value, Queue):
+            return "queue"
         elif isinstance(value, Function):
             return "function"
         elif isinstance(value, (int, float)):
@@ -167,6 +264,12 @@ class Variable:
                 else:
                     new_values.append(copy_module.deepcopy(item))
             new_var.value = List(new_values)
+        elif self.type == "map":
+            new_var.value = Map({key: value.copy() for key, value in self.value.entries.items()})
+        elif self.type == "set":
+            new_var.value = Set(dict(self.value.elements))
+        elif self.type == "stack" or self.type == "queue":
+            new_var.value = type(self.value)(deque(item.copy() for item in self.value.items))
         elif self.type == "function":
             # Functions are immutable, so we can share the reference
             new_var.value = self.value
@@ -1,6 +1,8 @@
 from PyQt6.QtGui import QSyntaxHighlighter, QTextCharFormat, QFont, QColor
 from PyQt6.QtCore import QRegularExpression
 
+from ..core.interpreter import BUILTIN_FUNCTIONS
+
 # Syntax Highlighter for the code editor
 class PseudocodeHighlighter(QSyntaxHighlighter):
     def __init__(self, parent=None):
@@ -32,7 +34,7 @@ class PseudocodeHighlighter(QSyntaxHighlighter):
         keywords = [
             'IF', 'THEN', 'ELSE', 'ENDIF', 'FOR', 'TO', 'STEP', 'NEXT',
             'WHILE', 'DO', 'ENDWHILE', 'DEF', 'RETURN', 'AND', 'OR', 'NOT',
-            'TRUE', 'FALSE', 'REPEAT', 'UNTIL', 'CASE', 'OF', 'OTHERWISE', 'ENDCASE'
+            'TRUE', 'FALSE', 'REPEAT', 'UNTIL', 'CASE', 'OF', 'OTHERWISE', 'ENDCASE', 'EACH', 'IN'
         ]
         
         # Add keyword rules
@@ -41,7 +43,7 @@ class PseudocodeHighlighter(QSyntaxHighlighter):
             self.highlighting_rules.append((pattern, keyword_format))
             
         # Built-in functions
-        builtins = ['PRINT', 'INPUT', 'read', 'INCLUDE']
+        builtins = ['PRINT', 'INPUT', 'read', 'INCLUDE'] + list(BUILTIN_FUNCTIONS)
         
         # Add builtin rules
         for word in builtins:
@@ -2,12 +2,15 @@ import os
 from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
                            QTextEdit, QPushButton, QFileDialog, QSplitter, 
                            QMenuBar, QMenu, QStatusBar, QDialog, QMessageBox)
-from PyQt6.QtCore import Qt
-from PyQt6.QtGui import QFont, QAction, QKeySequence
+from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtGui import QFont, QAction, QKeySequence, QTextCharFormat, QTextCursor, QColor
 
-from ..core import Lexer, Parser, Interpreter, Variable
+from ..core import Interpreter, ProfilingInterpreter, MemoryProfilingInterpreter
+from ..core.incremental import IncrementalParser
 from .highlighter import PseudocodeHighlighter
 from .dialogs import InputDialog
+from .worker import RunWorker, SandboxWorker
+from ..core.sandbox import SandboxPool
 from .settings_dialog import SettingsManager, SettingsDialog
 
 # Main Application Window
@@ -29,6 +32,9 @@ class PseudocodeIDE(QMainWindow):
         # Create interpreter
         self.interpreter = Interpreter()
         self.interpreter.cwd = self.cwd
+        self.worker = None        # RunWorker of the running program
+        self.sandbox_pool = None  # SandboxPool while programs run in sandbox processes
+        self.profiler = None      # ProfilingInterpreter of a Profile or Profile Memory run
         
         # Initialize UI
         self.init_ui()
@@ -57,6 +63,14 @@ class PseudocodeIDE(QMainWindow):
         # Apply syntax highlighting
         self.highlighter = PseudocodeHighlighter(self.code_editor.document())
         
+        # Live syntax checking, re-parsing only the edited statements shortly after typing stops
+        self.front_end = IncrementalParser()
+        self.check_timer = QTimer(self)
+        self.check_timer.setSingleShot(True)
+        self.check_timer.setInterval(250)
+        self.check_timer.timeout.connect(self.check_syntax)
+        self.code_editor.textChanged.connect(self.check_timer.start)
+        
         splitter.addWidget(self.code_editor)
         
         # Output console
@@ -81,6 +95,12 @@ class PseudocodeIDE(QMainWindow):
         self.run_button.clicked.connect(self.run_code)
         button_layout.addWidget(self.run_button)
         
+        # Stop button, enabled while a program runs
+        self.stop_button = QPushButton("Stop")
+        self.stop_button.setEnabled(False)
+        self.stop_button.clicked.connect(self.stop_code)
+        button_layout.addWidget(self.stop_button)
+        
         # Clear output button
         self.clear_button = QPushButton("Clear Output")
         self.clear_button.clicked.connect(self.clear_output)
@@ -179,6 +199,29 @@ class PseudocodeIDE(QMainWindow):
         run_action.triggered.connect(self.run_code)
         run_menu.addAction(run_action)
         
+        # Stop action
+        stop_action = QAction("&Stop", self)
+        stop_action.setShortcut("Shift+F5")
+        stop_action.triggered.connect(self.stop_code)
+        run_menu.addAction(stop_action)
+        
+        # Profile action: run with the profiler and report where the time went
+        profile_action = QAction("&Profile", self)
+        profile_action.setShortcut("Ctrl+F5")
+        profile_action.triggered.connect(self.profile_code)
+        run_menu.addAction(profile_action)
+        
+        # Profile Memory action: run counting the values each line creates
+        memory_action = QAction("Profile &Memory", self)
+        memory_action.triggered.connect(self.profile_memory)
+        run_menu.addAction(memory_action)
+        
+        # Sandbox action: run each program in a separate, resource-limited process
+        sandbox_action = QAction("Run in S&andbox", self)
+        sandbox_action.setCheckable(True)
+        sandbox_action.toggled.connect(self.set_sandbox)
+        run_menu.addAction(sandbox_action)
+        
         # Clear output action
         clear_action = QAction("&Clear Output", self)
         clear_action.triggered.connect(self.clear_output)
@@ -291,8 +334,10 @@ class PseudocodeIDE(QMainWindow):
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"Failed to save file: {str(e)}")
                 
-    def run_code(self):
-        """Execute the code in the editor"""
+    def run_code(self, checked=False, profiler=None):
+        """Execute the code in the editor on a worker thread, with profiler (an interpreter class) if given"""
+        if self.worker is not None:
+            return
         code = self.code_editor.toPlainText()
         
         if not code.strip():
@@ -302,68 +347,137 @@ class PseudocodeIDE(QMainWindow):
         self.status_bar.showMessage("Running code...")
         self.output_console.clear()
         
-        try:
-            # Create a custom version of input function for GUI dialogs
-            original_input = self.interpreter.visit_input
-            
-            def gui_input(node):
-                # Get variable name from node
-                var_name = node.name
-                
-                # Create input dialog
-                dialog = InputDialog("", self)
-                result = ""
-                
-                if dialog.exec() == QDialog.DialogCode.Accepted:
-                    result = dialog.get_input()
-                else:
-                    # User canceled, return empty string
-                    result = ""
-                    
-                # Try to convert to number if possible
-                try:
-                    value = Variable(float(result))
-                except ValueError:
-                    value = Variable(result)
-                    
-                # Store the input value in the variable
-                self.interpreter.current_symbol_table.set(var_name, value)
-                
-                return value
-                    
-            # Replace input function
-            self.interpreter.visit_input = gui_input
-            
-            # Tokenize the code
-            lexer = Lexer(code)
-            tokens = lexer.generate_tokens()
+        # Output arrives in batches while the program runs; INPUT blocks the
+        # worker until the dialog on this thread has been answered
+        if profiler is not None:
+            # Profiling needs the interpreter in this process, even in sandbox mode
+            self.profiler = profiler()
+            self.profiler.cwd = self.cwd
+            self.worker = RunWorker(self.profiler, code, self)
+        elif self.sandbox_pool is not None:
+            self.worker = SandboxWorker(self.sandbox_pool.start(code, self.cwd), self)
+        else:
+            self.interpreter.stop_requested = False
+            self.worker = RunWorker(self.interpreter, code, self)
+        self.worker.output.connect(self.append_output)
+        self.worker.input_requested.connect(self.ask_input, Qt.ConnectionType.BlockingQueuedConnection)
+        self.worker.succeeded.connect(self.run_succeeded)
+        self.worker.failed.connect(self.run_failed)
+        self.worker.stopped.connect(self.run_stopped)
+        self.worker.finished.connect(self.run_finished)
+        
+        self.run_button.setEnabled(False)
+        self.stop_button.setEnabled(True)
+        self.worker.start()
+        
+    def profile_code(self):
+        """Run the code in the editor with the profiler"""
+        self.run_code(profiler=ProfilingInterpreter)
+        
+    def profile_memory(self):
+        """Run the code in the editor with the memory profiler"""
+        self.run_code(profiler=MemoryProfilingInterpreter)
+        
+    def set_sandbox(self, enabled):
+        """Switch between running programs on a thread and in sandbox processes"""
+        if enabled and self.sandbox_pool is None:
+            self.sandbox_pool = SandboxPool()
+            self.status_bar.showMessage("Programs run in a sandbox process")
+        elif not enabled and self.sandbox_pool is not None:
+            self.sandbox_pool.close()
+            self.sandbox_pool = None
+            self.status_bar.showMessage("Programs run in the IDE")
             
-            # Parse the tokens into an AST
-            parser = Parser(tokens)
-            ast = parser.parse()
+    def stop_code(self):
+        """Stop the running program"""
+        if self.worker is not None:
+            self.worker.stop()
+            self.status_bar.showMessage("Stopping...")
             
-            # Execute the AST
-            result = self.interpreter.interpret(ast)
+    def append_output(self, text):
+        """Add a batch of program output to the end of the output console"""
+        self.output_console.moveCursor(QTextCursor.MoveOperation.End)
+        self.output_console.insertPlainText(text)
+        
+    def ask_input(self, var_name):
+        """Show the input dialog for an INPUT statement and hand the answer to the worker"""
+        dialog = InputDialog("", self)
+        if dialog.exec() == QDialog.DialogCode.Accepted:
+            self.worker.input_text = dialog.get_input()
+        else:
+            # User canceled, return empty string
+            self.worker.input_text = ""
             
-            # Display the output
-            if self.interpreter.output_text:
-                self.output_console.insertPlainText(self.interpreter.output_text)
-                
-            # Add the result if it's not empty
-            if result and str(result) != '0.0':
-                self.output_console.insertPlainText(f"\nResult: {result}\n")
-                
-            self.status_bar.showMessage("Code executed successfully")
+    def run_succeeded(self, result):
+        """Show the result of a finished program"""
+        # Add the result if it's not empty
+        if result and str(result) != '0.0':
+            self.append_output(f"\nResult: {result}\n")
             
+        self.status_bar.showMessage("Code executed successfully")
+        
+    def run_failed(self, message):
+        """Show the error that ended the program"""
+        self.append_output(f"Error: {message}\n")
+        self.status_bar.showMessage(f"Error executing code: {message}")
+        
+    def run_stopped(self):
+        """Note that the program was stopped"""
+        self.append_output("\nProgram stopped\n")
+        self.status_bar.showMessage("Program stopped")
+        
+    def run_finished(self):
+        """Re-enable running once the worker thread has ended"""
+        self.worker.deleteLater()
+        self.worker = None
+        if self.profiler is not None:
+            self.append_output("\n" + self.profiler.report())
+            self.profiler = None
+        self.run_button.setEnabled(True)
+        self.stop_button.setEnabled(False)
+        
+    def closeEvent(self, event):
+        """Stop a running program before the window closes"""
+        if self.worker is not None:
+            self.worker.stop()
+            self.worker.wait()
+        if self.sandbox_pool is not None:
+            self.sandbox_pool.close()
+        super().closeEvent(event)
+        
+    def check_syntax(self):
+        """Re-check the edited code and underline lines with syntax errors"""
+        try:
+            self.front_end.update(self.code_editor.toPlainText())
         except Exception as e:
-            self.output_console.insertPlainText(f"Error: {str(e)}\n")
-            self.status_bar.showMessage(f"Error executing code: {str(e)}")
+            # A bug in the front end must not escape the timer; start over on the next edit
+            self.front_end = IncrementalParser()
+            self.code_editor.setExtraSelections([])
+            self.status_bar.showMessage(f"Syntax check failed: {e}")
+            return
+        errors = self.front_end.errors
+        
+        selections = []
+        error_format = QTextCharFormat()
+        error_format.setUnderlineStyle(QTextCharFormat.UnderlineStyle.WaveUnderline)
+        error_format.setUnderlineColor(QColor("#F44747"))
+        for error in errors:
+            if error.line is None:
+                continue
+            block = self.code_editor.document().findBlockByNumber(error.line - 1)
+            cursor = QTextCursor(block)
+            cursor.select(QTextCursor.SelectionType.LineUnderCursor)
+            selection = QTextEdit.ExtraSelection()
+            selection.cursor = cursor
+            selection.format = error_format
+            selections.append(selection)
+        self.code_editor.setExtraSelections(selections)
+        
+        if errors:
+            self.status_bar.showMessage(f"Syntax error: {errors[0]}")
+        elif self.status_bar.currentMessage().startswith("Syntax error"):
+            self.status_bar.showMessage("Ready")
             
-        finally:
-            # Restore original input function
-            if 'original_input' in locals():
-                self.interpreter.visit_input = original_input
-                
     def clear_output(self):
         """Clear the output console"""
         self.output_console.clear()
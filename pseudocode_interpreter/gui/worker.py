@@ -0,0 +1,86 @@
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from ..core import Lexer, Parser, Variable, ProgramStopped
+from ..core.output import CallbackSink
+
+# Worker thread that runs a program while the window stays responsive
+class RunWorker(QThread):
+    output = pyqtSignal(str)           # A batch of PRINT output
+    input_requested = pyqtSignal(str)  # Name of an INPUT variable; the handler sets input_text
+    succeeded = pyqtSignal(object)     # Result of the program
+    failed = pyqtSignal(str)           # Error message
+    stopped = pyqtSignal()
+
+    def __init__(self, interpreter, code, parent=None):
+        super().__init__(parent)
+        self.interpreter = interpreter
+        self.code = code
+        self.input_text = ""
+
+    def run(self):
+        """Lex, parse and run the code, streaming output in batches of at most 50 ms"""
+        interpreter = self.interpreter
+        original_input = interpreter.visit_input
+        original_output = interpreter.output
+        interpreter.visit_input = self.read_input
+        interpreter.output = CallbackSink(self.output.emit, batch_lines=1000, interval=0.05)
+
+        try:
+            lexer = Lexer(self.code)
+            tokens = lexer.generate_tokens()
+            ast = Parser(tokens, lexer.line_index).parse()
+            result = interpreter.interpret(ast, lexer.line_index)
+            self.succeeded.emit(result)
+        except ProgramStopped:
+            self.stopped.emit()
+        except Exception as e:
+            self.failed.emit(str(e))
+        finally:
+            interpreter.visit_input = original_input
+            interpreter.output = original_output
+
+    def read_input(self, node):
+        """INPUT: ask the window for a value and wait for the answer"""
+        self.interpreter.output.flush()  # Show any prompt printed before the INPUT
+        self.input_requested.emit(node.name)
+        result = self.input_text
+
+        # Try to convert to number if possible
+        try:
+            value = Variable(float(result))
+        except ValueError:
+            value = Variable(result)
+
+        # Store the input value in the variable
+        self.interpreter.current_symbol_table.set(node.name, value)
+
+        return value
+
+    def stop(self):
+        """Ask the program to stop at its next loop iteration or function call"""
+        self.interpreter.request_stop()
+
+# Worker thread that relays the output of a program running in a sandbox process
+class SandboxWorker(RunWorker):
+    def __init__(self, sandbox_run, parent=None):
+        super().__init__(None, "", parent)
+        self.sandbox_run = sandbox_run  # SandboxRun of the program, already started
+
+    def run(self):
+        """Relay the program's output and INPUT requests until it ends"""
+        try:
+            result = self.sandbox_run.wait(self.output.emit, self.ask_input)
+            self.succeeded.emit(result)
+        except ProgramStopped:
+            self.stopped.emit()
+        except Exception as e:
+            self.failed.emit(str(e))
+
+    def ask_input(self, var_name):
+        """INPUT in the sandbox: ask the window for a value and wait for the answer"""
+        self.input_requested.emit(var_name)
+        return self.input_text
+
+    def stop(self):
+        """Kill the sandbox process"""
+        self.sandbox_run.kill()
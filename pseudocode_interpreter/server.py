@@ -0,0 +1,168 @@
+"""
+Local grading service: python -m pseudocode_interpreter serve
+
+A small HTTP/JSON server that runs programs in a pool of warm sandbox
+processes. POST /run with {"code": ..., "input": [...]} returns the output,
+the error if any and timings; GET /status returns the server's counters.
+Jobs beyond the worker count wait in a bounded queue, and each job is
+killed once it runs longer than its timeout. With a ResultCache, a job
+seen before is answered from the cache without running it.
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .core.sandbox import SandboxPool
+from .core.errors import ProgramStopped
+from .batch import normalize
+
+MAX_BODY_BYTES = 2**20
+
+# Errors that depend on the machine and its load, not only on the job, so are not cached
+UNCACHED_ERRORS = ("Memory limit exceeded", "CPU time limit exceeded", "Program crashed")
+
+# HTTP request handler: one thread per connection
+class GradingRequestHandler(BaseHTTPRequestHandler):
+    server_version = "PseudocodeGrader/1.0"
+
+    def do_GET(self):
+        if self.path == '/status':
+            self.send_json(200, self.server.status())
+        else:
+            self.send_json(404, {'error': f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        if self.path != '/run':
+            self.send_json(404, {'error': f"Unknown path {self.path}"})
+            return
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_BODY_BYTES:
+            self.send_json(413, {'error': "Request too large"})
+            return
+        try:
+            job = json.loads(self.rfile.read(length))
+            if not isinstance(job, dict) or not isinstance(job.get('code'), str):
+                raise ValueError("'code' must be a string")
+            lines = job.get('input', [])
+            if isinstance(lines, str):
+                lines = lines.splitlines()
+            if not isinstance(lines, list):
+                raise ValueError("'input' must be a string or a list of lines")
+            timeout = float(job.get('timeout', self.server.timeout))
+        except (ValueError, TypeError) as e:
+            self.send_json(400, {'error': f"Invalid job: {e}"})
+            return
+
+        status, response = self.server.run_job(job['code'], [str(line) for line in lines], timeout)
+        if status == 200 and isinstance(job.get('expected'), str):
+            response['passed'] = normalize(response['output']) == normalize(job['expected'])
+        self.send_json(status, response)
+
+    def send_json(self, status, data):
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+# The grading server
+class GradingServer(ThreadingHTTPServer):
+    """HTTP server that runs at most workers jobs at once in warm sandbox processes.
+
+    Up to max_queue more jobs wait for a free worker; further jobs are turned
+    away with 503. A job's timeout is capped at timeout seconds.
+    """
+    daemon_threads = True
+
+    def __init__(self, address, workers=2, max_queue=16, timeout=10, cpu_seconds=10, memory_mb=512,
+                 quiet=False, cache=None):
+        super().__init__(address, GradingRequestHandler)
+        self.cache = cache  # ResultCache answering repeated jobs without running them, or None
+        self.workers = workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.quiet = quiet
+        self.pool = SandboxPool(size=workers, cpu_seconds=cpu_seconds, memory_mb=memory_mb)
+        self.slots = threading.BoundedSemaphore(workers)
+        self.lock = threading.Lock()
+        self.counts = {'queued': 0, 'running': 0, 'completed': 0, 'rejected': 0, 'timeouts': 0}
+
+    def status(self):
+        """Counters of the jobs seen so far"""
+        with self.lock:
+            status = dict(self.counts, workers=self.workers, max_queue=self.max_queue)
+        if self.cache is not None:
+            status['cache'] = self.cache.stats()
+        return status
+
+    def run_job(self, code, input_lines, timeout):
+        """Queue a job, run it when a worker is free and return (HTTP status, response)"""
+        key = self.cache.key(code, input_lines) if self.cache is not None else None
+        if key is not None:
+            response = self.cache.get(key)
+            if response is not None:
+                response['stats'].update(cached=True, queue_ms=0.0)
+                with self.lock:
+                    self.counts['completed'] += 1
+                return 200, response
+
+        with self.lock:
+            if self.counts['queued'] >= self.max_queue and self.counts['running'] >= self.workers:
+                self.counts['rejected'] += 1
+                return 503, {'status': 'busy', 'error': "Too many jobs waiting, try again later"}
+            self.counts['queued'] += 1
+
+        start = time.perf_counter()
+        self.slots.acquire()
+        with self.lock:
+            self.counts['queued'] -= 1
+            self.counts['running'] += 1
+        queue_seconds = time.perf_counter() - start
+
+        try:
+            response = self.execute(code, input_lines, min(timeout, self.timeout))
+        finally:
+            self.slots.release()
+            with self.lock:
+                self.counts['running'] -= 1
+        with self.lock:
+            self.counts['completed'] += 1
+            if response['status'] == 'timeout':
+                self.counts['timeouts'] += 1
+        if key is not None and response['status'] != 'timeout' and not (response['error'] or "").startswith(UNCACHED_ERRORS):
+            self.cache.put(key, response)
+        response['stats'].update(cached=False, queue_ms=round(queue_seconds * 1000, 3))
+        return 200, response
+
+    def execute(self, code, input_lines, timeout):
+        """Run code in a sandbox process, killing it after timeout seconds"""
+        output = []
+        lines = iter(input_lines)
+        start = time.perf_counter()
+        run = self.pool.start(code)
+        timer = threading.Timer(timeout, run.kill)
+        timer.start()
+        status, error = 'ok', None
+        try:
+            run.wait(output.append, lambda name: next(lines, None))
+        except ProgramStopped:
+            status, error = 'timeout', f"Time limit exceeded ({timeout:g} s)"
+        except Exception as e:
+            status, error = 'error', str(e)
+        finally:
+            timer.cancel()
+        output = "".join(output)
+        return {'status': status, 'output': output, 'error': error,
+                'stats': {'run_ms': round((time.perf_counter() - start) * 1000, 3),
+                          'output_bytes': len(output.encode('utf-8'))}}
+
+    def server_close(self):
+        super().server_close()
+        self.pool.close()
@@ -0,0 +1,494 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the Pseudocode Interpreter.
+
+Run every benchmark with `python testing/benchmark.py`, or name the ones
+to run, e.g. `python testing/benchmark.py incremental`.
+"""
+
+import sys
+import os
+import time
+import subprocess
+import tempfile
+import tracemalloc
+sys.path.insert(0, os.path.abspath('.'))
+
+from pseudocode_interpreter.core.lexer import Lexer
+from pseudocode_interpreter.core.parser import Parser
+from pseudocode_interpreter.core.interpreter import Interpreter
+from pseudocode_interpreter.core.incremental import IncrementalParser
+from pseudocode_interpreter.core.tokens import TokenType
+from pseudocode_interpreter.core.interning import Interner
+from pseudocode_interpreter.core.output import FileSink, RingBufferSink
+
+BENCHMARKS = {}
+
+def benchmark(func):
+    """Register a benchmark under its name without the bench_ prefix"""
+    BENCHMARKS[func.__name__[len('bench_'):]] = func
+    return func
+
+def best_time(func, repeat=5):
+    """Best wall-clock time of several runs of func, in seconds"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+def report(name, seconds, detail=""):
+    print(f"  {name:<40} {seconds * 1000:10.2f} ms  {detail}")
+
+def parse(code):
+    """Lex and parse code"""
+    lexer = Lexer(code)
+    return Parser(lexer.generate_tokens(), lexer.line_index).parse()
+
+def run(code):
+    """Lex, parse and run code, returning the interpreter"""
+    interpreter = Interpreter()
+    interpreter.interpret(parse(code))
+    return interpreter
+
+def sample_program(functions):
+    """A program of the given number of small functions and calls (13 lines each)"""
+    block = """DEF f{0}(a, b) DO
+    s <- 0
+    FOR i <- 1 TO a
+        IF i MOD 2 = 0 THEN
+            s <- s + i * b
+        ELSE
+            s <- s - i
+        ENDIF
+    NEXT i
+    RETURN s
+ENDEF
+x{0} <- f{0}(10, 2)
+PRINT "value: " + x{0}
+"""
+    return "".join(block.format(i) for i in range(functions))
+
+@benchmark
+def bench_incremental():
+    """Keystroke-to-diagnostic latency of the incremental front end on a 5,000-line file"""
+    lines = sample_program(385).split('\n')
+    front_end = IncrementalParser()
+    report("initial parse (5,005 lines)", best_time(lambda: IncrementalParser('\n'.join(lines)), 1))
+
+    front_end.update('\n'.join(lines))
+    timings = []
+    for k in range(200):
+        number = (k * 37) % len(lines)
+        lines[number] += " "
+        text = '\n'.join(lines)
+        start = time.perf_counter()
+        front_end.update(text)
+        front_end.errors
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    report("keystroke update (median)", timings[len(timings) // 2])
+    report("keystroke update (worst)", timings[-1], "target < 20 ms")
+
+    full = best_time(lambda: parse('\n'.join(lines)), 3)
+    report("full re-lex and re-parse", full)
+
+def nested_index_program(depth, statements):
+    """Statements that read and assign through index expressions nested depth deep"""
+    index = "i"
+    for level in range(depth):
+        index = f"a{level % 3}[{index} + 1]"
+    lines = []
+    for _ in range(statements):
+        lines.append(f"x <- {index}")
+        lines.append(f"a0[{index}] <- x * 2")
+    return "\n".join(lines)
+
+@benchmark
+def bench_parser():
+    """Parser throughput on deeply nested index expressions"""
+    for depth in (5, 10, 20, 40):
+        code = nested_index_program(depth, 200)
+        tokens = Lexer(code).generate_tokens()
+        seconds = best_time(lambda: Parser(tokens).parse(), 3)
+        report(f"nested index, depth {depth}", seconds, f"{len(tokens) / seconds / 1000:8.0f} k tokens/s")
+
+def expression_program(statements):
+    """Assignments of long expressions mixing every operator"""
+    lines = []
+    for k in range(statements):
+        lines.append(f"x{k % 7} <- (a + {k}) * b - c / 2 ^ n MOD 3 + -d DIV 4")
+        lines.append(f"ok <- x{k % 7} >= 10 AND NOT a[i + 1] = b OR f(a, b * 2) <> {k}")
+    return "\n".join(lines)
+
+def parser_calls(tokens):
+    """Number of Python calls into the parser while parsing tokens"""
+    parser_file = Parser.parse.__code__.co_filename
+    calls = 0
+
+    def profile(frame, event, arg):
+        nonlocal calls
+        if event == 'call' and frame.f_code.co_filename == parser_file:
+            calls += 1
+    sys.setprofile(profile)
+    try:
+        Parser(tokens).parse()
+    finally:
+        sys.setprofile(None)
+    return calls
+
+@benchmark
+def bench_expressions():
+    """Parser throughput and call count on expression-heavy source"""
+    code = expression_program(1000)
+    tokens = Lexer(code).generate_tokens()
+    operands = sum(1 for t in tokens if t.type in (TokenType.NUMBER, TokenType.IDENTIFIER, TokenType.STRING))
+    seconds = best_time(lambda: Parser(tokens).parse(), 5)
+    report("2,000 expression statements", seconds, f"{len(tokens) / seconds / 1000:8.0f} k tokens/s")
+    print(f"  {'parser calls per operand':<40} {parser_calls(tokens) / operands:10.2f}")
+
+def library_source(functions):
+    """The loadable stdlib modules followed by the given number of generated functions"""
+    stdlib = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'pseudocode_interpreter', 'stdlib')
+    parts = []
+    for module in ('_string_', '_fio_'):
+        with open(os.path.join(stdlib, module)) as file:
+            parts.append(file.read().replace('INCLUDE "_string_"', ''))
+    parts.append("\n".join(line for line in sample_program(functions).split("\n")
+                           if not line.startswith(('x', 'PRINT'))))
+    return "\n".join(parts)
+
+@benchmark
+def bench_lazy():
+    """Start-up time of a program defining many functions and calling one"""
+    code = library_source(500) + "\nPRINT f7(10, 2)\n"
+    for lazy in (False, True):
+        def start():
+            lexer = Lexer(code)
+            ast = Parser(lexer.generate_tokens(), lexer.line_index, lazy_functions=lazy).parse()
+            Interpreter().interpret(ast, lexer.line_index)
+        report(f"{'lazy' if lazy else 'eager'} function bodies", best_time(start, 5),
+               f"{len(code.splitlines())} lines")
+
+def allocated(build):
+    """Call build and return its result and the memory still allocated for it, in bytes"""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = build()
+        return result, tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+
+@benchmark
+def bench_ast_memory():
+    """Memory held by the AST of a 100,000-line program, compact classes against Node"""
+    code = sample_program(7700)
+    tokens = Lexer(code).generate_tokens()
+    ast, compact = allocated(lambda: Parser(tokens).parse())
+    legacy_ast, legacy = allocated(ast.to_node)
+    count = 0
+    pending = [legacy_ast]
+    while pending:
+        node = pending.pop()
+        count += 1
+        pending.extend(node.nodes)
+    lines = code.count("\n")
+    print(f"  {lines:,} lines, {count:,} nodes")
+    print(f"  {'Node tree':<40} {legacy / 2**20:10.1f} MB  {legacy / count:6.0f} bytes/node")
+    print(f"  {'compact AST':<40} {compact / 2**20:10.1f} MB  {compact / count:6.0f} bytes/node")
+
+def sorting_program(copies):
+    """Copies of a bubble sort, the kind of code that repeats arr[j + 1] and n - 1"""
+    block = """n{0} <- 50
+arr <- [5, 3, 8, 1, 9, 2]
+FOR i <- 1 TO n{0} - 1
+    FOR j <- 1 TO n{0} - i
+        IF arr[j] > arr[j + 1] THEN
+            t <- arr[j]
+            arr[j] <- arr[j + 1]
+            arr[j + 1] <- t
+        ENDIF
+    NEXT j
+NEXT i
+"""
+    return "".join(block.format(i % 10) for i in range(copies))
+
+@benchmark
+def bench_interning():
+    """Deduplication of identical expression subtrees by the interning pass"""
+    for name, code in (("sample functions", sample_program(1000)), ("bubble sorts", sorting_program(1000))):
+        tokens = Lexer(code).generate_tokens()
+        ast = Parser(tokens).parse()
+        seconds = best_time(lambda: Interner().intern(ast), 1)
+
+        tracemalloc.start()
+        ast = Parser(tokens).parse()
+        before = tracemalloc.get_traced_memory()[0]
+        interner = Interner()
+        interner.intern(ast)
+        after = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        report(f"intern {name}", seconds, f"{interner.ratio:6.1%} deduplicated")
+        print(f"  {'':<40} {before / 2**20:7.1f} MB -> {after / 2**20:.1f} MB AST memory")
+
+def menu_program(options, iterations):
+    """A loop dispatching on a CASE with the given number of options, the last of them ranges"""
+    arms = "".join(f"        {k}: total <- total + {k}\n" for k in range(1, options - 9))
+    arms += "".join(f"        {k * 100} TO {k * 100 + 99}: total <- total + 1\n" for k in range(options - 9, options + 1))
+    return f"""total <- 0
+FOR i <- 1 TO {iterations}
+    choice <- i MOD {options} + 1
+    CASE OF choice
+{arms}        OTHERWISE: total <- total - 1
+    ENDCASE
+NEXT i
+PRINT total
+"""
+
+@benchmark
+def bench_case():
+    """CASE dispatch through a jump table against walking the arms"""
+    code = menu_program(200, 2000)
+    ast = parse(code)
+    case = ast.statements[1].body.statements[1]
+
+    def dispatch(table):
+        case.table = table
+        Interpreter().interpret(ast)
+
+    linear = best_time(lambda: dispatch(False), 3)
+    table = best_time(lambda: dispatch(None), 3)
+    report("200 arms, linear walk", linear)
+    report("200 arms, jump table", table, f"{linear / table:5.1f}x faster")
+
+@benchmark
+def bench_output():
+    """PRINT-heavy loops kept in memory, in a ring buffer and streamed to a file"""
+    for lines in (50000, 100000, 200000):
+        code = f"FOR i <- 1 TO {lines}\n    PRINT \"line \" + i\nNEXT i"
+        ast = parse(code)
+        seconds = best_time(lambda: Interpreter().interpret(ast), 1)
+        report(f"{lines:,} lines to memory", seconds, f"{seconds / lines * 1e6:.2f} us/line")
+
+    ast = parse("FOR i <- 1 TO 200000\n    PRINT \"line \" + i\nNEXT i")
+    for name, make_sink in (("ring buffer", lambda path: RingBufferSink(1000)), ("file", FileSink)):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "out.txt")
+
+            def stream():
+                sink = make_sink(path)
+                Interpreter(output=sink).interpret(ast)
+                sink.close()
+
+            seconds = best_time(stream, 1)
+            tracemalloc.start()
+            stream()
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        report(f"200,000 lines to {name}", seconds, f"{peak / 2**20:.1f} MB peak")
+
+@benchmark
+def bench_cold_start():
+    """Start-up of the command line runner, which must not import PyQt6"""
+    hello = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'examples', 'hello_world.pseudo')
+    commands = (
+        ("python -c pass", [sys.executable, "-c", "pass"]),
+        ("import pseudocode_interpreter.core", [sys.executable, "-c", "import pseudocode_interpreter.core"]),
+        ("run hello_world.pseudo", [sys.executable, "-m", "pseudocode_interpreter", "run", hello]),
+        ("import PyQt6.QtWidgets", [sys.executable, "-c", "import PyQt6.QtWidgets"]),
+    )
+    for name, command in commands:
+        seconds = best_time(lambda: subprocess.run(command, stdout=subprocess.DEVNULL, check=False), 5)
+        report(name, seconds)
+
+@benchmark
+def bench_limits():
+    """Cost of the step and time limits on a loop-heavy program"""
+    ast = parse(sample_program(200) + "n <- 0\nWHILE n < 100000 DO\n  n <- n + 1\nENDWHILE\n")
+    for name, limits in (("no limits", {}), ("max_steps", {'max_steps': 10**9}),
+                         ("max_seconds", {'max_seconds': 1000}),
+                         ("both", {'max_steps': 10**9, 'max_seconds': 1000})):
+        def run_limited():
+            interpreter = Interpreter()
+            interpreter.__dict__.update(limits)
+            interpreter.interpret(ast)
+        report(name, best_time(run_limited, 5))
+
+@benchmark
+def bench_profiling():
+    """Cost of the time, memory and sampling profilers on a call-heavy program"""
+    from pseudocode_interpreter.core.profiler import ProfilingInterpreter
+    from pseudocode_interpreter.core.memory_profiler import MemoryProfilingInterpreter
+    from pseudocode_interpreter.core.sampler import SamplingProfiler
+
+    ast = parse(sample_program(200) + "DEF fib(n) DO\n  IF n <= 1 THEN\n    RETURN 1\n  ENDIF\n"
+                "  RETURN fib(n-1) + fib(n-2)\nENDEF\nx <- fib(18)\n")
+    report("plain", best_time(lambda: Interpreter().interpret(ast), 5))
+    report("ProfilingInterpreter", best_time(lambda: ProfilingInterpreter().interpret(ast), 5))
+    report("MemoryProfilingInterpreter", best_time(lambda: MemoryProfilingInterpreter().interpret(ast), 5))
+    for interval in (0.005, 0.001):
+        def run_sampled():
+            interpreter = Interpreter()
+            with SamplingProfiler(interpreter, interval) as sampler:
+                interpreter.interpret(ast)
+            return sampler
+        report(f"SamplingProfiler every {interval * 1000:g} ms", best_time(run_sampled, 5),
+               f"{len(run_sampled().samples)} samples")
+
+@benchmark
+def bench_append():
+    """Building a list one element at a time with l <- l + [i], against prepending, which copies"""
+    for n in (10000, 100000):
+        ast = parse(f"l <- []\nFOR i <- 1 TO {n}\n  l <- l + [i]\nNEXT i\n")
+        report(f"append {n}", best_time(lambda: Interpreter().interpret(ast), 3))
+    for n in (5000, 10000):
+        ast = parse(f"l <- []\nFOR i <- 1 TO {n}\n  l <- [i] + l\nNEXT i\n")
+        report(f"prepend {n}", best_time(lambda: Interpreter().interpret(ast), 3))
+
+@benchmark
+def bench_string_building():
+    """Building a 1 MB string a character at a time with s <- s + c, against prepending, which copies"""
+    ast = parse(f"s <- \"\"\nFOR i <- 1 TO {2**20}\n  s <- s + \"x\"\nNEXT i\n"
+                f"IF s = \"x\" * {2**20} THEN\n  PRINT \"built\"\nENDIF\n")
+    interpreter = Interpreter()
+    report("append 1 MB", best_time(lambda: interpreter.interpret(ast), 1), interpreter.output_text.strip())
+    for n in (2**17, 2**18):
+        ast = parse(f"s <- \"\"\nFOR i <- 1 TO {n}\n  s <- \"x\" + s\nNEXT i\n")
+        report(f"prepend {n // 1024} KB", best_time(lambda: Interpreter().interpret(ast), 1))
+
+@benchmark
+def bench_map():
+    """Looking up every key of a table once: MAP against a linear scan of parallel arrays"""
+    for n in (250, 500, 1000):
+        setup = "".join(f"names[{i}] <- \"k{i}\"\nscores[{i}] <- {i}\nm[\"k{i}\"] <- {i}\n" for i in range(1, n + 1))
+        setup = "names <- []\nscores <- []\nm <- {}\n" + setup
+        scan = parse(setup + f"""FOR q <- 1 TO {n}
+    key <- "k" + q
+    i <- 1
+    WHILE names[i] <> key DO
+        i <- i + 1
+    ENDWHILE
+    total <- scores[i]
+NEXT q
+""")
+        lookup = parse(setup + f"FOR q <- 1 TO {n}\n    total <- m[\"k\" + q]\nNEXT q\n")
+        report(f"linear scan, {n} keys", best_time(lambda: Interpreter().interpret(scan), 1))
+        report(f"map, {n} keys", best_time(lambda: Interpreter().interpret(lookup), 3))
+
+@benchmark
+def bench_set():
+    """Removing duplicates from an array: SET membership against a nested FOR loop"""
+    for n in (250, 500, 1000):
+        setup = "data <- []\n" + "".join(f"data[{i}] <- {i * 7 % (n // 2)}\n" for i in range(1, n + 1))
+        nested = parse(setup + f"""seen <- []
+count <- 0
+FOR i <- 1 TO {n}
+    found <- FALSE
+    FOR j <- 1 TO count
+        IF seen[j] = data[i] THEN
+            found <- TRUE
+        ENDIF
+    NEXT j
+    IF NOT found THEN
+        count <- count + 1
+        seen[count] <- data[i]
+    ENDIF
+NEXT i
+""")
+        with_set = parse(setup + f"""seen <- SET([])
+FOR EACH v IN data
+    IF NOT v IN seen THEN
+        ADD(seen, v)
+    ENDIF
+NEXT v
+""")
+        report(f"nested loop, {n} elements", best_time(lambda: Interpreter().interpret(nested), 1))
+        report(f"set, {n} elements", best_time(lambda: Interpreter().interpret(with_set), 3))
+
+def grid_search(w, setup, waiting, enqueue, dequeue):
+    """A breadth-first search over an open w x w grid from its corner, counting cells reached"""
+    return f"""{setup}
+seen <- SET([0])
+{enqueue("0")}
+reached <- 0
+WHILE {waiting} DO
+    {dequeue("k")}
+    reached <- reached + 1
+    r <- (k - k MOD {w}) / {w}
+    c <- k MOD {w}
+    IF r > 0 AND NOT k - {w} IN seen THEN
+        ADD(seen, k - {w})
+        {enqueue(f"k - {w}")}
+    ENDIF
+    IF r < {w - 1} AND NOT k + {w} IN seen THEN
+        ADD(seen, k + {w})
+        {enqueue(f"k + {w}")}
+    ENDIF
+    IF c > 0 AND NOT k - 1 IN seen THEN
+        ADD(seen, k - 1)
+        {enqueue("k - 1")}
+    ENDIF
+    IF c < {w - 1} AND NOT k + 1 IN seen THEN
+        ADD(seen, k + 1)
+        {enqueue("k + 1")}
+    ENDIF
+ENDWHILE
+PRINT reached
+"""
+
+@benchmark
+def bench_queue():
+    """Breadth-first search over a grid: QUEUE against an array shifted down on each dequeue"""
+    def deque_search(w):
+        return grid_search(w, "q <- QUEUE()", "NOT ISEMPTY(q)", lambda cell: f"ENQUEUE(q, {cell})",
+                           lambda cell: f"{cell} <- DEQUEUE(q)")
+
+    def array_search(w):
+        dequeue = lambda cell: f"""{cell} <- q[1]
+    FOR i <- 1 TO size - 1
+        q[i] <- q[i + 1]
+    NEXT i
+    size <- size - 1"""
+        return grid_search(w, "q <- []\nsize <- 0", "size > 0",
+                           lambda cell: f"size <- size + 1\n        q[size] <- {cell}", dequeue)
+
+    # Each cell is enqueued and dequeued once, so 710 x 710 cells take about a million queue operations
+    for w in (50, 100, 200, 710):
+        program = parse(deque_search(w))
+        report(f"QUEUE, {w * w} cells", best_time(lambda: Interpreter().interpret(program), 1),
+               f"{2 * w * w} queue operations")
+    for w in (50, 100):
+        program = parse(array_search(w))
+        report(f"array, {w * w} cells", best_time(lambda: Interpreter().interpret(program), 1))
+
+@benchmark
+def bench_batch():
+    """Grading 64 programs on 4 tests: one worker against one per core"""
+    from pseudocode_interpreter.batch import grade
+
+    with tempfile.TemporaryDirectory() as programs, tempfile.TemporaryDirectory() as tests:
+        for i in range(64):
+            with open(os.path.join(programs, f"p{i}.pseudo"), 'w') as file:
+                file.write("INPUT n\n" + sample_program(20) + "PRINT n * 2\n")
+        for i in range(4):
+            with open(os.path.join(tests, f"t{i}.in"), 'w') as file:
+                file.write(f"{i}\n")
+        for jobs in sorted({1, os.cpu_count() or 1}):
+            seconds = best_time(lambda: grade(programs, tests, jobs=jobs), 3)
+            report(f"256 runs, {jobs} worker(s)", seconds)
+
+def main(names):
+    for name in names or BENCHMARKS:
+        if name not in BENCHMARKS:
+            print(f"Unknown benchmark '{name}'. Available: {', '.join(BENCHMARKS)}")
+            return 1
+        print(f"{name}: {BENCHMARKS[name].__doc__}")
+        BENCHMARKS[name]()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
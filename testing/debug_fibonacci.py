@@ -25,11 +25,10 @@ class DebugInterpreter(Interpreter):
         
         # Get argument values for debug
         arg_values = []
-        if node.nodes:
-            for arg_node in node.nodes:
-                value = self.visit(arg_node)
-                print(f"{value}", end=", ")
-                arg_values.append(value)
+        for arg_node in node.args:
+            value = self.visit(arg_node)
+            print(f"{value}", end=", ")
+            arg_values.append(value)
         print()
         
         # Check recursion depth
@@ -58,15 +57,14 @@ class DebugInterpreter(Interpreter):
             function_symbol_table.set(func_name, function_var)
 
             # Process arguments
-            if function.args_node:
-                arg_nodes = function.args_node.nodes
+            if function.params is not None:
+                params = function.params
 
-                if len(arg_nodes) != len(arg_values):
-                    raise Exception(f"Function '{func_name}' expects {len(arg_nodes)} arguments, got {len(arg_values)}")
+                if len(params) != len(arg_values):
+                    raise Exception(f"Function '{func_name}' expects {len(params)} arguments, got {len(arg_values)}")
 
                 # Set arguments in the function's symbol table
-                for i, arg_node in enumerate(arg_nodes):
-                    arg_name = arg_node.name
+                for i, arg_name in enumerate(params):
                     function_symbol_table.set(arg_name, arg_values[i])
 
             # Save the current symbol table and return value
@@ -106,8 +104,8 @@ class DebugInterpreter(Interpreter):
             
     def visit_add(self, node):
         """Overridden visit_add with debug output"""
-        left = self.visit(node.nodes[0])
-        right = self.visit(node.nodes[1])
+        left = self.visit(node.left)
+        right = self.visit(node.right)
         
         indent = "  " * self.debug_indent
         print(f"{indent}Adding: {left} + {right}")
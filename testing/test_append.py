@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Test appending to a list or string with x <- x + expr.
+"""
+
+import sys
+import os
+import time
+sys.path.insert(0, os.path.abspath('.'))
+
+from pseudocode_interpreter.core.lexer import Lexer
+from pseudocode_interpreter.core.parser import Parser
+from pseudocode_interpreter.core.interpreter import Interpreter, UNSHARED_REFERENCES
+from pseudocode_interpreter.core.values import StringBuilder
+
+def interpret(code):
+    """Run code and return the interpreter"""
+    lexer = Lexer(code)
+    ast = Parser(lexer.generate_tokens(), lexer.line_index).parse()
+    interpreter = Interpreter()
+    interpreter.interpret(ast, lexer.line_index)
+    return interpreter
+
+def run(code):
+    """Run code and return its output"""
+    return interpret(code).output_text
+
+def parse(code):
+    """Lex and parse code, returning the AST and its LineIndex"""
+    lexer = Lexer(code)
+    return Parser(lexer.generate_tokens(), lexer.line_index).parse(), lexer.line_index
+
+def test_in_place_path_is_taken():
+    """On this Python, appending to an unshared list or string changes it in place"""
+    assert UNSHARED_REFERENCES is not None
+    interpreter = interpret("l <- [1]\ns <- \"a\"")
+    symbols = interpreter.global_symbol_table.symbols
+    values = symbols['l'].value.values  # The Python list, so the Variable gets no extra reference
+    interpreter.interpret(*parse("FOR i <- 2 TO 3\n    l <- l + [i]\nNEXT i\ns <- s + \"b\""))
+    assert symbols['l'].value.values is values and len(values) == 3
+    assert isinstance(symbols['s'].value, StringBuilder) and symbols['s'].value.chunks == ["a", "b"]
+    # An alias adds a reference, so the same statement copies instead
+    interpreter.interpret(*parse("m <- l\nl <- l + [4]"))
+    assert symbols['l'].value.values is not values and len(values) == 3
+
+def test_shared_lists_are_copied():
+    """A list another variable or list also holds is not changed by appending to it"""
+    assert run("x <- [1, 2]\ny <- x\nx <- x + [3]\nPRINT y\nPRINT x") == "[1, 2]\n[1, 2, 3]\n"
+    assert run("a <- [[1]]\nb <- a[1]\nb <- b + [2]\nPRINT a\nPRINT b") == "[[1]]\n[1, 2]\n"
+    assert run("c <- [1]\nd <- [c]\nc <- c + [2]\nPRINT d\nPRINT c") == "[[1]]\n[1, 2]\n"
+
+def test_append_in_functions():
+    """Lists built in a function, returned and appended to again, and arguments"""
+    code = """DEF f() DO
+    l <- []
+    FOR i <- 1 TO 5
+        l <- l + [i]
+    NEXT i
+    RETURN l
+ENDEF
+DEF g(l) DO
+    l <- l + [0]
+    RETURN l
+ENDEF
+a <- f()
+b <- a
+a <- a + [6]
+a <- a + [7]
+PRINT b
+PRINT a
+PRINT g(a)
+PRINT a
+"""
+    assert run(code) == "[1, 2, 3, 4, 5]\n[1, 2, 3, 4, 5, 6, 7]\n[1, 2, 3, 4, 5, 6, 7, 0]\n[1, 2, 3, 4, 5, 6, 7]\n"
+
+def test_other_values():
+    """Numbers, strings, a list added to itself and a list plus a string work as before"""
+    assert run("n <- 1\nn <- n + 2\nPRINT n") == "3\n"
+    assert run('s <- "a"\ns <- s + "b"\nPRINT s') == "ab\n"
+    assert run('s <- [1]\ns <- s + s\nPRINT s\ns <- s + "x"\nPRINT s') == "[1, 1]\n[1, 1]x\n"
+
+def test_string_building():
+    """Strings appended to in place read the same as strings built by copying"""
+    code = """s <- ""
+FOR i <- 1 TO 3
+    s <- s + "ab"
+    IF s = "abab" THEN
+        PRINT "equal"
+    ENDIF
+NEXT i
+t <- s
+s <- s + 1
+PRINT t
+PRINT s
+s <- s + [2]
+PRINT s * 2
+"""
+    assert run(code) == "equal\nababab\nababab1\nababab1[2]ababab1[2]\n"
+    interpreter = interpret('s <- "a"\nFOR i <- 1 TO 3\n    s <- s + i\nNEXT i')
+    builder = interpreter.global_symbol_table.get('s').value
+    assert isinstance(builder, StringBuilder) and len(builder.chunks) == 4
+    assert str(builder) == "a123" and builder.chunks == ["a123"]
+    assert run('DEF f(x) DO\n    x <- x + "!"\n    RETURN x\nENDEF\nu <- "hi"\nPRINT f(u)\nPRINT u') == "hi!\nhi\n"
+
+def test_linear_growth():
+    """Building a list or string a piece at a time takes time linear in its length"""
+    times = {}
+    for n in (5000, 20000):
+        code = f"l <- []\nFOR i <- 1 TO {n}\n    l <- l + [i]\nNEXT i\nPRINT l[{n}]"
+        start = time.perf_counter()
+        assert run(code) == f"{n}\n"
+        times[n] = time.perf_counter() - start
+    # Copying the list each time would make four times the length take sixteen times as long
+    assert times[20000] < 8 * times[5000], times
+    for n in (5000, 20000):
+        code = f's <- ""\nFOR i <- 1 TO {n}\n    s <- s + "x"\nNEXT i\nIF s = "x" * {n} THEN\n    PRINT "ok"\nENDIF'
+        start = time.perf_counter()
+        assert run(code) == "ok\n"
+        times[n] = time.perf_counter() - start
+    assert times[20000] < 8 * times[5000], times
+
+if __name__ == "__main__":
+    test_in_place_path_is_taken()
+    test_shared_lists_are_copied()
+    test_append_in_functions()
+    test_other_values()
+    test_string_building()
+    test_linear_growth()
+    print("✅ All append tests passed!")
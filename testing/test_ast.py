@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Test the compact AST classes and their conversion to Node trees.
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath('.'))
+
+from pseudocode_interpreter.core.lexer import Lexer
+from pseudocode_interpreter.core.parser import Parser
+from pseudocode_interpreter.core.interpreter import Interpreter
+from pseudocode_interpreter.core.ast_nodes import Node, NodeType, For, NumberLiteral, VarAccess, CaseItem
+
+CASE_PROGRAM = """n <- 7
+y <- 0
+CASE OF n
+    1: y <- 10
+    5 TO 9: y <- 20
+    OTHERWISE: y <- 30
+ENDCASE
+PRINT y"""
+
+def parse(code):
+    """Lex and parse code"""
+    return Parser(Lexer(code).generate_tokens()).parse()
+
+def test_named_fields():
+    """Nodes expose their children by name"""
+    loop = parse("FOR i <- 1 TO n STEP 2\n    PRINT i\nNEXT i")
+    assert isinstance(loop, For)
+    assert loop.var == "i"
+    assert isinstance(loop.start, NumberLiteral) and loop.start.value == 1.0
+    assert isinstance(loop.end, VarAccess) and loop.end.name == "n"
+    assert loop.body.statements[0].type == NodeType.PRINT
+
+def test_compact_nodes():
+    """Nodes have no instance dictionary and leaves have no child list"""
+    leaf = parse("x")
+    assert not hasattr(leaf, '__dict__')
+    assert not hasattr(leaf, 'nodes')
+    assert not hasattr(parse("a + 1"), '__dict__')
+
+def test_conversion_to_node():
+    """to_node gives the positional Node form"""
+    node = parse("a[i] <- f(1) + 2").to_node()
+    assert isinstance(node, Node)
+    assert node.type == NodeType.ARRAY_ASSIGN and node.name == "a"
+    assert [child.type for child in node.nodes] == [NodeType.VAR_ACCESS, NodeType.ADD]
+    assert repr(parse("DEF f(a, b) DO\n    RETURN a\nENDEF")) == (
+        "DEF:f[ARGS[ARG:a, ARG:b], BLOCK, VAR_ACCESS:a]")
+
+def test_case_ranges_are_explicit():
+    """Range labels are marked by range_end, not guessed from the statement after them"""
+    case = parse(CASE_PROGRAM).statements[2]
+    assert [item.range_end is None for item in case.items] == [True, False]
+    assert all(isinstance(item, CaseItem) for item in case.items)
+
+    interpreter = Interpreter()
+    interpreter.interpret(parse(CASE_PROGRAM))
+    assert interpreter.output_text == "20\n"
+
+if __name__ == "__main__":
+    test_named_fields()
+    test_compact_nodes()
+    test_conversion_to_node()
+    test_case_ranges_are_explicit()
+    print("✅ AST tests passed!")
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Test the parallel batch grader.
+"""
+
+import sys
+import os
+import io
+import csv
+import json
+import tempfile
+sys.path.insert(0, os.path.abspath('.'))
+
+from pseudocode_interpreter.batch import grade, load_tests, normalize, summarize, write_csv, write_json
+
+PROGRAMS = {
+    "good": "INPUT n\nPRINT n * 2\n",
+    "wrong": "INPUT n\nPRINT n + 1\n",
+    "error": "PRINT y\n",
+    "syntax": "PRINT (\n",
+    "loop": "WHILE TRUE DO\n  x <- 1\nENDWHILE\n",
+}
+TESTS = {"a.in": "3\n", "a.out": "6\n", "b.in": "5\n", "b.out": "10  \n\n"}
+
+def write_files(directory, files):
+    for name, text in files.items():
+        with open(os.path.join(directory, name), 'w') as file:
+            file.write(text)
+
+def test_grade():
+    """Each program gets a status per test, with a diff when its output is wrong"""
+    with tempfile.TemporaryDirectory() as programs, tempfile.TemporaryDirectory() as tests:
+        write_files(programs, {name + ".pseudo": code for name, code in PROGRAMS.items()})
+        write_files(tests, TESTS)
+        assert [name for name, _, _ in load_tests(tests)] == ["a", "b"]
+        results = grade(programs, tests, jobs=2, timeout=0.5, max_steps=10000)
+
+    statuses = {(r['program'], r['test']): r['status'] for r in results}
+    assert statuses == {
+        ("error.pseudo", "a"): "error", ("error.pseudo", "b"): "error",
+        ("good.pseudo", "a"): "passed", ("good.pseudo", "b"): "passed",
+        ("loop.pseudo", "a"): "step_limit", ("loop.pseudo", "b"): "step_limit",
+        ("syntax.pseudo", "a"): "error", ("syntax.pseudo", "b"): "error",
+        ("wrong.pseudo", "a"): "failed", ("wrong.pseudo", "b"): "failed",
+    }
+    wrong = [r for r in results if r['program'] == "wrong.pseudo"][0]
+    assert "-6\n+4" in wrong['diff']
+    assert results[0]['error'] == "Variable 'y' not defined (line 1:1)"
+    assert summarize(results) == {"passed": 2, "failed": 2, "error": 4, "step_limit": 2}
+
+    report = io.StringIO()
+    write_json(results, report)
+    assert json.loads(report.getvalue())['results'] == results
+    report = io.StringIO()
+    write_csv(results, report)
+    rows = list(csv.DictReader(io.StringIO(report.getvalue())))
+    assert [row['status'] for row in rows] == [r['status'] for r in results]
+
+def test_timeout_and_no_tests():
+    """Without tests each program runs once with no input; slow runs time out"""
+    with tempfile.TemporaryDirectory() as programs:
+        write_files(programs, {"loop.pseudo": PROGRAMS["loop"], "hello.pseudo": "PRINT 1\n"})
+        results = grade(programs, timeout=0.2)
+    assert [(r['program'], r['status']) for r in results] == [("hello.pseudo", "ran"), ("loop.pseudo", "timeout")]
+    assert results[1]['seconds'] < 2
+
+def test_normalize():
+    """Trailing spaces and blank lines do not count as differences"""
+    assert normalize("1  \n2\n\n\n") == normalize("1\n2") == ["1", "2"]
+
+if __name__ == "__main__":
+    test_grade()
+    test_timeout_and_no_tests()
+    test_normalize()
+    print("✅ All batch grading tests passed!")
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Test the on-disk cache of run results.
+"""
+
+import sys
+import os
+import tempfile
+sys.path.insert(0, os.path.abspath('.'))
+
+from pseudocode_interpreter.cache import ResultCache
+from pseudocode_interpreter.batch import grade
+
+def test_keys():
+    """Keys change with the source, INCLUDEs and input, but not with trailing whitespace"""
+    with tempfile.TemporaryDirectory() as directory:
+        cache = ResultCache(os.path.join(directory, "cache"))
+        key = cache.key("PRINT 1\nPRINT 2", [])
+        assert key == cache.key("PRINT 1   \r\nPRINT 2\n\n", [])
+        assert key != cache.key("PRINT 1\nPRINT 3", [])
+        assert key != cache.key("PRINT 1\nPRINT 2", ["5"])
+        assert key != cache.key("PRINT 1\nPRINT 2", [], context=100)
+
+        library = os.path.join(directory, "lib")
+        program = "INCLUDE \"lib\"\nPRINT f()"
+        with open(library, "w") as file:
+            file.write("INCLUDE \"_string_\"\nDEF f() DO\n  RETURN 1\nENDEF")
+        first = cache.key(program, [], directory)
+        with open(library, "w") as file:
+            file.write("INCLUDE \"_string_\"\nDEF f() DO\n  RETURN 2\nENDEF")
+        assert first is not None and cache.key(program, [], directory) not in (None, first)
+
+        # Runs that read files, run shell commands or miss an INCLUDE are not cached
+        with open(library, "w") as file:
+            file.write("DEF f() DO\n  RETURN shell(\"date\")\nENDEF")
+        assert cache.key(program, [], directory) is None
+        assert cache.key("INCLUDE \"missing\"", [], directory) is None
+        assert cache.key("INCLUDE \"_fio_\"", []) is None
+        assert cache.stats()['uncacheable'] == 3
+
+def test_lru_eviction():
+    """The least recently used results are removed once the cache is over its size"""
+    with tempfile.TemporaryDirectory() as directory:
+        cache = ResultCache(directory, max_bytes=300)
+        for name in "abc":
+            cache.put(name, {'output': name * 80})
+        assert cache.get("a") is not None  # a is now the most recently used
+        cache.put("d", {'output': "d" * 80})
+        assert cache.get("b") is None and cache.get("a") is not None
+        stats = cache.stats()
+        assert (stats['evictions'], stats['entries'], stats['hits'], stats['misses']) == (1, 3, 2, 1)
+        assert sorted(os.listdir(directory)) == ["a.json", "c.json", "d.json"]
+
+        # A new cache on the same directory keeps the order of use
+        cache = ResultCache(directory, max_bytes=300)
+        assert cache.stats()['bytes'] == stats['bytes']
+        cache.put("e", {'output': "e" * 80})
+        assert sorted(os.listdir(directory)) == ["a.json", "d.json", "e.json"]
+
+def test_grade_with_cache():
+    """Grading again takes results from the cache"""
+    with tempfile.TemporaryDirectory() as programs, tempfile.TemporaryDirectory() as tests, \
+            tempfile.TemporaryDirectory() as directory:
+        for name, code in (("good", "INPUT n\nPRINT n * 2"), ("wrong", "INPUT n\nPRINT n")):
+            with open(os.path.join(programs, name + ".pseudo"), "w") as file:
+                file.write(code)
+        for name, text in (("a.in", "3"), ("a.out", "6"), ("b.in", "4"), ("b.out", "8")):
+            with open(os.path.join(tests, name), "w") as file:
+                file.write(text)
+
+        cache = ResultCache(directory)
+        first = grade(programs, tests, jobs=1, cache=cache)
+        assert cache.stats()['hits'] == 0 and cache.stats()['stores'] == 4
+        second = grade(programs, tests, jobs=1, cache=cache)
+        assert cache.stats()['hits'] == 4
+        assert [(r['program'], r['test'], r['status'], r['diff']) for r in first] == \
+               [(r['program'], r['test'], r['status'], r['diff']) for r in second]
+        assert [r['status'] for r in second] == ["passed", "passed", "failed", "failed"]
+
+if __name__ == "__main__":
+    test_keys()
+    test_lru_eviction()
+    test_grade_with_cache()
+    print("✅ All result cache tests passed!")
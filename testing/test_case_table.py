@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Test that CASE statements with constant labels dispatch through a jump table
+and pick the same arm as checking the labels one by one.
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath('.'))
+
+from pseudocode_interpreter.core.lexer import Lexer
+from pseudocode_interpreter.core.parser import Parser
+from pseudocode_interpreter.core.interpreter import Interpreter
+from pseudocode_interpreter.core.case_table import CaseTable
+
+def run(code, linear=False):
+    """Run code and return its output, optionally without the jump table"""
+    ast = Parser(Lexer(code).generate_tokens()).parse()
+    if linear:
+        for statement in ast.statements:
+            if statement.type.name == 'CASE':
+                statement.table = False
+    interpreter = Interpreter()
+    try:
+        interpreter.interpret(ast)
+    except Exception as e:
+        return interpreter.output_text + "ERROR " + str(e).split(' (line')[0]
+    return interpreter.output_text
+
+def case_program(value, arms):
+    """A CASE over x, set to value, with the given arms"""
+    return f"x <- {value}\nCASE OF x\n" + "\n".join(arms) + "\nENDCASE\nPRINT \"end\""
+
+def test_constant_labels_use_table():
+    """All-constant labels build a table once; a variable label keeps the linear walk"""
+    ast = Parser(Lexer(case_program(3, ["1: PRINT 1", "2 TO 5: PRINT 2"])).generate_tokens()).parse()
+    Interpreter().interpret(ast)
+    assert isinstance(ast.statements[1].table, CaseTable)
+
+    ast = Parser(Lexer("y <- 2\n" + case_program(2, ["y: PRINT 1", "3: PRINT 2"])).generate_tokens()).parse()
+    interpreter = Interpreter()
+    interpreter.interpret(ast)
+    assert ast.statements[2].table is False
+    assert interpreter.output_text == "1\nend\n"
+
+def test_first_matching_arm_wins():
+    """Duplicate labels and overlapping ranges select the earliest arm"""
+    arms = ["5 TO 10: PRINT \"a\"", "7: PRINT \"b\"", "1 TO 7: PRINT \"c\"", "7 TO 8: PRINT \"d\"",
+            "12: PRINT \"e\"", "12: PRINT \"f\"", "OTHERWISE: PRINT \"g\""]
+    for value in (0, 1, 4.5, 5, 7, 8.5, 10, 11, 12, 13):
+        code = case_program(value, arms)
+        assert run(code) == run(code, linear=True), value
+    assert run(case_program(7, arms)) == "a\nend\n"
+    assert run(case_program(3, arms)) == "c\nend\n"
+    assert run(case_program(12, arms)) == "e\nend\n"
+    assert run(case_program(11, arms)) == "g\nend\n"
+
+def test_strings_and_range_errors():
+    """Strings match string labels; reaching a range arm with a string is still an error"""
+    arms = ["\"a\": PRINT 1", "1 TO 3: PRINT 2", "\"b\": PRINT 3", "OTHERWISE: PRINT 4"]
+    assert run(case_program('"a"', arms)) == "1\nend\n"
+    assert run(case_program(2, arms)) == "2\nend\n"
+    assert run(case_program(9, arms)) == "4\nend\n"
+    for value in ('"b"', '"c"'):
+        code = case_program(value, arms)
+        assert run(code) == "ERROR Range values must be numbers"
+        assert run(code) == run(code, linear=True)
+    assert run(case_program('"b"', ["\"b\": PRINT 3"])) == "3\nend\n"
+
+def test_no_match_without_otherwise():
+    """Without OTHERWISE an unmatched value runs no arm"""
+    assert run(case_program(4, ["1: PRINT 1", "2 TO 3: PRINT 2"])) == "end\n"
+
+def test_many_arms():
+    """A large CASE in a loop gives the same total through the table"""
+    arms = "".join(f"    {k}: total <- total + {k}\n" for k in range(1, 200))
+    code = f"total <- 0\nFOR i <- 1 TO 500\n    c <- i MOD 250\n    CASE OF c\n{arms}    ENDCASE\nNEXT i\nPRINT total"
+    assert run(code) == f"{2 * sum(range(1, 200))}\n"
+
+if __name__ == "__main__":
+    test_constant_labels_use_table()
+    test_first_matching_arm_wins()
+    test_strings_and_range_errors()
+    test_no_match_without_otherwise()
+    test_many_arms()
+    print("✅ CASE jump table tests passed!")
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Test the command line runner, python -m pseudocode_interpreter run.
+"""
+
+import sys
+import os
+import subprocess
+import tempfile
+sys.path.insert(0, os.path.abspath('.'))
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def cli(*args, stdin=""):
+    """Run the command line runner and return (exit status, stdout, stderr)"""
+    result = subprocess.run([sys.executable, "-m", "pseudocode_interpreter", *args], cwd=ROOT,
+                            input=stdin, capture_output=True, text=True)
+    return result.returncode, result.stdout, result.stderr
+
+def program(code):
+    """Write code to a temporary .pseudo file and return its path"""
+    file = tempfile.NamedTemporaryFile('w', suffix='.pseudo', delete=False)
+    with file:
+        file.write(code)
+    return file.name
+
+def test_core_does_not_import_qt():
+    """The core and the package can be imported without PyQt6"""
+    code = "import sys, pseudocode_interpreter; print('PyQt6' in sys.modules)"
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True)
+    assert result.stdout.strip() == "False", result.stderr
+
+def test_run_with_input():
+    """PRINT goes to stdout and INPUT reads stdin lines"""
+    path = program("INPUT n\nPRINT \"Hello \" + n\nINPUT x\nPRINT x * 2")
+    try:
+        assert cli("run", path, stdin="Bob\n21\n") == (0, "Hello Bob\n42\n", "")
+        status, out, err = cli("run", path, "--engine", "sandbox", stdin="Bob\n21\n")
+        assert (status, out, err) == (0, "Hello Bob\n42\n", "")
+        status, out, err = cli("run", path, stdin="Bob\n")
+        assert status == 1 and out == "Hello Bob\n"
+        assert err == "Error: No input left for INPUT x (line 3:1)\n"
+    finally:
+        os.unlink(path)
+
+def test_errors_and_flags():
+    """Errors go to stderr with a non-zero status; --time and --stats report on stderr"""
+    path = program("PRINT 1\nPRINT y")
+    try:
+        assert cli("run", path) == (1, "1\n", "Error: Variable 'y' not defined (line 2:1)\n")
+        status, out, err = cli("run", path, "--time", "--stats")
+        assert err.splitlines()[1].startswith("time: lex ")
+        assert err.splitlines()[2].startswith("stats: lines 2, tokens ")
+    finally:
+        os.unlink(path)
+    status, out, err = cli("run", os.path.join(ROOT, "missing.pseudo"))
+    assert status == 2 and err.startswith("Error: cannot read")
+
+def test_profile():
+    """--profile writes the hottest functions and lines to stderr after the output"""
+    path = program("DEF sq(n) DO\n  RETURN n * n\nENDEF\nFOR i <- 1 TO 3\n  PRINT sq(i)\nNEXT i")
+    try:
+        status, out, err = cli("run", path, "--profile")
+        assert (status, out) == (0, "1\n4\n9\n")
+        assert err.startswith("\nProfile: ")
+        assert any(line.split()[:2] == ["sq", "3"] for line in err.splitlines())
+        status, out, err = cli("run", path, "--profile", "--engine", "sandbox")
+        assert status == 2 and err == "Error: --profile needs --engine tree\n"
+    finally:
+        os.unlink(path)
+
+def test_memory():
+    """--memory writes the values created per line and the largest arrays to stderr"""
+    path = program("l <- []\nFOR i <- 1 TO 50\n  l <- l + [i]\nNEXT i\nPRINT l[50]")
+    try:
+        status, out, err = cli("run", path, "--memory")
+        assert (status, out) == (0, "50\n")
+        assert err.startswith("\nMemory profile: ")
+        assert any(line.split()[:2] == ["<program>:3", "50"] for line in err.splitlines())
+        assert any(line.split()[:2] == ["l", "50"] for line in err.splitlines())
+        status, out, err = cli("run", path, "--memory", "--profile")
+        assert status == 2 and err == "Error: --profile and --memory cannot be used together\n"
+    finally:
+        os.unlink(path)
+
+def test_sample():
+    """--sample writes collapsed stacks, or speedscope JSON for a .json file"""
+    path = program("DEF spin(k) DO\n  s <- 0\n  FOR j <- 1 TO k\n    s <- s + j\n  NEXT j\n  RETURN s\nENDEF\n"
+                   "PRINT spin(50000)")
+    with tempfile.TemporaryDirectory() as directory:
+        try:
+            collapsed = os.path.join(directory, "out.txt")
+            status, out, err = cli("run", path, "--sample", collapsed, "--sample-interval", "1")
+            assert (status, out, err) == (0, "1250025000\n", "")
+            with open(collapsed) as file:
+                assert file.read().startswith("<program> (line 8);spin (line ")
+            speedscope = os.path.join(directory, "out.json")
+            assert cli("run", path, "--sample", speedscope)[0] == 0
+            with open(speedscope) as file:
+                assert file.read().startswith('{"$schema": "https://www.speedscope.app/')
+        finally:
+            os.unlink(path)
+
+def test_intern():
+    """--intern shares identical expressions of the parsed program, for run and grade alike"""
+    code = "INPUT n\nx <- n * 2 + 1\ny <- n * 2 + 1\nPRINT x + y\n"
+    path = program(code)
+    try:
+        status, out, err = cli("run", path, "--intern", "--stats", stdin="5\n")
+        assert (status, out) == (0, "22\n")
+        assert "shared nodes 5 of 13 expressions" in err
+        status, out, err = cli("run", path, "--intern", "--engine", "sandbox")
+        assert status == 2 and err == "Error: --intern needs --engine tree\n"
+    finally:
+        os.unlink(path)
+    with tempfile.TemporaryDirectory() as programs, tempfile.TemporaryDirectory() as tests:
+        with open(os.path.join(programs, "p.pseudo"), 'w') as file:
+            file.write(code)
+        with open(os.path.join(tests, "t.in"), 'w') as file:
+            file.write("5\n")
+        with open(os.path.join(tests, "t.out"), 'w') as file:
+            file.write("22\n")
+        status, out, err = cli("grade", programs, "--tests", tests, "--intern", "--format", "csv")
+        assert status == 0 and ",passed," in out, (out, err)
+
+if __name__ == "__main__":
+    test_core_does_not_import_qt()
+    test_run_with_input()
+    test_errors_and_flags()
+    test_profile()
+    test_memory()
+    test_sample()
+    test_intern()
+    print("✅ CLI tests passed!")
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Test that the incremental front end matches a full parse while only re-parsing edited statements.
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath('.'))
+
+from pseudocode_interpreter.core.lexer import Lexer
+from pseudocode_interpreter.core.parser import Parser
+from pseudocode_interpreter.core.incremental import IncrementalParser
+
+PROGRAM = """x <- 1 +
+    2
+DEF double(a) DO
+    RETURN a * 2
+ENDEF
+
+FOR i <- 1 TO 3
+    IF i > x THEN
+        PRINT double(i)
+    ENDIF
+NEXT i
+y <- [1,
+      2]
+PRINT y"""
+
+def full_parse(code):
+    lexer = Lexer(code)
+    return Parser(lexer.generate_tokens(), lexer.line_index).parse()
+
+def test_matches_full_parse():
+    """Top-level statements are the same as those of a full parse"""
+    front_end = IncrementalParser(PROGRAM)
+    assert front_end.errors == []
+    assert repr(front_end.ast()) == repr(full_parse(PROGRAM))
+    # Continuation lines stay in the chunk of the statement they continue
+    assert [(chunk.start, chunk.end) for chunk in front_end.chunks] == [(0, 2), (2, 5), (5, 11), (11, 13), (13, 14)]
+
+def test_edit_reparses_only_affected_chunk():
+    """Editing inside a loop re-parses only that loop"""
+    front_end = IncrementalParser(PROGRAM)
+    before = list(front_end.chunks)
+    front_end.update(PROGRAM.replace("PRINT double(i)", "PRINT double(i) + 1"))
+    after = front_end.chunks
+    assert [chunk is old for chunk, old in zip(after, before)] == [True, True, False, True, True]
+    assert repr(front_end.ast()) == repr(full_parse(PROGRAM.replace("PRINT double(i)", "PRINT double(i) + 1")))
+
+def test_inserted_lines_shift_later_chunks():
+    """Inserting lines keeps later chunks but moves them down"""
+    front_end = IncrementalParser(PROGRAM)
+    last = front_end.chunks[-1]
+    front_end.update("z <- 0\nw <- 1\n" + PROGRAM)
+    assert front_end.chunks[-1] is last
+    assert (last.start, last.end) == (15, 16)
+
+def test_errors_have_document_lines():
+    """Syntax errors are reported against the whole document"""
+    front_end = IncrementalParser(PROGRAM)
+    front_end.update(PROGRAM.replace("    ENDIF\n", ""))
+    assert len(front_end.errors) == 1
+    assert front_end.errors[0].line == 10
+    assert front_end.errors[0].message == "Invalid syntax: Unexpected token KEYWORD:NEXT"
+
+    front_end.update(PROGRAM.replace("RETURN a * 2", "RETURN a % 2"))
+    assert [(e.line, e.column) for e in front_end.errors] == [(4, 14)]
+
+    front_end.update(PROGRAM)
+    assert front_end.errors == []
+
+def test_multiline_string_falls_back_to_full_parse():
+    """Strings spanning lines are handled by parsing the whole document"""
+    code = 'PRINT "one\ntwo"\nPRINT 3'
+    front_end = IncrementalParser(code)
+    assert front_end.errors == []
+    assert repr(front_end.ast()) == repr(full_parse(code))
+
+def test_trailing_backslash_in_open_string():
+    """A line ending in a backslash inside an unclosed string is a syntax error, not a crash"""
+    front_end = IncrementalParser(PROGRAM)
+    front_end.update(PROGRAM + '\nPRINT "abc\\')
+    assert [(e.line, e.message) for e in front_end.errors] == [(15, "Unterminated escape at end of input")]
+    front_end.update(PROGRAM + '\nPRINT "abc"')
+    assert front_end.errors == []
+
+def test_in_starts_or_continues_a_statement():
+    """A line starting with the IN operator continues a statement, one assigning to in starts one"""
+    code = "x <- a\n    IN s\nin <- 1\nin[1] <- 2"
+    front_end = IncrementalParser(code)
+    assert front_end.errors == []
+    assert [(chunk.start, chunk.end) for chunk in front_end.chunks] == [(0, 2), (2, 3), (3, 4)]
+    assert repr(front_end.ast()) == repr(full_parse(code))
+
+if __name__ == "__main__":
+    test_matches_full_parse()
+    test_edit_reparses_only_affected_chunk()
+    test_inserted_lines_shift_later_chunks()
+    test_errors_have_document_lines()
+    test_multiline_string_falls_back_to_full_parse()
+    test_trailing_backslash_in_open_string()
+    test_in_starts_or_continues_a_statement()
+    print("✅ Incremental front end tests passed!")
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Test the interning pass that shares identical expression subtrees.
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath('.'))
+
+from pseudocode_interpreter.core.lexer import Lexer
+from pseudocode_interpreter.core.parser import Parser
+from pseudocode_interpreter.core.interpreter import Interpreter
+from pseudocode_interpreter.core.interning import Interner, intern_ast
+
+SORT = """arr <- [5, 3, 8, 1, 9, 2]
+n <- 6
+FOR i <- 1 TO n - 1
+    FOR j <- 1 TO n - i
+        IF arr[j] > arr[j + 1] THEN
+            t <- arr[j]
+            arr[j] <- arr[j + 1]
+            arr[j + 1] <- t
+        ENDIF
+    NEXT j
+NEXT i
+PRINT arr"""
+
+def parse(code):
+    """Lex and parse code"""
+    lexer = Lexer(code)
+    return Parser(lexer.generate_tokens(), lexer.line_index).parse()
+
+def test_identical_expressions_are_shared():
+    """Structurally identical pure expressions become one node"""
+    ast, interner = intern_ast(parse("x <- arr[j + 1] * (n - 1) + arr[j + 1] * (n - 1)"))
+    assert ast.value.left is ast.value.right
+    assert repr(ast) == repr(parse("x <- arr[j + 1] * (n - 1) + arr[j + 1] * (n - 1)"))
+    assert interner.seen == 17 and interner.reused == 9
+    assert interner.report() == "Interned 17 expression nodes into 8 shared nodes (52.9% deduplicated)"
+
+def test_calls_and_statements_are_not_shared():
+    """Calls, assignments and statements keep their own nodes"""
+    ast, _ = intern_ast(parse("f(1)\nf(1)\nx <- g(a) + g(a)\nx <- g(a) + g(a)"))
+    first, second, third, fourth = ast.statements
+    assert first is not second
+    assert first.args[0] is second.args[0]
+    assert third.value.left is not third.value.right
+    assert third is not fourth and third.value is not fourth.value
+
+def test_behaviour_unchanged():
+    """Interned programs run exactly as before"""
+    interpreter = Interpreter()
+    interpreter.interpret(parse(SORT))
+    expected = interpreter.output_text
+
+    ast, interner = intern_ast(parse(SORT))
+    interpreter = Interpreter()
+    interpreter.interpret(ast)
+    assert interpreter.output_text == expected == "[1, 2, 3, 5, 8, 9]\n"
+    assert interner.ratio > 0.4
+
+def test_deep_trees():
+    """Deeply nested trees are interned without recursion"""
+    interner = Interner()
+    ast = Parser(Lexer("x <- " + "(" * 5000 + "1" + " + 1)" * 5000).generate_tokens(), max_depth=None).parse()
+    interner.intern(ast)
+    assert interner.seen == 10001 and len(interner.table) == 5001
+
+if __name__ == "__main__":
+    test_identical_expressions_are_shared()
+    test_calls_and_statements_are_not_shared()
+    test_behaviour_unchanged()
+    test_deep_trees()
+    print("✅ Interning tests passed!")
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Test that function bodies can be parsed lazily, on their first call.
+"""
+
+import sys
+import os
+import tempfile
+sys.path.insert(0, os.path.abspath('.'))
+
+from pseudocode_interpreter.core.lexer import Lexer
+from pseudocode_interpreter.core.parser import Parser
+from pseudocode_interpreter.core.interpreter import Interpreter
+from pseudocode_interpreter.core.ast_nodes import NodeType
+from pseudocode_interpreter.core.errors import PseudocodeError
+
+LIBRARY = """DEF double(a) DO
+    RETURN a * 2
+ENDEF
+
+FUNCTION broken(a) RETURNS INTEGER
+    IF a THEN
+        b <- (a
+    ENDIF
+    RETURN b
+ENDFUNCTION
+
+PROCEDURE show(a)
+    DEF inner(b) DO
+        RETURN b + 1
+    ENDEF
+    PRINT inner(a)
+ENDPROCEDURE
+"""
+
+def parse(code, **options):
+    """Lex and parse code"""
+    lexer = Lexer(code)
+    return Parser(lexer.generate_tokens(), lexer.line_index, **options).parse()
+
+def run(code):
+    """Lex, parse lazily and run code, returning the interpreter"""
+    lexer = Lexer(code)
+    ast = Parser(lexer.generate_tokens(), lexer.line_index, lazy_functions=True).parse()
+    interpreter = Interpreter()
+    interpreter.interpret(ast, lexer.line_index)
+    return interpreter
+
+def test_bodies_are_deferred():
+    """Function definitions keep an unparsed body until called"""
+    ast = parse(LIBRARY, lazy_functions=True)
+    assert [node.type for node in ast.statements] == [NodeType.DEF] * 3
+    assert all(node.body is None and node.lazy_body is not None for node in ast.statements)
+
+    # Parsing a deferred body gives the same nodes as parsing it straight away
+    eager = parse(LIBRARY.replace("(a\n", "(a)\n"))
+    lazy = parse(LIBRARY.replace("(a\n", "(a)\n"), lazy_functions=True)
+    for eager_def, lazy_def in zip(eager.statements, lazy.statements):
+        body, return_expr = lazy_def.lazy_body.parse()
+        assert repr(body) == repr(eager_def.body)
+        assert repr(return_expr) == repr(eager_def.return_expr)
+
+def test_called_functions_run():
+    """Lazily parsed functions, including nested definitions, run normally"""
+    interpreter = run(LIBRARY + "PRINT double(4)\nshow(1)\nshow(2)")
+    assert interpreter.output_text == "8\n2\n3\n"
+
+def test_errors_reported_on_first_call():
+    """A syntax error in a body surfaces, with its position, only when the function is called"""
+    run(LIBRARY + "PRINT double(1)")
+    try:
+        run(LIBRARY + "PRINT broken(1)")
+    except PseudocodeError as e:
+        assert (e.line, e.column) == (8, 5)
+        assert e.message == "Expected closing parenthesis"
+    else:
+        raise AssertionError("Expected a syntax error")
+
+def test_include_parses_lazily():
+    """INCLUDE'd libraries only parse the functions that are called"""
+    with tempfile.TemporaryDirectory() as directory:
+        with open(os.path.join(directory, "library"), "w") as file:
+            file.write(LIBRARY)
+        interpreter = Interpreter()
+        interpreter.cwd = directory
+        interpreter.interpret(parse('INCLUDE "library"\nPRINT double(21)'))
+        assert interpreter.output_text == "42\n"
+
+if __name__ == "__main__":
+    test_bodies_are_deferred()
+    test_called_functions_run()
+    test_errors_reported_on_first_call()
+    test_include_parses_lazily()
+    print("✅ Lazy function tests passed!")
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Test the step and time limits of the interpreter.
+"""
+
+import sys
+import os
+import time
+sys.path.insert(0, os.path.abspath('.'))
+
+from pseudocode_interpreter.core.lexer import Lexer
+from pseudocode_interpreter.core.parser import Parser
+from pseudocode_interpreter.core.interpreter import Interpreter
+from pseudocode_interpreter.core.errors import StepLimitExceeded, TimeLimitExceeded
+
+SPIN = """DEF spin(n) DO
+    WHILE TRUE DO
+        n <- n + 1
+    ENDWHILE
+ENDEF
+DEF outer() DO
+    y <- spin(1)
+    RETURN y
+ENDEF
+PRINT "start"
+x <- outer()
+"""
+
+def run(code, **limits):
+    """Run code with the given limits set on the interpreter and return the interpreter"""
+    lexer = Lexer(code)
+    ast = Parser(lexer.generate_tokens(), lexer.line_index).parse()
+    interpreter = Interpreter()
+    for name, value in limits.items():
+        setattr(interpreter, name, value)
+    interpreter.interpret(ast, lexer.line_index)
+    return interpreter
+
+def expect(error_class, code, **limits):
+    """Run code and return the error_class error it must raise"""
+    try:
+        run(code, **limits)
+    except error_class as e:
+        return e
+    raise AssertionError(f"Expected {error_class.__name__}")
+
+def test_steps():
+    """A loop iteration counts a step per statement of the loop body, and a call counts one"""
+    code = "FOR i <- 1 TO 10\n  x <- i\n  y <- i\nNEXT i\nDEF f() DO\n  RETURN 1\nENDEF\nPRINT x + f()"
+    interpreter = run(code)
+    assert interpreter.steps == 10 * 2 + 1 and interpreter.output_text == "11\n"
+    assert run(code, max_steps=21).output_text == "11\n"
+    e = expect(StepLimitExceeded, code, max_steps=20)
+    assert str(e) == "Step limit exceeded (20 steps) (line 8:1)"
+    e = expect(StepLimitExceeded, code, max_steps=19)
+    assert str(e) == "Step limit exceeded (19 steps) (line 1:1)"
+
+def test_call_stack():
+    """Limit errors name the calls that were running, with the lines they were made from"""
+    e = expect(StepLimitExceeded, SPIN, max_steps=1000)
+    assert e.call_stack == [("outer", 11), ("spin", 7)]
+    assert str(e) == ("Step limit exceeded (1000 steps); call stack: outer() called at line 11 > "
+                      "spin() called at line 7 (line 2:5)")
+
+def test_time_limit():
+    """A run past its time limit stops at the next loop iteration or call"""
+    start = time.perf_counter()
+    e = expect(TimeLimitExceeded, SPIN, max_seconds=0.2)
+    assert 0.2 <= time.perf_counter() - start < 1.0
+    assert str(e).startswith("Time limit exceeded (0.2 s); call stack: outer()")
+    e = expect(TimeLimitExceeded, "REPEAT\n  x <- 1\nUNTIL FALSE", max_seconds=0.1)
+    assert str(e) == "Time limit exceeded (0.1 s) (line 1:1)"
+    assert run("PRINT 1", max_seconds=0.1, max_steps=5).output_text == "1\n"
+
+if __name__ == "__main__":
+    test_steps()
+    test_call_stack()
+    test_time_limit()
+    print("✅ All limit tests passed!")
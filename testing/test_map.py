@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Test the MAP type: literals, key access and assignment, and KEYS, HAS and REMOVE.
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath('.'))
+
+from pseudocode_interpreter.core.lexer import Lexer
+from pseudocode_interpreter.core.parser import Parser
+from pseudocode_interpreter.core.interpreter import Interpreter
+from pseudocode_interpreter.core.values import Variable, Map
+
+def run(code):
+    """Run code and return its output"""
+    lexer = Lexer(code)
+    ast = Parser(lexer.generate_tokens(), lexer.line_index).parse()
+    interpreter = Interpreter()
+    interpreter.interpret(ast, lexer.line_index)
+    return interpreter.output_text
+
+def error(code):
+    """Run code and return the message of the error it must raise"""
+    try:
+        run(code)
+    except Exception as e:
+        return str(e)
+    raise AssertionError(f"No error from {code!r}")
+
+def test_literals_and_access():
+    """Map literals, reading and assigning keys, and printing"""
+    code = """m <- {"alice": 90, "bob": 72, 3: "three"}
+PRINT m
+PRINT m["alice"]
+m["carol"] <- 85
+m["bob"] <- m["bob"] + 1
+PRINT m["bob"], m[1 + 2]
+e <- {}
+e[1] <- [1, 2]
+PRINT e
+PRINT {
+    "a": 1,
+    "b": 2
+}
+"""
+    assert run(code) == ("{alice: 90, bob: 72, 3: three}\n90\n73 three\n{1: [1, 2]}\n"
+                         "{a: 1, b: 2}\n")
+    m = Parser(Lexer('m <- {"a": 1}').generate_tokens()).parse()
+    assert repr(m) == "VAR_ASSIGN:m[MAP[STRING:a, NUMBER:1.0]]"
+
+def test_builtins():
+    """KEYS lists keys in insertion order, HAS tests for one and REMOVE takes one out"""
+    code = """m <- {"x": 1, "y": 2}
+m["z"] <- 3
+PRINT KEYS(m)
+PRINT HAS(m, "y"), HAS(m, "w")
+PRINT REMOVE(m, "y")
+PRINT KEYS(m), HAS(m, "y")
+IF HAS(m, "x") THEN
+    PRINT "found"
+ENDIF
+"""
+    assert run(code) == "[x, y, z]\nTRUE FALSE\n2\n[x, z] FALSE\nfound\n"
+    # A user function of the same name takes the place of a built-in one
+    assert run("DEF KEYS(m) DO\n    RETURN 0\nENDEF\nPRINT KEYS(1)") == "0\n"
+
+def test_copies():
+    """Maps are copied into function arguments like lists are"""
+    code = """DEF add(d) DO
+    d["new"] <- 1
+    RETURN d
+ENDEF
+m <- {"old": 0}
+PRINT add(m)
+PRINT m
+"""
+    assert run(code) == "{old: 0, new: 1}\n{old: 0}\n"
+    original = Variable(Map({"a": Variable(1)}))
+    copy = original.copy()
+    assert copy == original and copy.value.entries["a"] is not original.value.entries["a"]
+
+def test_errors():
+    """Missing keys, bad keys and wrong arguments"""
+    assert error('m <- {"a": 1}\nPRINT m["b"]') == "Key b not in map 'm' (line 2:1)"
+    assert error('m <- {[1]: 1}') == "Map keys must be numbers or strings, not lists (line 1:1)"
+    assert error('m <- {"a" 1}') == "Expected ':' after map key (line 1:11)"
+    assert error('m <- {}\nx <- REMOVE(m, 1)') == "Key 1 not in map (line 2:1)"
+    assert error('x <- KEYS([1])') == "KEYS expects a map, not a list (line 1:1)"
+    assert error('x <- HAS(1, 1)') == "HAS expects a map or set, not a number (line 1:1)"
+    assert error('x <- HAS({})') == "Function 'HAS' expects 2 arguments, got 1 (line 1:1)"
+
+if __name__ == "__main__":
+    test_literals_and_access()
+    test_builtins()
+    test_copies()
+    test_errors()
+    print("✅ All map tests passed!")
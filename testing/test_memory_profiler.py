@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Test the memory profiler.
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath('.'))
+
+from pseudocode_interpreter.core.lexer import Lexer
+from pseudocode_interpreter.core.parser import Parser
+from pseudocode_interpreter.core.values import Variable, Number, String, List, Map, Set, Stack, Queue
+from pseudocode_interpreter.core.memory_profiler import MemoryProfilingInterpreter
+
+PROGRAM = """DEF build(n) DO
+    l <- []
+    FOR i <- 1 TO n
+        l <- [i] + l
+    NEXT i
+    RETURN l
+ENDEF
+small <- build(10)
+big <- build({n})
+total <- 0
+FOR k <- 1 TO {n}
+    total <- total + k
+NEXT k
+"""
+
+def profile(code):
+    """Run code with the memory profiler and return the interpreter"""
+    lexer = Lexer(code)
+    ast = Parser(lexer.generate_tokens(), lexer.line_index).parse()
+    interpreter = MemoryProfilingInterpreter()
+    interpreter.interpret(ast, lexer.line_index)
+    return interpreter
+
+def test_quadratic_list_building():
+    """Copying a growing list allocates quadratically; adding numbers does not"""
+    rows = {}
+    for n in (200, 400):
+        interpreter = profile(PROGRAM.format(n=n))
+        rows[n] = {row['line']: row for row in interpreter.lines()}
+        assert interpreter.lines()[0]['text'] == "l <- [i] + l"
+        assert rows[n][4]['hits'] == n + 10 and rows[n][12]['hits'] == n
+    growth = rows[400][4]['own_bytes'] / rows[200][4]['own_bytes']
+    assert 3 < growth < 4.5, growth
+    assert 1.5 < rows[400][12]['own_bytes'] / rows[200][12]['own_bytes'] < 2.5
+    assert rows[400][3]['bytes'] > rows[400][4]['own_bytes'] > rows[400][3]['own_bytes']
+
+def test_functions_arrays_and_peak():
+    """Values per function, the largest arrays left at the end and the peak"""
+    interpreter = profile(PROGRAM.format(n=100))
+    functions = interpreter.functions()
+    assert [(row['function'], row['calls'], row['line']) for row in functions] == [('build', 2, 1)]
+    assert functions[0]['own_bytes'] == functions[0]['bytes'] > 0
+    assert [(row['name'], row['length']) for row in interpreter.arrays()] == [('big', 100), ('small', 10)]
+    assert interpreter.arrays()[0]['bytes'] > 5 * interpreter.arrays()[1]['bytes']
+    rss, growth, where = interpreter.peak()
+    assert rss >= growth >= 0
+    report = interpreter.report()
+    assert report.startswith("Memory profile: ") and "\nbig " in report
+
+def test_wrappers_removed():
+    """The value classes get their own __init__ back, even when the run fails"""
+    inits = [cls.__init__ for cls in (Variable, Number, String, List, Map, Set, Stack, Queue)]
+    profile("x <- [1, 2]")
+    try:
+        profile("x <- [1]\nPRINT y")
+        assert False, "Expected an error"
+    except Exception as e:
+        assert str(e) == "Variable 'y' not defined (line 2:1)"
+    assert [cls.__init__ for cls in (Variable, Number, String, List, Map, Set, Stack, Queue)] == inits
+
+if __name__ == "__main__":
+    test_quadratic_list_building()
+    test_functions_arrays_and_peak()
+    test_wrappers_removed()
+    print("✅ All memory profiler tests passed!")
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Stress test the parser with deeply nested blocks and expressions.
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath('.'))
+
+from pseudocode_interpreter.core.lexer import Lexer
+from pseudocode_interpreter.core.parser import Parser, MAX_NESTING_DEPTH
+from pseudocode_interpreter.core.ast_nodes import NodeType
+from pseudocode_interpreter.core.errors import PseudocodeError
+
+LEVELS = 10000
+
+def parse(code, **options):
+    """Lex and parse code"""
+    lexer = Lexer(code)
+    return Parser(lexer.generate_tokens(), lexer.line_index, **options).parse()
+
+def depth_of(node, node_type, field):
+    """Length of the chain of node_type nodes starting at node, following field"""
+    depth = 0
+    while node is not None and node.type == node_type:
+        depth += 1
+        child = getattr(node, field)
+        if isinstance(child, list):
+            child = child[-1] if child else None
+        node = child
+    return depth
+
+def nested_ifs(levels):
+    """IF blocks nested levels deep, one per line"""
+    return ("IF x THEN\n" * levels) + "PRINT x\n" + ("ENDIF\n" * levels)
+
+def test_nested_blocks():
+    """Blocks nested 10,000 deep parse without running out of stack"""
+    ast = parse(nested_ifs(LEVELS), max_depth=None)
+    depth = 0
+    while ast.type == NodeType.IF:
+        depth += 1
+        ast = ast.body.statements[0]
+    assert depth == LEVELS
+    assert ast.type == NodeType.PRINT
+
+def test_nesting_limit():
+    """Nesting beyond the limit is a parse error at the offending line"""
+    try:
+        parse(nested_ifs(LEVELS))
+    except PseudocodeError as e:
+        assert e.message == f"Nesting too deep: more than {MAX_NESTING_DEPTH} levels"
+        # Reported at the first statement inside the block that is too deep
+        assert e.line == MAX_NESTING_DEPTH + 2
+    else:
+        raise AssertionError("Expected a nesting error")
+
+    try:
+        parse("x <- " + "(" * 51 + "1" + ")" * 51, max_depth=50)
+    except PseudocodeError as e:
+        assert (e.line, e.column) == (1, 56)
+    else:
+        raise AssertionError("Expected a nesting error")
+    parse("x <- " + "(" * 50 + "1" + ")" * 50, max_depth=50)
+
+def test_nested_brackets():
+    """Parentheses, lists, calls and indices nested 10,000 deep"""
+    assert repr(parse("(" * LEVELS + "1" + ")" * LEVELS, max_depth=None)) == "NUMBER:1.0"
+    assert depth_of(parse("[" * LEVELS + "]" * LEVELS, max_depth=None), NodeType.LIST, 'elements') == LEVELS
+    assert depth_of(parse("f(" * LEVELS + ")" * LEVELS, max_depth=None), NodeType.FUNCTION_CALL, 'args') == LEVELS
+    assert depth_of(parse("x <- " + "a[" * LEVELS + "1" + "]" * LEVELS, max_depth=None).value,
+                    NodeType.ARRAY_ACCESS, 'indices') == LEVELS
+
+def test_long_operator_chains():
+    """Operator chains of 10,000 operands need no nesting allowance"""
+    ast = parse(" + ".join(["a"] * LEVELS))
+    depth = 0
+    while ast.type == NodeType.ADD:
+        depth += 1
+        ast = ast.left
+    assert depth == LEVELS - 1
+    assert depth_of(parse(" ^ ".join(["2"] * LEVELS)), NodeType.POWER, 'right') == LEVELS - 1
+    assert depth_of(parse(" AND ".join(["a"] * LEVELS)), NodeType.AND, 'right') == LEVELS - 1
+    assert depth_of(parse("-" * LEVELS + "1"), NodeType.MINUS, 'operand') == LEVELS
+    assert depth_of(parse("NOT " * LEVELS + "a"), NodeType.NOT, 'operand') == LEVELS
+
+if __name__ == "__main__":
+    test_nested_blocks()
+    test_nesting_limit()
+    test_nested_brackets()
+    test_long_operator_chains()
+    print("✅ Nesting tests passed!")
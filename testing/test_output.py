@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Test the output sinks PRINT writes to.
+"""
+
+import sys
+import os
+import io
+import tempfile
+sys.path.insert(0, os.path.abspath('.'))
+
+from pseudocode_interpreter.core.lexer import Lexer
+from pseudocode_interpreter.core.parser import Parser
+from pseudocode_interpreter.core.interpreter import Interpreter
+from pseudocode_interpreter.core.output import BufferSink, RingBufferSink, FileSink, CallbackSink
+
+PROGRAM = "FOR i <- 1 TO 25\n    PRINT \"line\", i\nNEXT i"
+EXPECTED = "".join(f"line {i}\n" for i in range(1, 26))
+
+def run(code, output=None):
+    """Run code with the given sink and return the interpreter"""
+    interpreter = Interpreter(output=output)
+    interpreter.interpret(Parser(Lexer(code).generate_tokens()).parse())
+    return interpreter
+
+def test_buffer_is_default():
+    """Without a sink, output is kept in memory and each run starts afresh"""
+    interpreter = run(PROGRAM)
+    assert isinstance(interpreter.output, BufferSink)
+    assert interpreter.output_text == EXPECTED
+    interpreter.interpret(Parser(Lexer("PRINT 1").generate_tokens()).parse())
+    assert interpreter.output_text == "1\n"
+    interpreter.output_text = "reset\n"
+    assert interpreter.output_text == "reset\n"
+
+def test_ring_buffer_keeps_last_lines():
+    """A ring buffer keeps only its last lines"""
+    sink = RingBufferSink(max_lines=10)
+    interpreter = run(PROGRAM, sink)
+    assert interpreter.output_text == EXPECTED[EXPECTED.index("line 16"):]
+    assert sink.dropped == 15
+
+def test_file_sink():
+    """A file sink writes everything by the end of the run, given a path or a file object"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "out.txt")
+        sink = FileSink(path, batch_lines=4)
+        interpreter = run(PROGRAM, sink)
+        sink.close()
+        with open(path, encoding="utf-8") as file:
+            assert file.read() == EXPECTED
+        assert interpreter.output_text == ""
+
+    stream = io.StringIO()
+    run(PROGRAM, FileSink(stream, batch_lines=1000))
+    assert stream.getvalue() == EXPECTED
+
+def test_callback_batches():
+    """A callback sink passes output on in batches, and the rest when the run ends"""
+    batches = []
+    run(PROGRAM, CallbackSink(batches.append, batch_lines=10, interval=None))
+    assert [batch.count("\n") for batch in batches] == [10, 10, 5]
+    assert "".join(batches) == EXPECTED
+
+def test_flush_on_error():
+    """Output printed before a runtime error still reaches the sink"""
+    batches = []
+    try:
+        run("PRINT 1\nPRINT 2\nPRINT x", CallbackSink(batches.append, interval=None))
+    except Exception as e:
+        assert "not defined" in str(e)
+    else:
+        raise AssertionError("Expected a runtime error")
+    assert "".join(batches) == "1\n2\n"
+
+if __name__ == "__main__":
+    test_buffer_is_default()
+    test_ring_buffer_keeps_last_lines()
+    test_file_sink()
+    test_callback_batches()
+    test_flush_on_error()
+    print("✅ Output sink tests passed!")
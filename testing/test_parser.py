@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Test the shape of the ASTs the parser builds for expressions and assignments.
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath('.'))
+
+from pseudocode_interpreter.core.lexer import Lexer
+from pseudocode_interpreter.core.parser import Parser
+
+def parse(code):
+    """Parse code and return the AST as a string"""
+    return repr(Parser(Lexer(code).generate_tokens()).parse())
+
+def test_assignment_targets():
+    """Identifiers and indexed identifiers before an assignment sign become assignments"""
+    assert parse("x <- 1") == "VAR_ASSIGN:x[NUMBER:1.0]"
+    assert parse("x = 1") == "VAR_ASSIGN:x[NUMBER:1.0]"
+    assert parse("x ← 1") == "VAR_ASSIGN:x[NUMBER:1.0]"
+    assert parse("a[i, 2] <- 3") == "ARRAY_ASSIGN:a[VAR_ACCESS:i, NUMBER:2.0, NUMBER:3.0]"
+    assert parse("a[b[c[i]]] <- a[b[i]]") == (
+        "ARRAY_ASSIGN:a[ARRAY_ACCESS:b[ARRAY_ACCESS:c[VAR_ACCESS:i]], "
+        "ARRAY_ACCESS:a[ARRAY_ACCESS:b[VAR_ACCESS:i]]]")
+
+def test_non_targets_stay_comparisons():
+    """Without an assignment sign, or in conditions, '=' compares"""
+    assert parse("a[i] + 1") == "ADD[ARRAY_ACCESS:a[VAR_ACCESS:i], NUMBER:1.0]"
+    assert parse("f(x) = 1") == "EE[FUNCTION_CALL:f[VAR_ACCESS:x], NUMBER:1.0]"
+    assert parse("IF a[i] = 1 THEN\nENDIF") == "IF[EE[ARRAY_ACCESS:a[VAR_ACCESS:i], NUMBER:1.0], BLOCK]"
+    assert parse("(a) = 1") == "EE[VAR_ACCESS:a, NUMBER:1.0]"
+
+def test_nested_assignment_in_arguments():
+    """Argument and index expressions may themselves be assignments"""
+    assert parse("f(x = 1)") == "FUNCTION_CALL:f[VAR_ASSIGN:x[NUMBER:1.0]]"
+    assert parse("a[i = 2]") == "ARRAY_ACCESS:a[VAR_ASSIGN:i[NUMBER:2.0]]"
+
+def test_operator_precedence():
+    """Operators group by precedence and associativity"""
+    assert parse("1 + 2 * 3 - 4") == "SUBTRACT[ADD[NUMBER:1.0, MULTIPLY[NUMBER:2.0, NUMBER:3.0]], NUMBER:4.0]"
+    assert parse("a MOD b DIV c / d") == "DIVIDE[INT_DIVIDE[MODULO[VAR_ACCESS:a, VAR_ACCESS:b], VAR_ACCESS:c], VAR_ACCESS:d]"
+    assert parse("2 ^ 3 ^ 4") == "POWER[NUMBER:2.0, POWER[NUMBER:3.0, NUMBER:4.0]]"
+    assert parse("-a ^ 2 * b") == "MULTIPLY[MINUS[POWER[VAR_ACCESS:a, NUMBER:2.0]], VAR_ACCESS:b]"
+    assert parse("2 ^ -a + 1") == "ADD[POWER[NUMBER:2.0, MINUS[VAR_ACCESS:a]], NUMBER:1.0]"
+    assert parse("a < b = c") == "EE[LT[VAR_ACCESS:a, VAR_ACCESS:b], VAR_ACCESS:c]"
+
+def test_logical_operators():
+    """AND/OR group to the right and NOT takes a whole comparison"""
+    assert parse("a AND b OR c") == "AND[VAR_ACCESS:a, OR[VAR_ACCESS:b, VAR_ACCESS:c]]"
+    assert parse("NOT a = b AND c") == "NOT[AND[EE[VAR_ACCESS:a, VAR_ACCESS:b], VAR_ACCESS:c]]"
+    assert parse("a > 1 AND NOT b") == "AND[GT[VAR_ACCESS:a, NUMBER:1.0], NOT[VAR_ACCESS:b]]"
+    try:
+        parse("a + NOT b")
+    except Exception as e:
+        assert str(e) == "Invalid syntax: Unexpected token KEYWORD:NOT"
+    else:
+        raise AssertionError("Expected a syntax error")
+
+if __name__ == "__main__":
+    test_assignment_targets()
+    test_non_targets_stay_comparisons()
+    test_nested_assignment_in_arguments()
+    test_operator_precedence()
+    test_logical_operators()
+    print("✅ Parser tests passed!")
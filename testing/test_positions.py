@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Test that tokens carry source offsets and that errors report line:col positions.
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath('.'))
+
+from pseudocode_interpreter.core.lexer import Lexer
+from pseudocode_interpreter.core.parser import Parser
+from pseudocode_interpreter.core.interpreter import Interpreter
+from pseudocode_interpreter.core.tokens import Token, TokenType
+from pseudocode_interpreter.core.source import LineIndex
+from pseudocode_interpreter.core.errors import PseudocodeError
+
+def run(code):
+    """Lex, parse and run code, returning the interpreter"""
+    lexer = Lexer(code)
+    tokens = lexer.generate_tokens()
+    ast = Parser(tokens, lexer.line_index).parse()
+    interpreter = Interpreter()
+    interpreter.interpret(ast, lexer.line_index)
+    return interpreter
+
+def error_of(code):
+    """Run code and return the error it raises"""
+    try:
+        run(code)
+    except PseudocodeError as e:
+        return e
+    raise AssertionError("Expected an error")
+
+def test_token_offsets():
+    """Tokens record the offset of their first character"""
+    code = "x <- 12\nPRINT \"hi\" + x"
+    tokens = Lexer(code).generate_tokens()
+    assert [t.pos for t in tokens] == [0, 2, 5, 8, 14, 19, 21]
+    assert not hasattr(Token(TokenType.PLUS), '__dict__')
+
+def test_line_index():
+    """Offsets map to 1-based line and column numbers"""
+    index = LineIndex("ab\ncd\n\nef")
+    assert index.line_col(0) == (1, 1)
+    assert index.line_col(2) == (1, 3)
+    assert index.line_col(3) == (2, 1)
+    assert index.line_col(6) == (3, 1)
+    assert index.location(8) == "4:2"
+
+def test_lexer_error_position():
+    """Illegal characters are reported with their position"""
+    e = error_of("x <- 1\ny <- 2 % 3")
+    assert (e.line, e.column) == (2, 8)
+    assert str(e) == "Illegal character '%' (line 2:8)"
+
+def test_parser_error_position():
+    """Parse errors point at the offending token"""
+    e = error_of("x <- 1\nIF x > 0 THEN\n    PRINT x\nENDWHILE")
+    assert (e.line, e.column) == (4, 1)
+    assert e.message == "Invalid syntax: Unexpected token KEYWORD:ENDWHILE"
+
+def test_runtime_error_position():
+    """Runtime errors point at the innermost statement that failed"""
+    code = """
+DEF f(a) DO
+    PRINT a
+    b <- a / 0
+ENDEF
+
+FOR i <- 1 TO 3
+    f(i)
+NEXT i
+"""
+    e = error_of(code)
+    assert (e.line, e.column) == (4, 5)
+    assert e.message == "Division by zero"
+
+def test_errors_without_source():
+    """Without a LineIndex errors keep their original message"""
+    tokens = Lexer("PRINT y").generate_tokens()
+    ast = Parser(tokens).parse()
+    try:
+        Interpreter().interpret(ast)
+    except Exception as e:
+        assert str(e) == "Variable 'y' not defined"
+    else:
+        raise AssertionError("Expected an error")
+
+def test_interpreter_state_restored_after_error():
+    """A failing function call leaves the global scope active"""
+    interpreter = Interpreter()
+    tokens = Lexer("DEF f() DO\n    x <- 1 / 0\nENDEF\nf()").generate_tokens()
+    try:
+        interpreter.interpret(Parser(tokens).parse())
+    except Exception:
+        pass
+    assert interpreter.current_symbol_table is interpreter.global_symbol_table
+
+if __name__ == "__main__":
+    test_token_offsets()
+    test_line_index()
+    test_lexer_error_position()
+    test_parser_error_position()
+    test_runtime_error_position()
+    test_errors_without_source()
+    test_interpreter_state_restored_after_error()
+    print("✅ Position tests passed!")
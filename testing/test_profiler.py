@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Test the per-function and per-line profiler.
+"""
+
+import sys
+import os
+import tempfile
+sys.path.insert(0, os.path.abspath('.'))
+
+from pseudocode_interpreter.core.lexer import Lexer
+from pseudocode_interpreter.core.parser import Parser
+from pseudocode_interpreter.core.interpreter import Interpreter
+from pseudocode_interpreter.core.profiler import ProfilingInterpreter
+
+PROGRAM = """DEF fib(n) DO
+    IF n <= 1 THEN
+        RETURN 1
+    ELSE
+        RETURN fib(n-1) + fib(n-2)
+    ENDIF
+ENDEF
+DEF work(k) DO
+    s <- 0
+    FOR j <- 1 TO k
+        s <- s + j
+    NEXT j
+    RETURN s
+ENDEF
+x <- fib(10)
+PRINT x + work(200)
+"""
+
+def profile(code, cwd=""):
+    """Run code with the profiler and return the interpreter"""
+    lexer = Lexer(code)
+    ast = Parser(lexer.generate_tokens(), lexer.line_index).parse()
+    interpreter = ProfilingInterpreter()
+    interpreter.cwd = cwd
+    interpreter.interpret(ast, lexer.line_index)
+    return interpreter
+
+def test_counts():
+    """Calls per function and hits per line, with the line each is at"""
+    interpreter = profile(PROGRAM)
+    assert interpreter.output_text == "20189\n"
+    functions = {row['function']: row for row in interpreter.functions()}
+    assert functions['fib']['calls'] == 177 and functions['work']['calls'] == 1
+    assert (functions['fib']['file'], functions['fib']['line']) == ("<program>", 1)
+    lines = {row['line']: row for row in interpreter.lines()}
+    assert lines[11]['hits'] == 200 and lines[11]['text'] == "s <- s + j"
+    assert lines[2]['hits'] == 177 and lines[3]['hits'] == 89 and lines[5]['hits'] == 88
+    assert lines[13]['hits'] == 1 and lines[13]['text'] == "RETURN s"  # Closing RETURN of work
+
+def test_times():
+    """Own times add up to the run; recursion adds to a total only once"""
+    interpreter = profile(PROGRAM)
+    functions = {row['function']: row for row in interpreter.functions()}
+    for row in functions.values():
+        assert 0 < row['own'] <= row['total'] <= interpreter.seconds
+    lines = interpreter.lines()
+    assert all(row['own'] <= row['total'] <= interpreter.seconds for row in lines)
+    assert sum(row['own'] for row in lines) <= interpreter.seconds
+    assert lines == sorted(lines, key=lambda row: row['own'], reverse=True)
+    report = interpreter.report()
+    assert report.startswith("Profile: ") and "<program>:11" in report
+
+def test_includes_and_errors():
+    """Lines of INCLUDE files are named after the file; a failed run keeps its profile"""
+    with tempfile.TemporaryDirectory() as directory:
+        with open(os.path.join(directory, "lib"), "w") as file:
+            file.write("DEF double(n) DO\n  RETURN n * 2\nENDEF\nDEF twice(n) DO\n  m <- double(n)\n  RETURN m\nENDEF")
+        interpreter = profile("INCLUDE \"lib\"\nPRINT twice(4)", directory)
+        assert interpreter.output_text == "8\n"
+        functions = {row['function']: row for row in interpreter.functions()}
+        assert (functions['twice']['file'], functions['twice']['line']) == ("lib", 4)
+        assert ("lib", 5) in {(row['file'], row['line']) for row in interpreter.lines()}
+
+    try:
+        profile("x <- 1\nPRINT y")
+        assert False, "Expected an error"
+    except Exception as e:
+        assert str(e) == "Variable 'y' not defined (line 2:1)"
+
+def test_plain_interpreter_untouched():
+    """Profiling is a separate dispatch path: the plain interpreter keeps its own methods"""
+    for name in ('visit_block', 'visit_case_body', 'visit_function_call'):
+        assert getattr(ProfilingInterpreter, name) is not getattr(Interpreter, name)
+        assert getattr(Interpreter, name).__qualname__ == f"Interpreter.{name}"
+
+if __name__ == "__main__":
+    test_counts()
+    test_times()
+    test_includes_and_errors()
+    test_plain_interpreter_untouched()
+    print("✅ All profiler tests passed!")
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Test the sampling profiler and its flamegraph exports.
+"""
+
+import sys
+import os
+import json
+import tempfile
+sys.path.insert(0, os.path.abspath('.'))
+
+from pseudocode_interpreter.core.lexer import Lexer
+from pseudocode_interpreter.core.parser import Parser
+from pseudocode_interpreter.core.interpreter import Interpreter
+from pseudocode_interpreter.core.sampler import SamplingProfiler
+
+PROGRAM = """DEF spin(k) DO
+    s <- 0
+    FOR j <- 1 TO k
+        s <- s + j
+    NEXT j
+    RETURN s
+ENDEF
+DEF outer(k) DO
+    PRINT spin(k)
+    RETURN 0
+ENDEF
+x <- outer(60000)
+"""
+
+def parse(code):
+    lexer = Lexer(code)
+    return Parser(lexer.generate_tokens(), lexer.line_index).parse(), lexer.line_index
+
+def test_running_frames():
+    """The frames of the program and each call, with the statement each one is running"""
+    ast, line_index = parse("DEF inner() DO\n  PRINT 1\n  RETURN 0\nENDEF\nDEF f() DO\n  y <- inner()\n  RETURN y\nENDEF\nx <- f()")
+    interpreter = Interpreter()
+    seen = []
+    print_visitor = interpreter.visit_print
+    def visit_print(node):
+        seen.append([(name, index.line_col(pos)[0]) for name, index, pos in interpreter.running_frames()])
+        return print_visitor(node)
+    interpreter.visit_print = visit_print
+    interpreter.interpret(ast, line_index)
+    assert seen == [[(None, 9), ('f', 6), ('inner', 2)]]
+
+def test_frames_follow_calls():
+    """Interpreter.frames covers a call's closing RETURN, and is back to the program after an error"""
+    ast, line_index = parse("DEF inner() DO\n  PRINT 1\n  RETURN 0\nENDEF\nDEF g() DO\n  RETURN inner() + 1\nENDEF\n"
+                            "x <- g()\ny <- g() + z")
+    interpreter = Interpreter()
+    seen = []
+    print_visitor = interpreter.visit_print
+    def visit_print(node):
+        seen.append([(name, index.line_col(pos)[0]) for name, index, pos in interpreter.running_frames()])
+        return print_visitor(node)
+    interpreter.visit_print = visit_print
+    try:
+        interpreter.interpret(ast, line_index)
+    except Exception as e:
+        assert str(e) == "Variable 'z' not defined (line 9:1)"
+    else:
+        raise AssertionError("No error from z")
+    assert seen == [[(None, 8), ('g', 6), ('inner', 2)], [(None, 9), ('g', 6), ('inner', 2)]]
+    assert interpreter.running_frames() == [(None, line_index, None)]
+
+def test_samples_and_exports():
+    """Samples name the calls and lines running; both export formats hold them"""
+    ast, line_index = parse(PROGRAM)
+    interpreter = Interpreter()
+    with SamplingProfiler(interpreter, interval=0.001) as sampler:
+        interpreter.interpret(ast, line_index)
+    assert sampler.samples and sampler.seconds > 0
+    stacks = sampler.stacks()
+    assert all(frames[0] == "<program> (line 12)" for frames, seconds in stacks)
+    assert any(frames[1:] == ("outer (line 9)", "spin (line 4)") for frames, seconds in stacks)
+    assert all(frames[:2] == ("<program>", "outer") for frames, seconds in sampler.stacks(lines=False))
+
+    collapsed = sampler.collapsed()
+    counts = [int(line.rsplit(" ", 1)[1]) for line in collapsed.splitlines()]
+    assert sum(counts) == len(sampler.samples)
+    assert "<program> (line 12);outer (line 9);spin (line 4) " in collapsed
+
+    profile = sampler.speedscope(name="test")
+    data = profile['profiles'][0]
+    assert data['type'] == 'sampled' and data['unit'] == 'seconds'
+    assert len(data['samples']) == len(data['weights']) == len(sampler.samples)
+    names = [frame['name'] for frame in profile['shared']['frames']]
+    assert names[data['samples'][0][0]] == "<program> (line 12)"
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "profile.json")
+        sampler.write(path)
+        with open(path) as file:
+            assert json.load(file)['profiles'][0]['samples'] == data['samples']
+        path = os.path.join(directory, "profile.txt")
+        sampler.write(path)
+        with open(path) as file:
+            assert file.read() == collapsed
+
+if __name__ == "__main__":
+    test_running_frames()
+    test_frames_follow_calls()
+    test_samples_and_exports()
+    print("✅ All sampler tests passed!")
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Test running programs in sandbox processes with limited CPU time and memory.
+"""
+
+import sys
+import os
+import tempfile
+import threading
+import time
+sys.path.insert(0, os.path.abspath('.'))
+
+from pseudocode_interpreter.core.errors import ProgramStopped
+from pseudocode_interpreter.core.sandbox import SandboxPool, resource
+from pseudocode_interpreter.core.lexer import Lexer
+from pseudocode_interpreter.core.parser import Parser
+from pseudocode_interpreter.core.interpreter import Interpreter, STDLIB_DIR, parsed_includes, preload_stdlib
+
+def expect_error(pool, code, message):
+    """Run code in the pool and check that it fails with message"""
+    try:
+        pool.run(code)
+    except Exception as e:
+        assert str(e).startswith(message), str(e)
+        return e
+    raise AssertionError(f"Expected '{message}'")
+
+def test_includes_parsed_once():
+    """INCLUDE reuses the parsed file until its source changes, and the stdlib can be parsed ahead"""
+    preload_stdlib()
+    assert os.path.join(STDLIB_DIR, "_string_") in parsed_includes
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "lib")
+        interpreter = Interpreter()
+        interpreter.cwd = directory
+        program = Parser(Lexer("INCLUDE \"lib\"\nPRINT f()").generate_tokens()).parse()
+        parsed = []
+        for value in (1, 1, 2):
+            with open(path, "w") as file:
+                file.write(f"DEF f() DO\n    RETURN {value}\nENDEF")
+            interpreter.interpret(program)
+            assert interpreter.output_text == f"{value}\n"
+            parsed.append(parsed_includes[path][1])
+        assert parsed[0] is parsed[1] and parsed[1] is not parsed[2]
+
+def test_output_input_and_errors():
+    """Output and INPUT are relayed, and errors come back as messages"""
+    pool = SandboxPool(size=1)
+    try:
+        batches = []
+        result = pool.run("PRINT \"value?\"\nINPUT x\nPRINT x * 2", on_output=batches.append,
+                          on_input=lambda name: "21")
+        assert "".join(batches) == "value?\n42\n"
+        assert result == "None"
+        expect_error(pool, "PRINT 1\nPRINT y", "Variable 'y' not defined (line 2:1)")
+    finally:
+        pool.close()
+
+def test_resource_limits():
+    """Runaway memory and CPU use end the run without affecting the caller"""
+    if resource is None:
+        return
+    pool = SandboxPool(size=1, cpu_seconds=1, memory_mb=64)
+    try:
+        expect_error(pool, "s <- \"x\"\nWHILE 1 = 1 DO\n    s <- s + s\nENDWHILE", "Memory limit exceeded")
+        expect_error(pool, "i <- 0\nWHILE 1 = 1 DO\n    i <- i + 1\nENDWHILE", "CPU time limit exceeded")
+        assert pool.run("PRINT 1", on_output=lambda text: None) == "None"
+    finally:
+        pool.close()
+
+def test_kill():
+    """Killing a run stops it at once"""
+    pool = SandboxPool(size=1)
+    try:
+        run = pool.start("WHILE 1 = 1 DO\nENDWHILE")
+        timer = threading.Timer(0.2, run.kill)
+        timer.start()
+        start = time.monotonic()
+        try:
+            run.wait()
+        except ProgramStopped:
+            pass
+        else:
+            raise AssertionError("Expected the run to be stopped")
+        assert time.monotonic() - start < 1
+    finally:
+        pool.close()
+
+if __name__ == "__main__":
+    test_includes_parsed_once()
+    test_output_input_and_errors()
+    test_resource_limits()
+    test_kill()
+    print("✅ Sandbox tests passed!")
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Test the local grading service against localhost.
+"""
+
+import sys
+import os
+import json
+import tempfile
+import threading
+import urllib.request
+import urllib.error
+sys.path.insert(0, os.path.abspath('.'))
+
+from pseudocode_interpreter.server import GradingServer
+from pseudocode_interpreter.cache import ResultCache
+
+def start_server(**options):
+    """Start a grading server on a free port and return it with its URL"""
+    server = GradingServer(('127.0.0.1', 0), quiet=True, **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def request(url, job=None):
+    """GET url, or POST job to it as JSON; return (HTTP status, response)"""
+    data = json.dumps(job).encode('utf-8') if job is not None else None
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, data=data), timeout=30) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+def test_run_jobs():
+    """Output, errors, missing input and timeouts are reported per job"""
+    server, url = start_server(workers=2, timeout=5)
+    try:
+        status, response = request(url + "/run", {"code": "INPUT n\nPRINT n * 2", "input": ["21"],
+                                                  "expected": "42\n"})
+        assert status == 200 and response['status'] == 'ok' and response['output'] == "42\n"
+        assert response['passed'] is True and response['error'] is None
+        assert set(response['stats']) == {'run_ms', 'queue_ms', 'output_bytes', 'cached'}
+
+        status, response = request(url + "/run", {"code": "PRINT 1\nPRINT y"})
+        assert (response['status'], response['output']) == ('error', "1\n")
+        assert response['error'] == "Variable 'y' not defined (line 2:1)"
+
+        status, response = request(url + "/run", {"code": "INPUT a\nINPUT b", "input": "1"})
+        assert response['error'] == "No input left for INPUT b (line 2:1)"
+
+        status, response = request(url + "/run", {"code": "WHILE TRUE DO\n  x <- 1\nENDWHILE",
+                                                  "timeout": 0.3})
+        assert response['status'] == 'timeout' and response['stats']['run_ms'] < 3000
+
+        assert request(url + "/run", {"input": []})[0] == 400
+        assert request(url + "/missing")[0] == 404
+        status, counts = request(url + "/status")
+        assert counts['completed'] == 4 and counts['timeouts'] == 1 and counts['running'] == 0
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def test_queue_limit():
+    """Jobs wait for a free worker, and are refused once the queue is full"""
+    server, url = start_server(workers=1, max_queue=1, timeout=5)
+    slow = {"code": "FOR i <- 1 TO 100000\n  x <- i\nNEXT i\nPRINT x"}
+    results = []
+    try:
+        threads = [threading.Thread(target=lambda: results.append(request(url + "/run", slow)))
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        statuses = sorted(status for status, _ in results)
+        assert statuses[0] == 200 and 503 in statuses, statuses
+        for status, response in results:
+            if status == 200:
+                assert response['output'] == "100000\n"
+            else:
+                assert response['status'] == 'busy'
+        status, counts = request(url + "/status")
+        assert counts['rejected'] == statuses.count(503) and counts['queued'] == 0
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def test_cached_jobs():
+    """A job seen before is answered from the result cache"""
+    with tempfile.TemporaryDirectory() as directory:
+        server, url = start_server(workers=1, cache=ResultCache(directory))
+        try:
+            job = {"code": "INPUT n\nPRINT n * 2", "input": ["4"], "expected": "8"}
+            responses = [request(url + "/run", job)[1] for _ in range(2)]
+            assert [r['stats']['cached'] for r in responses] == [False, True]
+            assert all(r['output'] == "8\n" and r['passed'] for r in responses)
+            status, counts = request(url + "/status")
+            assert counts['completed'] == 2
+            assert (counts['cache']['hits'], counts['cache']['misses']) == (1, 1)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+if __name__ == "__main__":
+    test_run_jobs()
+    test_queue_limit()
+    test_cached_jobs()
+    print("✅ All grading service tests passed!")
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Test the SET type: SET, ADD, IN, set algebra and FOR EACH loops.
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath('.'))
+
+from pseudocode_interpreter.core.lexer import Lexer
+from pseudocode_interpreter.core.parser import Parser
+from pseudocode_interpreter.core.interpreter import Interpreter
+
+def run(code):
+    """Run code and return its output"""
+    lexer = Lexer(code)
+    ast = Parser(lexer.generate_tokens(), lexer.line_index).parse()
+    interpreter = Interpreter()
+    interpreter.interpret(ast, lexer.line_index)
+    return interpreter.output_text
+
+def error(code):
+    """Run code and return the message of the error it must raise"""
+    try:
+        run(code)
+    except Exception as e:
+        return str(e)
+    raise AssertionError(f"No error from {code!r}")
+
+def test_sets():
+    """Sets drop duplicates, keep the order elements were added in and test membership"""
+    code = """s <- SET([3, 1, 3, "a", 1])
+PRINT s
+PRINT 3 IN s, 2 IN s, NOT 2 IN s
+ADD(s, 2)
+ADD(s, 3)
+PRINT s, HAS(s, 2)
+PRINT REMOVE(s, "a"), s
+PRINT SET([])
+"""
+    assert run(code) == "{3, 1, a}\nTRUE FALSE TRUE\n{3, 1, a, 2} TRUE\na {3, 1, 2}\n{}\n"
+    assert run('PRINT 2 IN [1, 2], "p" IN {"p": 0}, 0 IN {"p": 0}') == "TRUE TRUE FALSE\n"
+    assert repr(Parser(Lexer("x <- NOT a IN s").generate_tokens()).parse()) == \
+        "VAR_ASSIGN:x[NOT[IN[VAR_ACCESS:a, VAR_ACCESS:s]]]"
+
+def test_algebra():
+    """UNION, INTERSECTION and DIFFERENCE make new sets"""
+    code = """a <- SET([1, 2, 3])
+b <- SET([2, 3, 4])
+PRINT UNION(a, b), INTERSECTION(a, b), DIFFERENCE(a, b), DIFFERENCE(b, a)
+PRINT a, b
+"""
+    assert run(code) == "{1, 2, 3, 4} {2, 3} {1} {4}\n{1, 2, 3} {2, 3, 4}\n"
+
+def test_for_each():
+    """FOR EACH loops over sets, map keys, lists and the characters of strings"""
+    code = """s <- SET([5, 6])
+FOR EACH x IN s
+    ADD(s, x * 10)
+    PRINT x
+NEXT x
+PRINT s
+FOR EACH k IN {"p": 1, "q": 2}
+    PRINT k
+NEXT k
+FOR EACH c IN "hi"
+    PRINT c
+NEXT c
+FOR EACH v IN [1, [2]]
+    PRINT v
+NEXT v
+"""
+    assert run(code) == "5\n6\n{5, 6, 50, 60}\np\nq\nh\ni\n1\n[2]\n"
+    code = """DEF first(l) DO
+    FOR EACH x IN l
+        RETURN x
+    NEXT x
+    RETURN 0
+ENDEF
+PRINT first([7, 8])
+"""
+    assert run(code) == "7\n"
+
+def test_each_and_in_are_names():
+    """EACH and IN are keywords only in a FOR EACH loop and as an operator, so old programs keep them as names"""
+    code = """each <- 3
+in <- [each]
+PRINT each IN in, in
+in[1] <- 4
+PRINT in
+FOR each <- 1 TO 2
+    PRINT each
+NEXT each
+In <- SET([5])
+FOR EACH x IN In
+    PRINT x in In
+NEXT x
+"""
+    assert run(code) == "TRUE [3]\n[4]\n1\n2\nTRUE\n"
+    assert run("x <- 2\nin <- x\nPRINT in") == "2\n"
+    assert repr(Parser(Lexer("x <- a\nin <- 1").generate_tokens()).parse()) == \
+        "BLOCK[VAR_ASSIGN:x[VAR_ACCESS:a], VAR_ASSIGN:in[NUMBER:1.0]]"
+
+def test_errors():
+    """Elements must be numbers or strings, and the builtins check their arguments"""
+    assert error("s <- SET([[1]])") == "Set elements must be numbers or strings, not lists (line 1:1)"
+    assert error("x <- 1 IN 2") == "IN needs a set, map or list, not a number (line 1:1)"
+    assert error("FOR EACH x IN 3\n    PRINT x\nNEXT x") == \
+        "FOR EACH needs a set, map, list or string, not a number (line 1:1)"
+    assert error("FOR EACH x IN [1]\n    PRINT x\nNEXT y") == "Expected variable name 'x' after NEXT (line 3:6)"
+    assert error("x <- UNION(SET([1]), [2])") == "UNION expects a set, not a list (line 1:1)"
+    assert error("x <- REMOVE(SET([1]), 2)") == "2 not in set (line 1:1)"
+
+if __name__ == "__main__":
+    test_sets()
+    test_algebra()
+    test_for_each()
+    test_each_and_in_are_names()
+    test_errors()
+    print("✅ All set tests passed!")
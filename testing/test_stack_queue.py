@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Test the STACK and QUEUE types: PUSH, POP, ENQUEUE, DEQUEUE, PEEK and ISEMPTY.
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath('.'))
+
+from pseudocode_interpreter.core.lexer import Lexer
+from pseudocode_interpreter.core.parser import Parser
+from pseudocode_interpreter.core.interpreter import Interpreter
+from pseudocode_interpreter.core.values import Variable, Stack
+
+def run(code):
+    """Run code and return its output"""
+    lexer = Lexer(code)
+    ast = Parser(lexer.generate_tokens(), lexer.line_index).parse()
+    interpreter = Interpreter()
+    interpreter.interpret(ast, lexer.line_index)
+    return interpreter.output_text
+
+def error(code):
+    """Run code and return the message of the error it must raise"""
+    try:
+        run(code)
+    except Exception as e:
+        return str(e)
+    raise AssertionError(f"No error from {code!r}")
+
+def test_stacks():
+    """PUSH and POP work at the top of a stack, PEEK reads the top without taking it"""
+    code = """s <- STACK()
+PUSH(s, 1)
+PUSH(s, "two")
+PUSH(s, [3])
+PRINT s, PEEK(s), ISEMPTY(s)
+PRINT POP(s), POP(s), s
+PRINT POP(s), ISEMPTY(s)
+"""
+    assert run(code) == "STACK[1, two, [3]] [3] FALSE\n[3] two STACK[1]\n1 TRUE\n"
+
+def test_queues():
+    """ENQUEUE adds at the back of a queue, DEQUEUE and PEEK work at the front"""
+    code = """q <- QUEUE()
+FOR i <- 1 TO 3
+    ENQUEUE(q, i)
+NEXT i
+PRINT q, PEEK(q)
+WHILE NOT ISEMPTY(q) DO
+    PRINT DEQUEUE(q)
+ENDWHILE
+PRINT q
+"""
+    assert run(code) == "QUEUE[1, 2, 3] 1\n1\n2\n3\nQUEUE[]\n"
+
+def test_copies():
+    """Stacks and queues are copied into function arguments like lists are"""
+    code = """DEF drain(s) DO
+    PUSH(s, 9)
+    PRINT s
+    x <- POP(s)
+    RETURN POP(s)
+ENDEF
+s <- STACK()
+PUSH(s, 1)
+PRINT drain(s), s
+"""
+    assert run(code) == "STACK[1, 9]\n1 STACK[1]\n"
+    original = Variable(Stack())
+    original.value.items.append(Variable(1))
+    copy = original.copy()
+    assert copy == original and copy.value.items[0] is not original.value.items[0]
+
+def test_errors():
+    """Empty containers and wrong arguments"""
+    assert error("s <- STACK()\nx <- POP(s)") == "POP from an empty stack (line 2:1)"
+    assert error("q <- QUEUE()\nx <- DEQUEUE(q)") == "DEQUEUE from an empty queue (line 2:1)"
+    assert error("x <- PEEK(QUEUE())") == "PEEK at an empty queue (line 1:1)"
+    assert error("PUSH(QUEUE(), 1)") == "PUSH expects a stack, not a queue (line 1:1)"
+    assert error("ENQUEUE([1], 1)") == "ENQUEUE expects a queue, not a list (line 1:1)"
+    assert error("x <- ISEMPTY([])") == "ISEMPTY expects a stack or queue, not a list (line 1:1)"
+
+if __name__ == "__main__":
+    test_stacks()
+    test_queues()
+    test_copies()
+    test_errors()
+    print("✅ All stack and queue tests passed!")
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Test stopping a running program from another thread, as the IDE's Stop button does.
+"""
+
+import sys
+import os
+import threading
+import time
+sys.path.insert(0, os.path.abspath('.'))
+
+from pseudocode_interpreter.core.lexer import Lexer
+from pseudocode_interpreter.core.parser import Parser
+from pseudocode_interpreter.core.interpreter import Interpreter
+from pseudocode_interpreter.core.errors import ProgramStopped
+from pseudocode_interpreter.core.output import CallbackSink
+
+LOOPS = {
+    "WHILE": "i <- 0\nWHILE 1 = 1 DO\n    i <- i + 1\nENDWHILE",
+    "FOR": "FOR i <- 1 TO 100000000\n    x <- i\nNEXT i",
+    "REPEAT": "i <- 0\nREPEAT\n    i <- i + 1\nUNTIL i < 0",
+    "recursion": "DEF f(n) DO\n    IF n = 0 THEN\n        RETURN 1\n    ENDIF\n    RETURN f(n - 1) + f(n - 1)\nENDEF\nPRINT f(60)",
+}
+
+def stop_after(code, delay, output=None):
+    """Run code on a thread, request a stop after delay seconds and return (error, seconds to stop)"""
+    lexer = Lexer(code)
+    ast = Parser(lexer.generate_tokens(), lexer.line_index).parse()
+    interpreter = Interpreter(output=output)
+    errors = []
+
+    def run():
+        try:
+            interpreter.interpret(ast, lexer.line_index)
+        except Exception as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    time.sleep(delay)
+    start = time.monotonic()
+    interpreter.request_stop()
+    thread.join(5)
+    return (errors[0] if errors else None), time.monotonic() - start
+
+def test_runaway_loops_stop():
+    """Every kind of loop, and runaway recursion, stops within 100 ms"""
+    for name, code in LOOPS.items():
+        error, seconds = stop_after(code, 0.05)
+        assert isinstance(error, ProgramStopped), (name, error)
+        assert str(error).startswith("Program stopped (line "), str(error)
+        assert seconds < 0.1, (name, seconds)
+
+def test_output_before_stop_is_kept():
+    """Output printed before the stop reaches the sink"""
+    batches = []
+    code = "i <- 0\nWHILE 1 = 1 DO\n    i <- i + 1\n    PRINT i\nENDWHILE"
+    error, _ = stop_after(code, 0.05, CallbackSink(batches.append))
+    assert isinstance(error, ProgramStopped)
+    lines = "".join(batches).split()
+    assert lines and lines == [str(i) for i in range(1, len(lines) + 1)]
+
+def test_finished_program_is_unaffected():
+    """A program that runs to the end is not affected"""
+    interpreter = Interpreter()
+    interpreter.interpret(Parser(Lexer("FOR i <- 1 TO 3\n    PRINT i\nNEXT i").generate_tokens()).parse())
+    assert interpreter.output_text == "1\n2\n3\n"
+
+if __name__ == "__main__":
+    test_runaway_loops_stop()
+    test_output_before_stop_is_kept()
+    test_finished_program_is_unaffected()
+    print("✅ Stop tests passed!")